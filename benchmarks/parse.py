@@ -0,0 +1,239 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Parse throughput and end-to-end benchmark of the modules, offline.
+
+Pages come from tget.testing.sites (deterministic fake pages in the shape
+of each site), or from a vcrpy cassette recorded on the real sites with
+--cassette. Measures:
+  parse - module code on in-memory pages: apibay/YTS JSON parsing, the
+    1337x/limetorrents set_item extraction, and each module main() with
+    every request answered from memory.
+  http  - Module.http_get_request overhead on a replayed response.
+  e2e   - WGSelect.run latency per target, requests replayed.
+Every case reports the median time per call and per unit (row, page,
+request) and the peak memory allocated by one call (tracemalloc).
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from docopt import docopt
+
+# Benchmark the checkout this file is in.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+__doc__ = """Usage: parse.py [options]
+
+Options:
+  -n --rows=<n>          Torrents known by the fake sites [default: 200].
+  -r --repeat=<n>        Runs of every case, the median is kept [default: 20].
+  -k --case=<text>       Only run the cases whose name contains <text>.
+  -c --cassette=<file>   Run e2e on the real sites, recorded once to <file> (vcrpy).
+  -J --json              Output the results in JSON format.
+  -h --help              Help message.
+"""
+
+TARGETS = ("the_pirate_bay", "yts", "1337x", "limetorrents")
+
+
+def fake_sites(rows):
+    from tget.testing.sites import FakeSites
+
+    class MemoSites(FakeSites):
+        """MemoSites: FakeSites rendering every page once, so the cases
+        measure tget and not the page generator."""
+
+        pages = dict()
+
+        def respond(self, target, path, query=""):
+            key = (target, path, query)
+            if key not in self.pages:
+                self.pages[key] = super().respond(target, path, query)
+            return self.pages[key]
+
+    return MemoSites(count=rows)
+
+
+def page_getter(sites):
+    """page_getter: stand-in for Module.http_get_request, answering from @sites.
+    @return: function, and the list of requested URLs.
+    """
+    from tget.testing.sites import SITE_HOSTS
+
+    requested = list()
+
+    def get(url, *args, **kwargs):
+        requested.append(url)
+        parts = urlsplit(url)
+        status, ctype, body = sites.respond(SITE_HOSTS[parts.hostname], parts.path, parts.query)
+        return body.decode("utf-8") if status == 200 else ""
+
+    return get, requested
+
+
+def measure(fn, repeat):
+    """measure: median seconds of @fn() and peak bytes allocated by one call."""
+    fn()  # Warm up: imports, regex compilation, caches.
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def parse_cases(sites):
+    """parse_cases: (name, unit, units per call, function) of the module code."""
+    from tget.testing import sites as pages
+
+    tpb = import_module("tget.modules.the_pirate_bay")
+    yts = import_module("tget.modules.yts")
+    leetx = import_module("tget.modules.1337x")
+    lime = import_module("tget.modules.limetorrents")
+    get, requested = page_getter(sites)
+    apibay = pages.apibay_json(sites.torrents[:100])
+    movies = pages.yts_json(sites.torrents[:20])
+    torrent = sites.torrents[0]
+
+    def parse_tpb():
+        tpb.the_pirate_bay({})._parse_data(apibay)
+
+    def parse_yts():
+        yts.yts({})._parse_data(movies)
+
+    def set_item(cls):
+        run = cls({})
+        run.module.http_get_request = get
+        return run
+
+    leetx_run = set_item(leetx.leetx)
+    leetx_link = "/torrent/%d/%s/" % (torrent["id"], pages.slug(torrent))
+    lime_run = set_item(lime.limetorrents)
+    lime_link = "/%s-torrent-%d.html" % (pages.slug(torrent), torrent["id"])
+
+    cases = [
+        ("parse the_pirate_bay._parse_data", "row", min(100, len(sites.torrents)), parse_tpb),
+        ("parse yts._parse_data", "torrent", min(20, len(sites.torrents)), parse_yts),
+        ("parse 1337x.set_item", "page", 1, lambda: leetx_run.set_item(leetx_link)),
+        ("parse limetorrents.set_item", "page", 1, lambda: lime_run.set_item(lime_link)),
+    ]
+    for target in TARGETS:
+        run = import_module("tget.modules.%s" % (target))
+        for action in ("--search", "--list"):
+            pargs = {action: ["ubuntu"] if action == "--search" else True, "--results": ["10"]}
+            del requested[:]
+            main_with_pages(run, pargs, get)
+            cases.append(("parse %s main %s" % (target, action), "page", len(requested),
+                          lambda run=run, pargs=pargs: main_with_pages(run, pargs, get)))
+    return cases
+
+
+def main_with_pages(run, pargs, get):
+    from tget.core.module import Module
+
+    http_get_request = Module.http_get_request
+    Module.http_get_request = lambda self, url, *args, **kwargs: get(url)
+    try:
+        return run.main(pargs)
+    finally:
+        Module.http_get_request = http_get_request
+
+
+def http_cases():
+    from tget.core.module import Module
+
+    module = Module()
+    return [
+        ("http json (apibay q.php)", "request", 1,
+         lambda: module.http_get_request("https://apibay.org/q.php?q=ubuntu")),
+        ("http html (1337x listing)", "request", 1,
+         lambda: module.http_get_request("https://1337x.to/search/ubuntu/1/")),
+    ]
+
+
+def e2e_cases(targets=TARGETS):
+    from tget.core.tget import WGSelect
+
+    def run(target, action):
+        pargs = {"--target": [target], "--results": ["10"]}
+        if action == "--search":
+            pargs["--search"] = ["ubuntu"]
+        else:
+            pargs["--list"] = True
+        sel = WGSelect(pargs)
+        sel.quiet = True
+        return sel.run(api_mode=True)
+
+    return [("e2e %s %s" % (target, action), "run", 1,
+             lambda target=target, action=action: run(target, action))
+            for target in tuple(targets) + ("all",) for action in ("--search", "--list")]
+
+
+def run_cases(cases, repeat, only=None):
+    results = list()
+    for name, unit, units, fn in cases:
+        if only and only not in name:
+            continue
+        seconds, peak = measure(fn, repeat)
+        results.append({
+            "case": name, "unit": unit, "units": units,
+            "ms": seconds * 1000,
+            "us_per_unit": seconds * 1e6 / units if units else None,
+            "peak_kb": peak / 1024,
+        })
+    return results
+
+
+def show(results):
+    print("%-42s %10s %16s %10s" % ("case", "ms/call", "us/unit", "peak KB"))
+    for result in results:
+        per_unit = "-"
+        if result["us_per_unit"] is not None:
+            per_unit = "%.1f/%s" % (result["us_per_unit"], result["unit"])
+        print("%-42s %10.3f %16s %10.1f" % (
+            result["case"], result["ms"], per_unit, result["peak_kb"]))
+
+
+def main(argv=None):
+    args = docopt(__doc__, argv=argv)
+    repeat = int(args["--repeat"])
+    # Keep the index writes of WGSelect away from the user cache.
+    os.environ["TGET_CACHE_DIR"] = tempfile.mkdtemp(prefix="tget-bench-")
+    if args["--cassette"]:
+        import vcr
+
+        with vcr.use_cassette(args["--cassette"], record_mode="once",
+                              allow_playback_repeats=True):
+            results = run_cases(e2e_cases(), repeat, args["--case"])
+    else:
+        from tget.testing.replay import SitesAdapter, replay
+
+        sites = fake_sites(int(args["--rows"]))
+        results = run_cases(parse_cases(sites), repeat, args["--case"])
+        with replay(SitesAdapter(sites)):
+            results += run_cases(http_cases() + e2e_cases(), repeat, args["--case"])
+    if args["--json"]:
+        print(json.dumps(results, indent=2))
+    else:
+        show(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
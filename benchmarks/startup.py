@@ -0,0 +1,233 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Startup benchmark: time from starting the interpreter to the first byte
+of output, and the -X importtime breakdown, of the main tget modes.
+Everything runs offline against a throwaway cache directory with a small
+local index, so it needs no network and leaves ~/.cache alone.
+"""
+
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from docopt import docopt
+
+# Benchmark the checkout this file is in.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+__doc__ = """Usage: startup.py [options]
+
+Options:
+  -n --runs=<n>         Runs of every scenario, the median is kept [default: 15].
+  -b --baseline=<file>  Baseline file [default: benchmarks/startup_baseline.json].
+  -u --update           Store the results as the new baseline.
+  -t --tolerance=<r>    Allowed slowdown against the baseline, 0.3 = 30%% [default: 0.3].
+  -m --slack=<ms>       Allowed slowdown in ms on top of the tolerance [default: 15].
+  -i --top=<n>          Slowest imports shown per scenario [default: 8].
+  -J --json             Output the results in JSON format.
+  -h --help             Help message.
+""".replace("%%", "%")
+
+# SCENARIOS - name: (tget arguments, stdin).
+SCENARIOS = {
+    "version": (["-v"], None),
+    "get-list": (["-G"], None),
+    "json": (["-s", "ubuntu", "-J", "--offline"], None),
+    "links": (["-s", "ubuntu", "-L", "--offline"], None),
+    "shell": (["-s", "ubuntu", "--offline"], b"exit\n"),
+}
+# Modules a scenario must not import, checked on every run.
+FORBIDDEN = {
+    "version": ("requests", "prompt_toolkit", "colorama", "sqlite3"),
+    "get-list": ("requests", "prompt_toolkit", "colorama", "sqlite3"),
+    "json": ("requests", "prompt_toolkit", "colorama", "http.server"),
+    "links": ("requests", "prompt_toolkit", "colorama", "http.server"),
+}
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$")
+
+INDEX_ITEMS = {
+    "Ubuntu %d.04 desktop amd64" % (version): {
+        "target": "the_pirate_bay",
+        "link": "magnet:?xt=urn:btih:%040x" % (version),
+        "seeds": str(version * 10),
+        "leeches": "1",
+    }
+    for version in range(14, 26)
+}
+
+
+def make_env(cache):
+    """make_env: environment of the runs, isolated from the user setup."""
+    env = dict(os.environ)
+    env.update({
+        "TGET_CACHE_DIR": cache,
+        "TGET_NO_DAEMON": "1",
+        "PYTHONUNBUFFERED": "1",
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "TERM": "dumb",
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+    })
+    env.pop("PYTHONIMPORTTIME", None)
+    return env
+
+
+def seed_index(cache):
+    env = make_env(cache)
+    code = "import json, sys\nfrom tget.core.index import TorrentIndex\n" \
+        "TorrentIndex().add(json.loads(sys.stdin.read()))\n"
+    subprocess.run([sys.executable, "-c", code], input=json.dumps(INDEX_ITEMS).encode(),
+                   env=env, check=True)
+
+
+def first_output(args, stdin, env):
+    """first_output: seconds from the start of tget to its first output byte."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "tget"] + args, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    if stdin:
+        proc.stdin.write(stdin)
+    proc.stdin.close()
+    proc.stdout.read(1)
+    elapsed = time.perf_counter() - start
+    proc.stdout.read()
+    proc.wait()
+    return elapsed
+
+
+def parse_importtime(text):
+    """parse_importtime: modules of -X importtime output.
+    @return: {module: (self us, cumulative us)} and the top level modules.
+    """
+    modules = dict()
+    top = list()
+    for line in text.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        own, cumulative, indent, name = match.groups()
+        modules[name] = (int(own), int(cumulative))
+        if len(indent) == 1:
+            top.append(name)
+    return modules, top
+
+
+def import_times(args, stdin, env):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "tget"] + args, env=env,
+        input=stdin or b"", stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    return parse_importtime(proc.stderr.decode("utf-8", "replace"))
+
+
+def measure(runs, top_n):
+    """measure: run every scenario.
+    @return: {scenario: {first_output_ms, import_ms, imports, slowest}}
+    """
+    cache = tempfile.mkdtemp(prefix="tget-bench-")
+    try:
+        seed_index(cache)
+        env = make_env(cache)
+        # The interpreter alone, to tell tget's cost apart from Python's.
+        results = {"python": {"first_output_ms": 1000 * statistics.median(
+            startup_python(env) for _ in range(runs))}}
+        for name, (args, stdin) in SCENARIOS.items():
+            first_output(args, stdin, env)  # Warm the page cache and registry.
+            times = [first_output(args, stdin, env) for _ in range(runs)]
+            modules, top = import_times(args, stdin, env)
+            slowest = sorted(modules.items(), key=lambda x: x[1][1], reverse=True)
+            results[name] = {
+                "first_output_ms": 1000 * statistics.median(times),
+                "import_ms": sum(modules[module][1] for module in top) / 1000,
+                "imports": len(modules),
+                "slowest": [[module, cumulative / 1000]
+                            for module, (_, cumulative) in slowest
+                            if module in top][:top_n],
+                "forbidden": sorted(m for m in FORBIDDEN.get(name, ()) if m in modules),
+            }
+        return results
+    finally:
+        shutil.rmtree(cache, ignore_errors=True)
+
+
+def startup_python(env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "print()"], env=env, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def regressions(results, baseline, tolerance, slack):
+    """regressions: scenarios slower than @baseline.
+
+    A measure regresses when it is over baseline * (1 + @tolerance) + @slack
+    ms, or when a scenario imports a module it must not import. Baselines
+    are scaled by the startup time of the bare interpreter, so a baseline
+    from a faster machine doesn't fail every run.
+    @return: list of messages, empty when there is no regression.
+    """
+    found = list()
+    scale = 1.0
+    if "python" in baseline and "python" in results:
+        scale = max(1.0, results["python"]["first_output_ms"]
+                    / baseline["python"]["first_output_ms"])
+    for name, result in results.items():
+        for module in result.get("forbidden", ()):
+            found.append("%s: imports %s" % (name, module))
+        for key in ("first_output_ms", "import_ms"):
+            if name == "python" or key not in result or key not in baseline.get(name, {}):
+                continue
+            limit = baseline[name][key] * scale * (1 + tolerance) + slack
+            if result[key] > limit:
+                found.append("%s: %s %.1f > %.1f (baseline %.1f)" % (
+                    name, key, result[key], limit, baseline[name][key]))
+    return found
+
+
+def show(results, baseline):
+    print("%-10s %14s %12s %8s" % ("scenario", "first output", "imports", "modules"))
+    for name, result in results.items():
+        base = baseline.get(name, {}).get("first_output_ms")
+        print("%-10s %11.1fms %10.1fms %8s%s" % (
+            name, result["first_output_ms"], result.get("import_ms", 0),
+            result.get("imports", ""),
+            "  (baseline %.1fms)" % (base) if base else ""))
+        for module, cumulative in result.get("slowest", ()):
+            print("    %-36s %8.1fms" % (module, cumulative))
+
+
+def main(argv=None):
+    args = docopt(__doc__, argv=argv)
+    results = measure(int(args["--runs"]), int(args["--top"]))
+    path = args["--baseline"]
+    baseline = dict()
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+    if args["--json"]:
+        print(json.dumps(results, indent=2, sort_keys=True))
+    else:
+        show(results, baseline)
+    if args["--update"]:
+        with open(path, "w") as f:
+            json.dump({name: {key: round(results[name][key], 1)
+                              for key in ("first_output_ms", "import_ms") if key in results[name]}
+                       for name in results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+    found = regressions(results, baseline, float(args["--tolerance"]), float(args["--slack"]))
+    for message in found:
+        print("regression: %s" % (message), file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_public_trackers(monkeypatch):
+    """no_public_trackers: magnets get no trackers, the tests never probe the
+    public ones (tget.core.trackers.CANDIDATES).
+    """
+    monkeypatch.setenv('TGET_TRACKERS', '')
@@ -0,0 +1,76 @@
+import asyncio
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import pytest
+
+from tget import api
+from tget.core.tget import WGSelect
+
+ITEMS = {
+    'yts': {'Movie.720p': {'seeds': '5', 'leeches': '1', 'link': 'magnet:1', 'target': 'yts'}},
+    '1337x': {
+        'Movie.1080p': {'seeds': '1,200', 'leeches': '3', 'link': 'magnet:2', 'target': '1337x'},
+        'Other': {'seeds': '7', 'leeches': '0', 'link': 'magnet:3', 'target': '1337x'},
+    },
+}
+
+
+@pytest.fixture
+def fake_targets(monkeypatch):
+    def run_targets(self, api_mode=False, timeout=None):
+        for target in self.targets:
+            if target == 'slow':
+                raise FuturesTimeoutError()
+            yield target, ITEMS[target]
+
+    monkeypatch.setattr(WGSelect, 'run_targets', run_targets)
+    monkeypatch.setattr(WGSelect, 'store_items', lambda self, target, items: None)
+
+
+def test_request_pargs():
+    pargs = api.SearchRequest('ubuntu', ['yts'], results=5, sfw=True).to_pargs()
+    assert pargs == {
+        '--target': ['yts'], '--sort-type': ['seeds'], '--search': ['ubuntu'],
+        '--results': ['5'], '--sfw': True,
+    }
+    assert api.SearchRequest().to_pargs()['--list']
+
+
+def test_search(fake_targets):
+    results = list(api.search(api.SearchRequest('movie', ['yts', '1337x'], filter='movie')))
+    assert [result.name for result in results] == ['Movie.720p', 'Movie.1080p']
+    assert results[1].seeds == 1200
+    assert results[1].target == '1337x'
+
+    results = api.collect(api.SearchRequest('movie', ['yts', '1337x'], results=2))
+    assert [result.name for result in results] == ['Movie.1080p', 'Other']
+
+
+def test_search_quality(fake_targets):
+    results = api.search(api.SearchRequest('movie', ['yts', '1337x'], quality='1080p'))
+    assert [result.name for result in results] == ['Movie.1080p']
+
+
+def test_search_timeout(fake_targets):
+    search = api.search(api.SearchRequest('movie', ['yts', 'slow'], timeout=1))
+    assert next(search).name == 'Movie.720p'
+    with pytest.raises(api.SearchTimeout):
+        next(search)
+
+
+def test_asearch(fake_targets):
+    async def consume():
+        return [result.name async for result in api.asearch(api.SearchRequest('m', ['1337x']))]
+
+    assert asyncio.run(consume()) == ['Movie.1080p', 'Other']
+
+
+def test_search_cancel(fake_targets):
+    search = api.search(api.SearchRequest('movie', ['yts', '1337x']))
+    assert next(search).name == 'Movie.720p'
+    search.cancel()
+    assert search.cancelled
+    started = time.time()
+    assert list(search) == []
+    assert time.time() - started < 1
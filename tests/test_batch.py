@@ -0,0 +1,29 @@
+import io
+import json
+
+from tget.core import batch as batch_module
+from tget.core.batch import Batch
+
+
+def test_batch(monkeypatch):
+    class FakeSelect(object):
+        def __init__(self, pargs):
+            self.pargs = pargs
+            self.quiet = False
+
+        def run(self, api_mode=False):
+            assert self.pargs['--target'] == ['yts']
+            query = self.pargs['--search'][0]
+            if query == 'bad':
+                raise ValueError('boom')
+            return {query.upper(): {'seeds': '1', 'target': 'yts'}}
+
+    monkeypatch.setattr('tget.core.tget.WGSelect', FakeSelect)
+    monkeypatch.setattr(batch_module.Module, 'response_cache', None)
+    out = io.StringIO()
+    batch = Batch({'--batch': ['-'], '--target': ['yts']}, workers=2, out=out)
+    assert batch.run(['ubuntu\n', '# comment\n', '\n', 'bad\n', 'debian\n']) == 2
+    records = sorted((json.loads(line) for line in out.getvalue().splitlines()),
+                     key=lambda record: record['query'])
+    assert records[0] == {'query': 'bad', 'error': 'ValueError: boom'}
+    assert records[2] == {'query': 'ubuntu', 'name': 'UBUNTU', 'seeds': '1', 'target': 'yts'}
@@ -0,0 +1,70 @@
+import re
+
+import pytest
+import requests
+
+from tget.core.budget import ResultBudget
+from tget.core.module import Module
+
+
+def test_budget_floor():
+    budget = ResultBudget(2)
+    assert budget.admits('1')
+    budget.offer({'a': {'seeds': '10'}, 'b': {'seeds': '1,200'}, 'c': {'seeds': 5}})
+    assert budget.floor() == 10
+    assert budget.admits('10')
+    assert not budget.admits('9')
+    assert budget.admits(None)
+
+
+def test_budget_no_floor():
+    assert ResultBudget(1, 'name').floor() is None
+    budget = ResultBudget(1, pattern=re.compile('x'))
+    budget.offer({'a': {'seeds': '10'}})
+    assert budget.floor() is None
+    budget.cancel()
+    assert not budget.admits(None)
+
+
+def test_fetch_details():
+    fetched = []
+
+    def set_item(link):
+        fetched.append(link)
+        return {link: {'seeds': link}}
+
+    budget = ResultBudget(2)
+    budget.offer({'x': {'seeds': '50'}, 'y': {'seeds': '40'}})
+    links = [('30', '30'), ('45', '45'), ('60', '60'), ('70', '70')]
+    items = Module().fetch_details(links, set_item, 1, budget, workers=1)
+    assert list(items) == ['45']
+    assert '30' not in fetched
+
+
+def test_fetch_details_errors():
+    def set_item(link):
+        if link == 'timeout':
+            raise requests.exceptions.Timeout(link)
+        if link == 'short':
+            return {link: {'seeds': link.split()[1]}}
+        return {link: {'seeds': '1'}}
+
+    links = [('timeout', None), ('short', None), ('ok', None)]
+    assert list(Module().fetch_details(links, set_item, 3, workers=1)) == ['ok']
+
+    def broken(link):
+        return link.seeds
+
+    with pytest.raises(AttributeError):
+        Module().fetch_details(links, broken, 3, workers=1)
+
+
+def test_listing_seeds():
+    data = (
+        '<tr><td class="coll-1 name"><a href="/torrent/1/a/">a</a></td>'
+        '<td class="coll-2 seeds">1,024</td></tr>'
+        '<tr><td><a href="/torrent/2/b/">b</a></td></tr>'
+    )
+    module = Module()
+    assert module.listing_seeds(data, '/torrent/1/a/') == '1,024'
+    assert module.listing_seeds(data, '/torrent/2/b/') is None
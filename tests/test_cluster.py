@@ -0,0 +1,92 @@
+import json
+
+from tget.core.cluster import cluster, cluster_items, tokens
+from tget.core.output import encode
+from tget.core.tget import WGSelect
+from tget.core.view import ItemStyle
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites, make_torrents
+
+NAMES = [
+    'Big.Buck.Bunny.2008.1080p.BluRay.x264-YIFY',
+    'Big Buck Bunny (2008) [1080p] [YTS.MX]',
+    'big_buck_bunny_2008_1080p_bluray_h264-GRP[rarbg]',
+    'Big.Buck.Bunny.2008.720p.BluRay.x264-YIFY',
+    'The.Show.S01E01.720p.HDTV.x264-A',
+    'The Show S01E02 720p HDTV x264-B',
+    'Ubuntu 22.04 Desktop amd64',
+    'Ubuntu 20.04 Desktop amd64',
+]
+
+
+def test_tokens():
+    assert tokens(NAMES[0]) == tokens(NAMES[2]) == {
+        'big', 'buck', 'bunny', '2008', 'resolution:1080p', 'source:bluray', 'codec:h.264'}
+    assert tokens(NAMES[1]) == {'big', 'buck', 'bunny', '2008', 'resolution:1080p'}
+
+
+def test_cluster():
+    groups = cluster(NAMES)
+    assert groups[NAMES[0]] == NAMES[1:3]
+    # Other resolution, episode or version: other releases.
+    assert list(groups) == [NAMES[0]] + NAMES[3:]
+    assert cluster(reversed(NAMES[:3]))[NAMES[2]] == [NAMES[1], NAMES[0]]
+
+
+def test_cluster_items():
+    items = {name: {'target': 'yts', 'seeds': '1', 'leeches': '0'} for name in NAMES}
+    clustered = cluster_items(items)
+    assert list(clustered['Big.Buck.Bunny.2008.1080p.BluRay.x264-YIFY']['duplicates']) == (
+        NAMES[1:3])
+    assert 'duplicates' not in clustered[NAMES[3]] and 'duplicates' not in items[NAMES[0]]
+    assert ItemStyle().line(NAMES[0], clustered[NAMES[0]]).endswith('(+2)')
+    data = json.loads(b''.join(encode(clustered)))
+    assert data[NAMES[0]]['duplicates'][NAMES[1]] == items[NAMES[1]]
+
+
+def test_cluster_option(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    torrents = make_torrents(40)
+    copies = list()
+    for i, torrent in enumerate(torrents[:5]):
+        # Uploaded again: spaces, no group, a site tag, few seeds.
+        name = torrent['name'].rsplit('-', 1)[0].replace('.', ' ') + ' [rarbg]'
+        copies.append(dict(torrent, id=2000 + i, name=name, seeders=0,
+                           info_hash='%040X' % (i)))
+    search = torrents[0]['title'].split()[0]
+    found = dict()
+    for cluster_option in (False, True):
+        pargs = {'--search': [search], '--target': ['the_pirate_bay']}
+        if cluster_option:
+            pargs['--cluster'] = True
+        with replay(SitesAdapter(FakeSites(torrents + copies))):
+            sel = WGSelect(pargs)
+            sel.quiet = True
+            found[cluster_option] = sel.run(api_mode=True)
+    assert copies[0]['name'] in found[False]
+    assert copies[0]['name'] not in found[True]
+    assert list(found[True][torrents[0]['name']]['duplicates']) == [copies[0]['name']]
+    grouped = sum(len(item.get('duplicates', ())) for item in found[True].values())
+    assert len(found[True]) + grouped == len(found[False])
+
+
+def test_cluster_results_are_groups(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    torrents = make_torrents(40)
+    search = torrents[0]['title'].split()[0]
+    found = [torrent for torrent in torrents if torrent['title'].startswith(search)]
+    listed = list()
+    for i, torrent in enumerate(found):
+        # A better seeded copy listed before each torrent found.
+        name = torrent['name'].rsplit('-', 1)[0].replace('.', ' ') + ' [rarbg]'
+        listed += [dict(torrent, id=2000 + i, name=name, seeders=torrent['seeders'] + 1,
+                        info_hash='%040X' % (i)), torrent]
+    others = [torrent for torrent in torrents if torrent not in found]
+    pargs = {'--search': [search], '--target': ['1337x'], '--results': ['3'],
+             '--cluster': True}
+    with replay(SitesAdapter(FakeSites(listed + others))):
+        sel = WGSelect(pargs)
+        sel.quiet = True
+        groups = sel.run(api_mode=True)
+    assert len(found) > 3 and len(groups) == 3
+    assert all(len(item['duplicates']) == 1 for item in groups.values())
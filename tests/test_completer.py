@@ -0,0 +1,48 @@
+import time
+
+from prompt_toolkit.document import Document
+
+from tget.core.completer import MAX_COMPLETIONS, NameIndex, WGCompleter
+
+NAMES = ['Ubuntu.22.04.Desktop', 'Ubuntu.20.04.Server', 'Debian.12.Netinst', 'ubuntu-mate-22.04']
+
+
+def completions(completer, text):
+    return [c.text for c in completer.get_completions(Document(text), None)]
+
+
+def test_prefix_and_commands():
+    completer = WGCompleter(NAMES)
+    assert completions(completer, 'show Ubuntu.2') == ['Ubuntu.20.04.Server', 'Ubuntu.22.04.Desktop']
+    assert completions(completer, 'show Deb') == ['Debian.12.Netinst']
+    assert completions(completer, 'sh') == ['show']
+    assert completions(completer, 'list n') == ['next']
+
+
+def test_fuzzy_ranking():
+    completer = WGCompleter(NAMES, fuzzy=True)
+    found = completions(completer, 'show ubu2204')
+    # The shortest matched span first.
+    assert found == ['Ubuntu.22.04.Desktop', 'ubuntu-mate-22.04']
+    # Prefix matches come first.
+    assert completions(completer, 'show Deb')[0] == 'Debian.12.Netinst'
+
+
+def test_refined_query_reuses_matches():
+    index = NameIndex(NAMES)
+    assert set(index.fuzzy('ubu')) == {'Ubuntu.22.04.Desktop', 'Ubuntu.20.04.Server',
+                                       'ubuntu-mate-22.04'}
+    assert index.last[0] == 'ubu'
+    assert index.fuzzy('ubusrv') == ['Ubuntu.20.04.Server']
+    assert index.fuzzy('xyz') == []
+
+
+def test_large_result_set():
+    names = ['Some.Show.S%02dE%02d.%d.1080p.WEB' % (i % 30, i % 24, i) for i in range(50000)]
+    completer = WGCompleter(names, fuzzy=True)
+    start = time.perf_counter()
+    found = completions(completer, 'show Some.Show.S01E0')
+    assert len(found) == MAX_COMPLETIONS
+    assert all(name.startswith('Some.Show.S01E0') for name in found)
+    assert all('s29e23' in name.lower() for name in completer.index.fuzzy('s29e23')[:10])
+    assert time.perf_counter() - start < 2
@@ -0,0 +1,183 @@
+import threading
+import time
+
+import requests
+
+from tget.core import concurrency
+from tget.core.concurrency import OK, THROTTLED, TIMEOUT, HostLimits
+from tget.core.module import Module, request_deadline, response_outcome
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites, slug
+
+URL = 'https://1337x.to/torrent/1/a/'
+
+
+def response(status, body=b''):
+    res = requests.Response()
+    res.status_code = status
+    res._content = body
+    return res
+
+
+def fill(limits, url, outcome=OK):
+    """fill: as many requests to @url in flight as the limit allows."""
+    tickets = [limits.acquire(url) for _ in range(limits.limit(url))]
+    for ticket in tickets:
+        limits.release(ticket, outcome)
+
+
+def test_aimd(tmp_path, monkeypatch):
+    monkeypatch.setattr(concurrency, 'SLOW', float('inf'))
+    limits = HostLimits(str(tmp_path / 'limits.json'))
+    assert limits.limit(URL) == 4
+    # Good answers below the limit say nothing about the room left.
+    for _ in range(10):
+        limits.release(limits.acquire(URL), OK)
+    assert limits.state('1337x.to').limit == 4
+    fill(limits, URL)
+    assert limits.limit(URL) == 4 < limits.state('1337x.to').limit < 5
+    while limits.limit(URL) == 4:
+        fill(limits, URL)
+    assert limits.limit(URL) == 5
+    # Answers to requests sent before a cut don't cut again.
+    tickets = [limits.acquire(URL) for _ in range(3)]
+    for ticket in tickets:
+        limits.release(ticket, THROTTLED)
+    assert limits.limit(URL) == 2
+    limits.release(limits.acquire(URL), TIMEOUT)
+    assert limits.limit(URL) == 1
+    limits.release(limits.acquire(URL), None)
+    assert limits.limit(URL) == 1
+    assert limits.limit('https://apibay.org/q.php') == 4
+
+
+def test_slow_answers_cut(tmp_path):
+    limits = HostLimits(str(tmp_path / 'limits.json'))
+    state = limits.state('1337x.to')
+    state.latency, state.samples = 0.001, concurrency.SAMPLES
+    ticket = limits.acquire(URL)
+    time.sleep(0.01)
+    limits.release(ticket, OK)
+    assert state.limit == 2
+
+
+def test_acquire_waits_for_the_limit(tmp_path):
+    limits = HostLimits(str(tmp_path / 'limits.json'), initial=1)
+    ticket = limits.acquire(URL)
+    assert limits.acquire(URL, deadline=time.monotonic() + 0.05) is None
+    threading.Timer(0.05, limits.release, (ticket,)).start()
+    assert limits.acquire(URL, deadline=time.monotonic() + 5) is not None
+
+
+def test_limits_persist(tmp_path, monkeypatch):
+    monkeypatch.setattr(concurrency, 'SLOW', float('inf'))
+    path = str(tmp_path / 'limits.json')
+    limits = HostLimits(path)
+    for _ in range(10):
+        fill(limits, URL)
+    limits.save()
+    other = HostLimits(path)
+    other.release(other.acquire('https://apibay.org/q.php'), THROTTLED)
+    other.save()
+    loaded = HostLimits(path).load()
+    assert loaded.limit(URL) == limits.limit(URL) > 4
+    assert loaded.limit('https://apibay.org/q.php') == 2
+    assert HostLimits(path, ttl=-1).load().limit(URL) == 4
+
+
+def test_response_outcome():
+    assert response_outcome(response(200, b'x' * 200), 'x' * 200) == OK
+    assert response_outcome(response(304), '') == OK
+    assert response_outcome(response(429), '') == THROTTLED
+    assert response_outcome(response(403), '') == THROTTLED
+    # A challenge page, rejected by http_response_text.
+    assert response_outcome(response(200, b'just a moment' * 100), '') == THROTTLED
+    assert response_outcome(response(404, b'not found'), '') is None
+
+
+class Counting(SitesAdapter):
+    """Counting: the most requests in flight at once, 429 after @throttle requests."""
+
+    def __init__(self, sites, throttle=None):
+        super().__init__(sites)
+        self.lock = threading.Lock()
+        self.in_flight = self.most = 0
+        self.throttle = throttle
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.most = max(self.most, self.in_flight)
+            throttled = self.throttle is not None and self.requests >= self.throttle
+        try:
+            time.sleep(0.01)
+            res = super().send(request, **kwargs)
+            if throttled:
+                res.status_code = 429
+            return res
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def test_modules_keep_to_the_limits(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(Module, 'host_limits', HostLimits(initial=2))
+    # Answer times of a loaded test machine are no congestion.
+    monkeypatch.setattr(concurrency, 'SLOW', float('inf'))
+    sites = FakeSites(count=40)
+    links = [('/torrent/%d/%s/' % (torrent['id'], slug(torrent)), None)
+             for torrent in sites.torrents]
+
+    def set_item(link):
+        if Module().http_get_request('https://1337x.to' + link):
+            return {link: {}}
+
+    with replay(Counting(sites)) as adapter:
+        items = Module().fetch_details(links, set_item, 40, site='https://1337x.to/')
+    assert len(items) == 40 and adapter.most == 2
+    # Grown while the 2 workers filled it, not past what they could use.
+    learned = Module.host_limits.state('1337x.to').limit
+    assert 2 < learned < 4
+    with replay(Counting(sites, throttle=0)):
+        Module().http_get_request('https://1337x.to' + links[0][0])
+    assert Module.host_limits.state('1337x.to').limit == learned / 2
+    concurrency.save()
+    assert HostLimits().load().limit('https://1337x.to/') == int(learned / 2)
+
+
+def test_limits_load_on_the_first_request(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(Module, 'host_limits', None)
+    monkeypatch.setattr(concurrency, 'ENABLED', False)
+    learned = HostLimits()
+    learned.release(learned.acquire('https://apibay.org/'), THROTTLED)
+    learned.save()
+    assert concurrency.active() is None
+    concurrency.enable()
+    assert Module.host_limits is None
+    with replay(SitesAdapter(FakeSites(count=10))):
+        Module().http_get_request('https://apibay.org/q.php?q=ubuntu')
+    assert Module.host_limits.limit('https://apibay.org/') == 2
+
+
+def test_busy_host_holds_no_jobs_slot(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    limits = HostLimits(initial=1)
+    monkeypatch.setattr(Module, 'host_limits', limits)
+    monkeypatch.setattr(Module, 'request_slots', threading.BoundedSemaphore(1))
+    busy = limits.acquire('https://apibay.org/')
+    with replay(SitesAdapter(FakeSites(count=10))):
+        waiting = threading.Thread(
+            target=Module().http_get_request, args=('https://apibay.org/q.php?q=ubuntu',))
+        waiting.start()
+        time.sleep(0.05)
+        try:
+            # --jobs 1: the request waiting for apibay.org leaves the slot free.
+            with request_deadline(time.monotonic() + 2):
+                assert Module().http_get_request('https://1337x.to/top-100')
+            assert waiting.is_alive()
+        finally:
+            limits.release(busy)
+            waiting.join(5)
+    assert not waiting.is_alive()
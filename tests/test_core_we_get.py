@@ -11,15 +11,30 @@ import tget.core.tget as tget_core
         [None, {'arguments': None, 'parguments': {}, 'tget_run': 0}],
         [['--search', 'ubuntu'],  {
             'arguments': {
+                '--batch': [],
+                '--deadline': [],
+                '--cluster': 0,
+                '--scrape': 0,
+                '--fields': [],
+                '--format': [],
+                '--metrics-add': [],
+                '--metrics': [],
+                '--profile-dir': [],
+                '--profile': [],
+                '--stats': 0,
                 '--config': [],
                 '--filter': [],
                 '--genre': [],
                 '--get-list': 0,
                 '--help': 0,
+                '--jobs': [],
                 '--json': 0,
                 '--links': 0,
                 '--list': 0,
+                '--local-first': 0,
+                '--offline': 0,
                 '--quality': [],
+                '--rate': [],
                 '--results': [],
                 '--search': ['ubuntu'],
                 '--sfw': 0,
@@ -53,8 +68,9 @@ def test_parse_arguments(argv, exp_res):
             [],
             {
                 '--filter': [], '--genre': [], '--get-list': 0, '--help': 0, '--json': 0,
-                '--links': 0, '--list': 0, '--quality': [], '--results': [], '--search': [],
-                '--sort-type': [], '--target': ['all'], '--version': 0, '--config': [], '--sfw': 0}
+                '--links': 0, '--list': 0, '--local-first': 0, '--offline': 0, '--quality': [], '--results': [], '--search': [],
+                '--sort-type': [], '--target': ['all'], '--version': 0, '--config': [], '--sfw': 0,
+                '--batch': [], '--jobs': [], '--rate': [], '--deadline': [], '--cluster': 0, '--scrape': 0, '--fields': [], '--format': [], '--metrics-add': [], '--metrics': [], '--profile-dir': [], '--profile': [], '--stats': 0}
         ],
     ],
 )
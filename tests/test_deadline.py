@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from tget.core.budget import ResultBudget
+from tget.core.module import DeadlineExceeded, Module, request_deadline
+from tget.core.ratelimit import RateLimiter
+from tget.core import client
+from tget.core.tget import STOP_GRACE, WG, WGSelect
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites
+
+DETAIL_DELAY = 0.3
+
+
+class SlowDetails(SitesAdapter):
+    """SlowDetails: detail pages take DETAIL_DELAY seconds, or time out."""
+
+    def send(self, request, **kwargs):
+        if '/torrent/' in urlsplit(request.url).path:
+            timeout = kwargs.get('timeout')
+            time.sleep(min(DETAIL_DELAY, timeout))
+            if timeout < DETAIL_DELAY:
+                raise requests.exceptions.ReadTimeout(request.url)
+        return super().send(request, **kwargs)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+
+
+def test_budget_deadline():
+    budget = ResultBudget(deadline=60)
+    assert 59 < budget.remaining() <= 60 and not budget.cancelled
+    budget = ResultBudget(deadline=0)
+    assert budget.expired and budget.cancelled and not budget.admits(None)
+    assert ResultBudget().remaining() is None
+
+
+def test_requests_after_deadline():
+    with replay(), request_deadline(time.monotonic() - 1):
+        with pytest.raises(DeadlineExceeded):
+            Module().http_get_request('https://apibay.org/q.php?q=ubuntu')
+    assert issubclass(DeadlineExceeded, requests.exceptions.Timeout)
+
+
+@pytest.mark.parametrize('hook', ['rate_limiter', 'request_slots'])
+def test_waits_end_at_the_deadline(hook, monkeypatch):
+    url = 'https://apibay.org/q.php?q=ubuntu'
+    if hook == 'rate_limiter':
+        # One request a minute, taken by the first one.
+        monkeypatch.setattr(Module, 'rate_limiter', RateLimiter(1))
+        assert Module.rate_limiter.acquire(url) and not Module.rate_limiter.acquire(url, 0.05)
+    else:
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+        monkeypatch.setattr(Module, 'request_slots', slots)
+    start = time.monotonic()
+    with replay(), request_deadline(start + 0.2):
+        with pytest.raises(DeadlineExceeded):
+            Module().http_get_request(url)
+    assert time.monotonic() - start < 1
+
+
+def test_deadline_returns_partial_results(cache, capsys):
+    found = dict()
+    for deadline in (None, 0.5):
+        pargs = {'--search': ['ubuntu'], '--target': ['1337x,the_pirate_bay'],
+                 '--results': ['60']}
+        if deadline:
+            pargs['--deadline'] = [str(deadline)]
+        with replay(SlowDetails(FakeSites(count=300))):
+            sel = WGSelect(pargs)
+            sel.quiet = True
+            start = time.monotonic()
+            found[deadline] = sel.run(api_mode=True)
+            took = time.monotonic() - start
+    assert took < 0.5 + STOP_GRACE
+    assert sel.partial == 'deadline'
+    leetx = [item for item in found[0.5].values() if item['target'] == '1337x']
+    assert 0 < len(leetx) < len([item for item in found[None].values()
+                                 if item['target'] == '1337x'])
+    # The detail pages that timed out are reported on stderr, not in the results.
+    out, err = capsys.readouterr()
+    assert 'Error: Timeout' in err and 'Error' not in out
+    sel.results_type, sel.output_format = 'F', 'json'
+    sel.render()
+    out, err = capsys.readouterr()
+    assert json.loads(out)['partial'] == {'reason': 'deadline', 'unfinished': []}
+    assert err.startswith('# partial results (deadline of 0.5s passed)')
+
+
+def test_daemon_partial_results(monkeypatch, capsys):
+    answer = {'items': {'Ubuntu.20.04': {'seeds': '9', 'leeches': '1', 'target': 'yts'}},
+              'partial': {'reason': 'deadline', 'unfinished': ['1337x']}}
+    monkeypatch.setattr(client, 'daemon_query', lambda pargs: answer)
+    wg = WG()
+    wg.parguments = {'--search': ['ubuntu'], '--target': ['yts,1337x'], '--deadline': ['2'],
+                     '--format': ['json']}
+    wg.run()
+    out, err = capsys.readouterr()
+    assert json.loads(out)['partial'] == answer['partial']
+    assert err.startswith('# partial results (deadline of 2s passed), unfinished: 1337x')
+
+
+def test_interrupt_keeps_results(cache, monkeypatch):
+    run_target = WGSelect.run_target
+
+    def interrupted(self, target, run):
+        if target == '1337x':
+            time.sleep(0.1)
+            raise KeyboardInterrupt
+        return run_target(self, target, run)
+
+    monkeypatch.setattr(WGSelect, 'run_target', interrupted)
+    with replay(SitesAdapter(FakeSites(count=100))):
+        sel = WGSelect({'--search': ['ubuntu'], '--target': ['1337x,the_pirate_bay']})
+        sel.quiet = True
+        items = sel.run(api_mode=True)
+    assert items and sel.partial == 'interrupted'
+    assert {item['target'] for item in items.values()} == {'the_pirate_bay'}
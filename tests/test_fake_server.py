@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+import requests
+
+from tget.testing.server import FakeServer, parse_faults
+from tget.testing.sites import FakeSites
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_tget_against_fake_server(tmp_path):
+    with FakeServer(FakeSites(count=300)) as server:
+        env = dict(os.environ, TGET_SITES=server.url, TGET_NO_DAEMON='1',
+                   TGET_CACHE_DIR=str(tmp_path), PYTHONPATH=ROOT)
+        out = subprocess.run(
+            [sys.executable, '-m', 'tget', '-s', 'ubuntu', '-t', 'all', '-n', '40', '-J'],
+            env=env, stdout=subprocess.PIPE, check=True, timeout=60).stdout
+        stats = requests.get(server.url + '/_stats').json()
+    items = json.loads(out.decode('utf-8'))
+    assert items and all('ubuntu' in name.lower() for name in items)
+    assert stats['the_pirate_bay 200'] == 1
+    assert stats['yts 200'] == 1
+    assert stats['limetorrents 200'] > 1
+    assert stats['1337x 200'] > 1  # listing and detail pages
+
+
+def test_faults():
+    assert parse_faults('429:0.5,challenge') == {'429': 0.5, 'challenge': 1.0}
+    with FakeServer(FakeSites(count=10), faults={'challenge': 1.0}) as server:
+        res = requests.get(server.base_url('1337x') + '/top-100')
+    assert res.status_code == 403
+    assert 'just a moment' in res.text.lower()
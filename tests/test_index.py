@@ -0,0 +1,20 @@
+from tget.core.index import TorrentIndex
+
+
+def test_index_search(tmp_path):
+    index = TorrentIndex(str(tmp_path / 'index.sqlite3'))
+    index.add({
+        'Ubuntu.MATE.16.04.2': {
+            'seeds': '260', 'leeches': '2', 'target': '1337x',
+            'link': 'magnet:?xt=urn:btih:d0f23c109d8662a3fe9338f75839af8d57e5d4a9&dn=Ubuntu',
+        },
+        'Debian.11': {'seeds': '10', 'leeches': '1', 'target': 'yts', 'link': 'magnet:?dn=x'},
+    })
+    res = index.search('ubuntu mat')
+    assert list(res) == ['Ubuntu.MATE.16.04.2']
+    assert res['Ubuntu.MATE.16.04.2']['seeds'] == '260'
+    assert not index.search('ubuntu', ['yts'])
+
+    index.add({'Ubuntu.MATE.16.04.2': {'seeds': '300', 'leeches': '2', 'target': '1337x'}})
+    assert index.search('ubuntu')['Ubuntu.MATE.16.04.2']['seeds'] == '300'
+    assert list(index.top(limit=1)) == ['Ubuntu.MATE.16.04.2']
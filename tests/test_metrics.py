@@ -0,0 +1,87 @@
+import pytest
+
+from tget.core import concurrency, metrics
+from tget.core import stats as stats_module
+from tget.core.module import Module
+from tget.core.stats import RequestRecord, Stats, TargetRecord
+from tget.core.tget import WG
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites
+
+
+def run_stats():
+    stats = Stats()
+    for url, total, error in [('https://1337x.to/search/a/1/', 0.2, None),
+                              ('https://1337x.to/torrent/1/a/', 3.0, None),
+                              ('https://1337x.st/search/a/1/', 0.5, 'ConnectionError')]:
+        record = RequestRecord(url, '1337x')
+        record.total, record.error = total, error
+        stats.requests.append(record)
+    cached = RequestRecord('https://yts.bz/api', 'yts')
+    cached.cache = 'memory'
+    stats.requests.append(cached)
+    run = TargetRecord('1337x')
+    run.wall, run.items = 3.5, 2
+    stats.runs.append(run)
+    return stats
+
+
+def test_histograms():
+    run = metrics.Metrics().add_stats(run_stats())
+    labels = (('le', '0.25'), ('mirror', 'https://1337x.to'), ('target', '1337x'))
+    assert run.samples[('tget_request_duration_seconds_bucket', labels)] == 1
+    inf = (('le', '+Inf'), ('mirror', 'https://1337x.to'), ('target', '1337x'))
+    assert run.samples[('tget_request_duration_seconds_bucket', inf)] == 2
+    assert run.samples[('tget_requests_total', (
+        ('mirror', 'https://1337x.st'), ('result', 'error'), ('target', '1337x')))] == 1
+    assert run.samples[('tget_request_cache_hits_total', (
+        ('mirror', 'https://yts.bz'), ('target', 'yts')))] == 1
+
+    text = run.exposition()
+    assert '# TYPE tget_request_duration_seconds histogram' in text
+    assert 'tget_target_duration_seconds_sum{target="1337x"} 3.5' in text
+    lines = [line for line in text.splitlines() if line.startswith(
+        'tget_request_duration_seconds') and 'https://1337x.to' in line]
+    # Buckets in order, then _sum and _count.
+    assert lines[-3].startswith('tget_request_duration_seconds_bucket{le="+Inf"')
+    assert lines[-1] == 'tget_request_duration_seconds_count{mirror="https://1337x.to",target="1337x"} 2'
+    assert metrics.Metrics.parse(text).samples == run.samples
+
+
+def test_store_accumulates(tmp_path):
+    path = str(tmp_path / 'tget.prom')
+    first = metrics.Metrics().add_stats(run_stats())
+    metrics.store(first, path)
+    second = metrics.Metrics().add_stats(run_stats())
+    second.set('tget_target_items', {'target': '1337x'}, 7)
+    metrics.store(second, path)
+    total = metrics.Metrics.parse(open(path).read())
+    assert total.samples[('tget_target_runs_total', (('result', 'ok'), ('target', '1337x')))] == 2
+    assert total.samples[('tget_target_duration_seconds_sum', (('target', '1337x'),))] == 7.0
+    assert total.samples[('tget_target_items', (('target', '1337x'),))] == 7
+
+
+@pytest.fixture
+def session():
+    saved = dict(Module.session().adapters)
+    yield
+    Module.stats = None
+    Module.host_limits = None
+    concurrency.ENABLED = False
+    Module.session().adapters.clear()
+    Module.session().adapters.update(saved)
+
+
+def test_cli_metrics(tmp_path, monkeypatch, capsys, session):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    monkeypatch.setenv('TGET_NO_DAEMON', '1')
+    path = str(tmp_path / 'run.prom')
+    wg = WG()
+    wg.parse_arguments(['-s', 'ubuntu', '-t', 'yts', '-n', '3', '-L', '--metrics', path])
+    stats_module.enable()  # Before replay, which takes over the session adapters.
+    with replay(SitesAdapter(FakeSites(count=100))):
+        wg.start()
+    assert len(capsys.readouterr().out.splitlines()) == 3
+    text = open(path).read()
+    assert 'tget_requests_total{mirror="https://yts.bz",result="ok",target="yts"} 1' in text
+    assert 'tget_target_runs_total{result="ok",target="yts"} 1' in text
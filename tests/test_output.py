@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+
+import pytest
+
+from tget.core import output
+from tget.core.tget import WGSelect
+
+ITEMS = {
+    'ubuntu-20.04 é': {'seeds': '10', 'leeches': '2', 'target': 'yts', 'link': 'magnet:?a',
+                       'files': [1, {'a': None}]},
+    'debian': {'seeds': '1,024', 'leeches': '0', 'target': '1337x', 'link': 'magnet:?b'},
+}
+
+
+@pytest.mark.parametrize('items', [ITEMS, {}])
+@pytest.mark.parametrize('extra', [None, {'stats': {'targets': {}, 'requests': [1]}}])
+def test_json(items, extra):
+    expected = dict(items=items, **extra) if extra else items
+    text = b''.join(output.encode(items, 'json', indent=True, extra=extra)).decode('utf-8')
+    assert text == json.dumps(expected, indent=2, sort_keys=True) + '\n'
+    assert json.loads(b''.join(output.encode(items, 'json', extra=extra))) == expected
+
+
+def test_fields():
+    data = b''.join(output.encode(ITEMS, 'json', fields=['name', 'seeds']))
+    assert json.loads(data)['debian'] == {'name': 'debian', 'seeds': '1,024'}
+    lines = b''.join(output.encode(ITEMS, 'ndjson', fields=['name', 'link', 'x'])).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'name': 'ubuntu-20.04 é', 'link': 'magnet:?a', 'x': None},
+        {'name': 'debian', 'link': 'magnet:?b', 'x': None},
+    ]
+    assert output.parse_fields(' name, ,seeds') == ['name', 'seeds']
+    assert output.parse_fields('') is None
+
+
+def test_csv(monkeypatch):
+    monkeypatch.setattr(output, 'CHUNK', 16)
+    chunks = list(output.encode(ITEMS, 'csv'))
+    assert len(chunks) > 1
+    rows = list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+    assert rows[0] == list(output.CSV_FIELDS)
+    assert rows[2] == ['debian', '1337x', '1,024', '0', 'magnet:?b']
+    rows = list(csv.reader(io.StringIO(
+        b''.join(output.encode(ITEMS, 'csv', ['files', 'user_status'])).decode('utf-8'))))
+    assert rows[1] == ['[1,{"a":null}]', '']
+
+
+def test_msgpack(monkeypatch):
+    monkeypatch.setattr(output, 'msgpack', None)
+    assert output.packb({'a': [1, -1, None, True]}) == b'\x81\xa1a\x94\x01\xff\xc0\xc3'
+    assert output.packb(300) == b'\xcd\x01\x2c'
+    assert output.packb(-200) == b'\xd1\xff\x38'
+    assert output.packb(0.5) == b'\xcb\x3f\xe0' + b'\x00' * 6
+    assert output.packb('x' * 40) == b'\xd9\x28' + b'x' * 40
+    data = b''.join(output.encode(ITEMS, 'msgpack', fields=['name']))
+    assert data == b'\x81\xa4name\xafubuntu-20.04 \xc3\xa9' + b'\x81\xa4name\xa6debian'
+
+
+def test_dumps_fallback(monkeypatch):
+    monkeypatch.setattr(output, 'orjson', None)
+    data = output.dumps({'a': 'é', 'b': 2 ** 70})
+    assert data == '{"a":"é","b":1180591620717411303424}'.encode('utf-8')
+    with pytest.raises(ValueError):
+        output.encode(ITEMS, 'xml')
+
+
+def test_render(capsysbinary):
+    sel = WGSelect({'--format': ['ndjson'], '--fields': ['name,target']})
+    sel.items = ITEMS
+    sel.render()
+    lines = capsysbinary.readouterr().out.splitlines()
+    assert json.loads(lines[1]) == {'name': 'debian', 'target': '1337x'}
+    sel = WGSelect({'--json': True})
+    sel.items = ITEMS
+    sel.render()
+    assert json.loads(capsysbinary.readouterr().out) == ITEMS
@@ -0,0 +1,71 @@
+import contextlib
+import pstats
+
+import pytest
+
+from tget.core import profiling
+from tget.core.tget import WGSelect
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites
+
+
+def run_1337x(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    sel = WGSelect({'--target': ['1337x'], '--search': ['ubuntu'], '--results': ['3'],
+                    '--filter': ['ubuntu']})
+    sel.quiet = True
+    with replay(SitesAdapter(FakeSites(count=100))):
+        return sel.run(api_mode=True)
+
+
+def test_hook_sees_every_stage(tmp_path, monkeypatch):
+    seen = list()
+
+    def hook(stage, name):
+        seen.append((stage, name))
+        return contextlib.suppress()
+
+    profiling.add_hook(hook)
+    try:
+        assert len(run_1337x(tmp_path, monkeypatch)) == 3
+    finally:
+        profiling.remove_hook(hook)
+    stages = [stage for stage, _ in seen]
+    assert ('target', '1337x') in seen
+    assert {'request', 'detail', 'filter', 'sort', 'cut'} <= set(stages)
+    assert all(name.startswith('https://1337x') for stage, name in seen if stage == 'request')
+    assert stages.index('filter') < stages.index('sort') < stages.index('cut')
+
+
+def test_cpu_profiles(tmp_path, monkeypatch):
+    profiler = profiling.enable('cpu')
+    try:
+        run_1337x(tmp_path, monkeypatch)
+    finally:
+        paths = profiling.finish(profiler, str(tmp_path / 'prof'))
+    assert not profiling.HOOKS
+    names = {path.rsplit('/', 1)[1] for path in paths}
+    assert {'target-1337x.prof', 'request.prof', 'detail.prof', 'sort.txt'} <= names
+    # The requests of the module are profiled apart from its own code.
+    target = pstats.Stats(str(tmp_path / 'prof' / 'target-1337x.prof'))
+    assert not any(func[2] == '_http_get_request' for func in target.stats)
+    request = pstats.Stats(str(tmp_path / 'prof' / 'request.prof'))
+    assert any(func[2] == '_http_get_request' for func in request.stats)
+
+
+def test_mem_profiles(tmp_path):
+    profiler = profiling.enable('mem')
+    try:
+        with profiling.stage('sort'):
+            blob = [str(i) * 10 for i in range(20000)]
+    finally:
+        paths = profiling.finish(profiler, str(tmp_path))
+    assert blob
+    text = open(paths[0]).read()
+    assert text.startswith('sort: 1 run(s)')
+    assert 'test_profiling.py' in text.splitlines()[2]
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        profiling.enable('io')
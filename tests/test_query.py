@@ -0,0 +1,69 @@
+import re
+
+import pytest
+
+from tget.core import query
+from tget.core.query import ItemIndex
+from tget.core.shell import Shell
+
+ITEMS = {
+    'Ubuntu.22.04.Desktop': {'target': 'yts', 'seeds': '1,200', 'leeches': '3',
+                             'link': 'magnet:?xt=urn:btih:%040x&dn=a' % (1)},
+    'Ubuntu.20.04.Server': {'target': '1337x', 'seeds': '80', 'leeches': '30',
+                            'link': 'magnet:?xt=urn:btih:%040x&dn=b' % (2)},
+    'Debian.12.Netinst': {'target': '1337x', 'seeds': '300', 'leeches': '1',
+                          'link': 'https://yts.bz/torrent/download/%040X' % (3)},
+}
+
+
+def test_find_by_name_hash_and_regex():
+    index = ItemIndex(ITEMS)
+    assert index.find('Debian.12.Netinst') == ['Debian.12.Netinst']
+    assert index.find('%040x' % (2)) == ['Ubuntu.20.04.Server']
+    assert index.find('%040x' % (3)) == ['Debian.12.Netinst']
+    assert index.find(r'Ubuntu\.2\d') == ['Ubuntu.22.04.Desktop', 'Ubuntu.20.04.Server']
+    assert index.find('ubuntu') == []
+    with pytest.raises(re.error):
+        index.find('Ubuntu[')
+
+
+def test_match_sets_are_cached():
+    index = ItemIndex(ITEMS)
+    first = index.match('04', True)
+    assert index.match('04', True) is first
+    for text in range(query.MATCHES):
+        index.match(str(text))
+    assert ('04', True) not in index.matches
+
+
+def test_filter_and_sort():
+    index = ItemIndex(ITEMS)
+    assert index.filter(index.names, 'ubuntu') == ['Ubuntu.22.04.Desktop', 'Ubuntu.20.04.Server']
+    assert index.filter(index.names, 'ubuntu[', None) == []
+    assert index.filter(index.names, None, '1337x') == ['Ubuntu.20.04.Server', 'Debian.12.Netinst']
+    assert index.sort(index.names, 'seeds') == [
+        'Ubuntu.22.04.Desktop', 'Debian.12.Netinst', 'Ubuntu.20.04.Server']
+    assert index.sort(index.names, 'leeches', reverse=True)[0] == 'Debian.12.Netinst'
+    assert index.sort(index.names, 'name')[0] == 'Debian.12.Netinst'
+
+
+def test_shell_commands(capsys):
+    shell = Shell()
+    shell.items = ITEMS
+    shell.index = ItemIndex(ITEMS)
+    shell.selection = shell.index.names
+    shell.prompt_parse_command('filter', '--target 1337x')
+    assert shell.selection == ['Ubuntu.20.04.Server', 'Debian.12.Netinst']
+    shell.prompt_parse_command('sort', 'seeds')
+    assert shell.selection == ['Debian.12.Netinst', 'Ubuntu.20.04.Server']
+    shell.prompt_parse_command('top', '1')
+    capsys.readouterr()
+    shell.prompt_parse_command('list', None)
+    assert capsys.readouterr().out.splitlines() == ['1337x Debian.12.Netinst [300/1] ']
+    shell.prompt_parse_command('show', 'Ubuntu --link')
+    assert capsys.readouterr().out == ''
+    shell.prompt_parse_command('filter', '--clear')
+    assert len(shell.selection) == 3
+    capsys.readouterr()
+    shell.prompt_parse_command('show', 'Ubuntu.20 --link')
+    assert capsys.readouterr().out == ITEMS['Ubuntu.20.04.Server']['link'] + '\n'
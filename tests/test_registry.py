@@ -0,0 +1,30 @@
+import os
+import sys
+from glob import glob
+
+from tget.core import registry
+from tget.modules import TARGETS
+
+
+def test_targets_match_module_files():
+    modules_dir = os.path.dirname(sys.modules['tget.modules'].__file__)
+    files = {
+        os.path.splitext(os.path.basename(path))[0]
+        for path in glob(os.path.join(modules_dir, '*.py'))
+    } - {'__init__'}
+    assert set(TARGETS) == files
+    assert TARGETS[-1] == '1337x'
+
+
+def test_entry_points_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(registry, '_scan_entry_points', lambda: {'mysite': 'os.path'})
+    assert registry.targets()[-1] == 'mysite'
+    monkeypatch.setattr(registry, '_scan_entry_points', lambda: {})
+    assert registry.entry_points() == {'mysite': 'os.path'}
+    assert registry.load_target('mysite') is os.path
+
+
+def test_accepts_budget():
+    assert registry.accepts_budget(registry.load_target('yts').main)
+    assert not registry.accepts_budget(lambda pargs: {})
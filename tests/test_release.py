@@ -0,0 +1,111 @@
+import pytest
+
+from tget.core import release
+from tget.core.budget import ResultBudget
+from tget.core.output import record
+from tget.core.query import ItemIndex
+from tget.core.release import Release, link_name, matches, might_match, parse, wanted
+from tget.core.tget import WGSelect
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('Big.Buck.Bunny.2008.1080p.BluRay.x264-YIFY',
+     Release('Big Buck Bunny', 2008, '1080p', 'BluRay', 'H.264', None, None, 'YIFY')),
+    ('The.Office.US.S05E03.720p.HDTV.x264-GROUP[rarbg]',
+     Release('The Office US', None, '720p', 'HDTV', 'H.264', 5, 3, 'GROUP')),
+    ('2001.A.Space.Odyssey.1968.2160p.UHD.BluRay.x265-TERMiNAL',
+     Release('2001 A Space Odyssey', 1968, '2160p', 'BluRay', 'H.265', None, None, 'TERMiNAL')),
+    ('Friends Season 3 Complete 1080p WEBRip',
+     Release('Friends', None, '1080p', 'WEBRip', None, 3, None, None)),
+    ('Movie Title (2019) [1080p] [YTS.MX]',
+     Release('Movie Title', 2019, '1080p', None, None, None, None, None)),
+    ('Spider-Man', Release('Spider-Man', None, None, None, None, None, None, None)),
+])
+def test_parse(name, expected):
+    assert parse(name) == expected
+
+
+def test_parse_is_cached():
+    parse.cache_clear()
+    parse('Sintel.2010.720p.WEB-DL.H.264-NTb')
+    parse('Sintel.2010.720p.WEB-DL.H.264-NTb')
+    assert parse.cache_info().hits == 1
+
+
+def test_quality():
+    assert wanted('1080p, 4k,x265') == {'resolution': {'1080p', '2160p'}, 'codec': {'H.265'}}
+    assert matches('Sintel.2010.2160p.WEB-DL.HEVC-NTb', '1080p,4k,x265')
+    assert not matches('Sintel.2010.2160p.WEB-DL.x264-NTb', '1080p,4k,x265')
+    assert not matches('Sintel.2010.WEB-DL.HEVC-NTb', '2160p')
+    assert might_match('Sintel-2010-WEB-DL', '2160p')
+    assert not might_match('Sintel-2010-720p', '2160p')
+    # YTS values: other words are words of the name, all is no filter.
+    assert wanted('3D,all') == {'words': {'3d'}}
+    assert matches('Sintel (2010) [3D] [YTS.MX]', '3D')
+    assert not matches('Sintel (2010) [1080p] [YTS.MX]', '3D')
+    assert matches('Sintel (2010) [1080p] [YTS.MX]', 'all')
+    assert might_match('Sintel-2010', '3D,1080p')
+    with pytest.raises(ValueError):
+        wanted(' , ')
+    assert link_name('/torrent/1/Sintel-2010-720p/') == 'Sintel-2010-720p'
+    assert link_name('/Sintel-2010-720p-torrent-42.html') == 'Sintel-2010-720p-torrent-42.html'
+
+
+def test_budget_skips_other_qualities():
+    budget = ResultBudget(1, quality='1080p')
+    budget.offer({'A.2010.720p': {'seeds': '90'}, 'B.2010.1080p': {'seeds': '5'}})
+    assert budget.floor() == 5
+    assert not budget.admits('10', '/torrent/1/C-2010-720p-x264/')
+    assert budget.admits('10', '/torrent/2/C-2010-x264/')
+    assert not budget.admits('4', '/torrent/3/C-2010-1080p/')
+
+
+def test_fields_and_index():
+    items = {'Sintel.2010.720p.WEB-DL': {'seeds': '3', 'year': 'listed'},
+             'Big.Buck.Bunny.2008.2160p': {'seeds': '9'}}
+    assert record('Big.Buck.Bunny.2008.2160p', items['Big.Buck.Bunny.2008.2160p'],
+                  ['name', 'year', 'resolution', 'group']) == {
+        'name': 'Big.Buck.Bunny.2008.2160p', 'year': 2008, 'resolution': '2160p',
+        'group': None}
+    assert record('Sintel.2010.720p.WEB-DL', items['Sintel.2010.720p.WEB-DL'],
+                  ['year'])['year'] == 'listed'
+    index = ItemIndex(items)
+    assert index.filter(index.names, quality='4k') == ['Big.Buck.Bunny.2008.2160p']
+    assert index.sort(index.names, 'year') == ['Sintel.2010.720p.WEB-DL',
+                                               'Big.Buck.Bunny.2008.2160p']
+    assert index.sort(index.names, 'resolution')[0] == 'Big.Buck.Bunny.2008.2160p'
+
+
+@pytest.mark.parametrize('target', ['the_pirate_bay', '1337x', 'limetorrents'])
+def test_quality_option(target, tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    sites = FakeSites(count=300)
+    requests = dict()
+    for quality in (None, '2160p'):
+        pargs = {'--search': ['ubuntu'], '--target': [target], '--results': ['30']}
+        if quality:
+            pargs['--quality'] = [quality]
+        with replay(SitesAdapter(sites)) as adapter:
+            sel = WGSelect(pargs)
+            sel.quiet = True
+            items = sel.run(api_mode=True)
+        requests[quality] = adapter.requests
+        assert items
+    assert all(release.field(name, 'resolution') == '2160p' for name in items)
+    if target != 'the_pirate_bay':
+        # The detail pages of the other qualities were not fetched.
+        assert requests['2160p'] < requests[None]
+
+
+def test_yts_api_quality():
+    from tget.modules.yts import api_quality
+
+    assert api_quality('1080p') == '1080p'
+    assert api_quality('3D') == '3D'
+    assert api_quality('4k') == '2160p'
+    # Not one API value: no parameter, --quality keeps the ones wanted.
+    assert api_quality('720p,1080p') is None
+    assert api_quality('1080p,x265') is None
+    assert api_quality('all') is None
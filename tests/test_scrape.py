@@ -0,0 +1,112 @@
+import base64
+import hashlib
+import time
+from urllib.parse import quote
+
+import pytest
+
+from tget.core import scrape
+from tget.core.cache import TTLCache
+from tget.core.module import Module
+from tget.core.scrape import Scraper, UDPTracker, info_hash, trackers
+from tget.core.swarm import SwarmRefresher
+from tget.core.tget import WGSelect
+from tget.testing import sites as sites_module
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites
+from tget.testing.tracker import FakeTracker
+
+
+def make_hash(i):
+    return hashlib.sha1(str(i).encode('utf-8')).hexdigest().upper()
+
+
+def magnet(value, *urls):
+    return 'magnet:?xt=urn:btih:%s&dn=x%s' % (
+        value, ''.join('&tr=' + quote(url, safe='') for url in urls))
+
+
+def test_magnet_parsing():
+    value = make_hash(1)
+    link = magnet(value.lower(), 'udp://a.example:80/announce', 'http://b.example/announce',
+                  'udp://a.example:80', 'udp://c.example:6969')
+    assert info_hash(link) == value
+    assert trackers(link) == [('a.example', 80), ('c.example', 6969)]
+    b32 = base64.b32encode(bytes.fromhex(value)).decode('ascii')
+    assert info_hash('magnet:?xt=urn:btih:%s' % (b32)) == value
+    assert info_hash('https://yts.mx/torrent/download/%s' % (value)) is None
+    assert info_hash('magnet:?xt=urn:btih:xyz') is None
+
+
+def test_scrape_fallback():
+    swarms = {make_hash(i): (i, i % 7, 1) for i in range(150)}
+    with FakeTracker(swarms) as good, FakeTracker(drop=1) as dead:
+        links = [magnet(make_hash(i), dead.url, good.url) for i in range(100)]
+        links += [magnet(make_hash(i), good.url) for i in range(100, 160)]
+        scraper = Scraper(timeout=0.2, retries=1)
+        found = scraper.scrape(links + links[:3])
+        assert scraper.dead == {dead.address}
+        # Unknown torrents are scraped as empty swarms.
+        assert len(found) == 160 and found[make_hash(159)] == (0, 0, 0)
+        assert all(found[make_hash(i)] == (i, i % 7, 1) for i in range(150))
+        # One connect, 70 hashes per packet.
+        assert good.stats['connect'] == 1
+        assert good.stats['scrape'] == 3 and good.stats['hashes'] == 160
+        assert dead.stats['dropped'] == 1
+        # Expired connection IDs are replaced.
+        good.connections.clear()
+        assert scraper.scrape(links[:2]) == {
+            make_hash(0): (0, 0, 1), make_hash(1): (1, 1, 1)}
+        assert good.stats['error'] == 1 and good.stats['connect'] == 2
+
+
+def test_tracker_errors():
+    with FakeTracker(drop=1) as tracker:
+        with pytest.raises(scrape.TrackerError):
+            UDPTracker(tracker.address, timeout=0.1, retries=2).scrape([make_hash(0)])
+        assert tracker.stats['dropped'] == 2
+    assert Scraper(timeout=0.1, retries=1).scrape(
+        [magnet(make_hash(0), 'udp://tracker.invalid:1/announce'), 'magnet:?dn=x']) == {}
+
+
+def test_scrape_deadline():
+    with FakeTracker(drop=1) as slow:
+        links = [magnet(make_hash(i), slow.url) for i in range(3)]
+        start = time.monotonic()
+        assert Scraper(timeout=2, retries=2).scrape(links, time.monotonic() + 0.2) == {}
+        assert time.monotonic() - start < 1 and slow.stats['dropped'] == 1
+        assert Scraper().scrape(links, time.monotonic() - 1) == {}
+        assert slow.stats['dropped'] == 1
+
+
+def test_refresher_scrapes_first(monkeypatch):
+    def load_target(target):
+        raise AssertionError('re-queried %s' % (target))
+
+    monkeypatch.setattr('tget.core.swarm.load_target', load_target)
+    with FakeTracker({make_hash(1): (50, 5, 0), make_hash(2): (3, 1, 0)}) as tracker:
+        items = {name: {'seeds': '1', 'leeches': '1', 'target': 'yts',
+                        'link': magnet(make_hash(i), tracker.url)}
+                 for i, name in ((1, 'a'), (2, 'b'))}
+        refresher = SwarmRefresher(lambda: (items, {}))
+        assert refresher.step() == 'yts'
+    assert items['a']['seeds'] == '50' and items['b']['leeches'] == '1'
+    assert refresher.status.startswith('swarm: yts 2 changed')
+
+
+def test_scrape_option(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(Module, 'response_cache', TTLCache(300))
+    sites = FakeSites(count=200)
+    with FakeTracker() as tracker, replay(SitesAdapter(sites)):
+        monkeypatch.setattr(sites_module, 'TRACKER', quote(tracker.url, safe=''))
+        tracker.swarms = {torrent['info_hash']: (100000 - i, 3, 0)
+                          for i, torrent in enumerate(sites.torrents)}
+        pargs = {'--search': ['ubuntu'], '--target': ['limetorrents'], '--scrape': True}
+        sel = WGSelect(pargs)
+        sel.quiet = True
+        items = sel.run(api_mode=True)
+    assert items and tracker.stats['hashes'] == len(items)
+    assert all(items[name]['leeches'] == '3' for name in items)
+    seeds = [int(items[name]['seeds']) for name in items]
+    assert seeds == sorted(seeds, reverse=True) and min(seeds) > 99000
@@ -0,0 +1,32 @@
+import threading
+
+from tget.core import server
+from tget.core.index import TorrentIndex
+
+
+def test_daemon_query(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    monkeypatch.delenv('TGET_NO_DAEMON', raising=False)
+    monkeypatch.delenv('TGET_DAEMON', raising=False)
+    assert server.daemon_query({'--search': ['ubuntu']}) is None
+
+    TorrentIndex().add({'Ubuntu.20.04': {'seeds': '9', 'leeches': '1', 'target': 'yts'}})
+    httpd = server.UnixHTTPServer(server.socket_path(), server.Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        data = server.daemon_query(
+            {'--search': ['ubuntu'], '--offline': True, '--config': ['x.cfg']}
+        )
+        assert list(data['items']) == ['Ubuntu.20.04'] and 'partial' not in data
+        monkeypatch.setenv('TGET_NO_DAEMON', '1')
+        assert server.daemon_query({'--search': ['ubuntu']}) is None
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_pargs_from_query():
+    pargs = server.pargs_from_query('/search', {'q': ['a b'], 'n': ['5'], 'sfw': ['1']})
+    assert pargs == {'--search': ['a b'], '--results': ['5'], '--sfw': True}
+    assert server.pargs_from_query('/list', {}) == {'--list': True}
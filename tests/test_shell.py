@@ -0,0 +1,43 @@
+import pytest
+
+from tget.core.module import Module
+from tget.core.shell import Shell
+from tget.core.tget import WGSelect
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites
+
+
+@pytest.fixture
+def shell(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    pargs = {'--search': ['ubuntu'], '--target': ['the_pirate_bay'], '--results': ['5']}
+    shell = Shell()
+    shell.searcher = WGSelect(pargs).search_items
+    shell.pargs = pargs
+    shell.load({})
+    with replay(SitesAdapter(FakeSites(count=300))) as adapter:
+        yield shell, adapter
+    Module.response_cache = None
+
+
+def test_search_and_refresh(shell, capsys):
+    shell, adapter = shell
+    shell.prompt_parse_command('search', 'debian --target yts')
+    assert shell.query['--search'] == ['debian'] and shell.query['--target'] == ['yts']
+    assert shell.selection and all(shell.items[name]['target'] == 'yts' for name in shell.selection)
+    assert "'debian': " in capsys.readouterr().out
+
+    # The same search again is answered from the pages of the session.
+    sent = adapter.requests
+    shell.prompt_parse_command('search', 'debian --target yts')
+    assert adapter.requests == sent
+    shell.prompt_parse_command('refresh', None)
+    assert adapter.requests > sent
+    assert shell.query['--search'] == ['debian']
+
+
+def test_search_without_searcher(capsys):
+    shell = Shell()
+    shell.pargs = {}
+    shell.prompt_parse_command('search', 'ubuntu')
+    assert 'No live search' in capsys.readouterr().out
@@ -0,0 +1,27 @@
+import pytest
+
+from tget.core.tget import WGSelect
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites
+
+
+@pytest.mark.parametrize('target', ['the_pirate_bay', 'yts', '1337x', 'limetorrents'])
+@pytest.mark.parametrize('action', ['--search', '--list'])
+def test_modules_parse_fake_sites(target, action, tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    pargs = {'--target': [target], '--results': ['5'], action: ['ubuntu'] if action == '--search' else True}
+    sel = WGSelect(pargs)
+    sel.quiet = True
+    with replay(SitesAdapter(FakeSites(count=300))) as adapter:
+        items = sel.run(api_mode=True)
+    assert adapter.requests
+    assert len(items) == 5
+    assert all(items[name]['target'] == target for name in items)
+    if action == '--search':
+        assert all('ubuntu' in name.lower() for name in items)
+
+
+def test_fake_sites_not_found():
+    sites = FakeSites(count=5)
+    assert sites.respond('1337x', '/torrent/1/missing/')[0] == 404
+    assert sites.respond('limetorrents', '//top100')[0] == 200
@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+from tget.core import stats as stats_module
+from tget.core.module import Module
+from tget.testing.server import FakeServer
+from tget.testing.sites import FakeSites
+
+
+@pytest.fixture
+def stats():
+    saved = dict(Module.session().adapters)
+    yield stats_module.enable()
+    Module.stats = None
+    Module.session().adapters.clear()
+    Module.session().adapters.update(saved)
+
+
+def test_request_phases(stats):
+    with FakeServer(FakeSites(count=20), latency=0.05) as server:
+        url = server.base_url('yts') + '/api/v2/list_movies.json'
+        with stats.target('yts') as target:
+            run = Module.stats.bind(lambda: Module().http_get_request(url))
+            assert run()
+            target.items = 3
+        Module().http_get_request(server.base_url('yts') + '/missing')
+    first, missing = stats.requests
+    assert first.target == 'yts' and first.status == 200 and first.bytes > 1000
+    assert first.connect > 0 and first.ttfb >= 0.04
+    assert first.attempts == 1 and not first.empty
+    assert missing.target is None and missing.empty
+
+    summary = stats.summary()
+    assert summary['yts']['requests'] == 1 and summary['yts']['items'] == 3
+    assert summary[None]['failed'] == 1
+    out = io.StringIO()
+    stats.show(out)
+    assert out.getvalue().splitlines()[1].startswith('yts ')
+    assert stats.as_dict()['requests'][0]['ttfb'] >= 40
+
+
+def test_connections_resolve_every_address(stats, monkeypatch):
+    from urllib3.connection import HTTPConnection
+
+    hosts = list()
+    monkeypatch.setattr(HTTPConnection, '_new_conn', lambda self: hosts.append(self._dns_host))
+    stats_module.timed_connection(HTTPConnection)('localhost', 80)._new_conn()
+    # urllib3 gets the name, not the first address found.
+    assert hosts == ['localhost']
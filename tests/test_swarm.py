@@ -0,0 +1,43 @@
+import pytest
+
+from tget.core.cache import TTLCache
+from tget.core.module import Module
+from tget.core.swarm import SwarmRefresher
+from tget.core.tget import WGSelect
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites
+
+
+@pytest.fixture
+def sites(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    Module.response_cache = TTLCache(300)
+    sites = FakeSites(count=300)
+    with replay(SitesAdapter(sites)) as adapter:
+        yield sites, adapter
+    Module.response_cache = None
+
+
+@pytest.mark.parametrize('target', ['the_pirate_bay', 'limetorrents'])
+def test_refresh_updates_in_place(sites, target):
+    sites, adapter = sites
+    pargs = {'--search': ['ubuntu'], '--target': [target], '--results': ['5']}
+    sel = WGSelect(pargs)
+    sel.quiet = True
+    items = sel.run(api_mode=True)
+    assert items
+    for torrent in sites.torrents:
+        torrent['seeders'] += 7
+    changes = list()
+    refresher = SwarmRefresher(lambda: (items, pargs), on_change=changes.append,
+                               scrape=False)
+    sent = adapter.requests
+    assert refresher.due(items) == target
+    assert refresher.step() == target
+    # The cached pages of the first run were not used.
+    assert adapter.requests > sent
+    assert changes and set(changes[0]) == set(items)
+    assert all(int(str(items[name]['seeds']).replace(',', '')) >= 7 for name in items)
+    assert refresher.status.startswith('swarm: %s %d changed' % (target, len(items)))
+    # Not due again before the interval.
+    assert refresher.step() is None
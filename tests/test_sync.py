@@ -0,0 +1,53 @@
+from tget.core import sync as sync_module
+from tget.core.index import TorrentIndex
+from tget.core.pages import PageStore
+from tget.core.sync import Sync
+
+
+def test_page_store(tmp_path):
+    store = PageStore(str(tmp_path / 'pages.sqlite3'))
+    url = 'https://example.org/top100'
+    assert store.headers(url) == {}
+    store.save(url, 'page', {'ETag': '"1"'})
+    assert store.changed[url]
+    assert store.headers(url) == {'If-None-Match': '"1"'}
+    assert store.not_modified(url) == 'page'
+    assert not store.changed[url]
+    store.save(url, 'page', {})
+    assert not store.changed[url]
+    assert store.fresh(url) is None
+    store.max_age = 60
+    assert store.fresh(url) == 'page'
+
+
+def test_sync_due(tmp_path):
+    index = TorrentIndex(str(tmp_path / 'index.sqlite3'))
+    sync = Sync(['yts'], 3600, 10, index)
+    assert sync.due('yts') == 0
+    index.add({'Movie': {'seeds': '1', 'leeches': '0', 'target': 'yts'}})
+    index.set_list('yts', {'Movie': {}}, seen_at=1000)
+    assert sync.due('yts', now=2000) == 2600
+    assert list(index.listed(['yts'])) == ['Movie']
+
+
+def test_sync_without_targets(tmp_path):
+    sync = Sync([], 3600, 10, TorrentIndex(str(tmp_path / 'index.sqlite3')))
+    assert sync.run_once() is None
+
+
+def test_failed_crawls_back_off(tmp_path, monkeypatch):
+    sync = Sync(['yts'], 3600, 10, TorrentIndex(str(tmp_path / 'index.sqlite3')))
+    listed = [None]
+    monkeypatch.setattr(sync_module, 'load_target', lambda target: object())
+    monkeypatch.setattr(Sync, 'list_changed', lambda self, run: listed[0])
+    assert not sync.crawl('yts')
+    failed_at = sync.failures['yts'][1]
+    assert sync.due('yts', now=failed_at) == 60
+    assert sync.run_once() > 0 and sync.failures['yts'][0] == 1
+    for _ in range(10):
+        sync.crawl('yts')
+    assert sync.due('yts', now=sync.failures['yts'][1]) == 3600
+    # Seen again: due after the interval, the failures are forgotten.
+    sync.index.set_list('yts', {'Movie': {}})
+    listed[0] = False
+    assert sync.crawl('yts') and 'yts' not in sync.failures
@@ -0,0 +1,79 @@
+import socket
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from tget.core import trackers
+from tget.core.tget import WGSelect
+from tget.core.trackers import TrackerList, add_trackers, probe
+from tget.testing.replay import SitesAdapter, replay
+from tget.testing.sites import FakeSites
+from tget.testing.tracker import FakeTracker
+
+MAGNET = 'magnet:?xt=urn:btih:%s&dn=x' % ('A' * 40)
+
+
+def test_probe_and_rank(tmp_path):
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    http = 'http://127.0.0.1:%d/announce' % (listener.getsockname()[1])
+    with listener, FakeTracker() as alive, FakeTracker(drop=1) as dead:
+        assert probe(alive.url) < 1 and alive.stats['connect'] == 1
+        assert probe(dead.url, timeout=0.1) is None
+        assert probe('udp://tracker.invalid:1/announce', timeout=0.1) is None
+        urls = [dead.url, 'udp://tracker.invalid:1', http, alive.url]
+        path = str(tmp_path / 'trackers.json')
+        ranking = TrackerList(path, urls, timeout=0.2).probe()
+    assert sorted(url for url, _ in ranking) == sorted([http, alive.url])
+    assert ranking[0][1] <= ranking[1][1]
+    stored = TrackerList(path, urls).load()
+    assert stored.ranking == ranking and not stored.stale()
+    # Other candidates, or an old ranking, are probed again.
+    assert TrackerList(path, urls[:2]).load().stale()
+    assert TrackerList(path, urls, ttl=0).load().stale()
+
+
+def test_best_probes_in_background(tmp_path):
+    with FakeTracker() as first, FakeTracker() as second:
+        urls = [first.url, 'udp://tracker.invalid:1/announce', second.url]
+        tracker_list = TrackerList(str(tmp_path / 'trackers.json'), urls, timeout=0.2)
+        # Candidate order until the probe is done.
+        assert tracker_list.best(2) == urls[:2]
+        tracker_list.thread.join(5)
+        assert sorted(tracker_list.best(5)) == sorted([first.url, second.url])
+        thread = tracker_list.thread
+        tracker_list.best()
+        assert tracker_list.thread is thread
+
+
+def test_add_trackers(monkeypatch):
+    best = ['udp://a.example:1/announce', 'http://b.example/announce']
+    link = add_trackers(MAGNET + '&tr=udp%3A%2F%2Fa.example%3A1%2Fannounce', trackers=best)
+    assert parse_qs(urlsplit(link).query)['tr'] == best
+    assert add_trackers('https://yts.mx/torrent/download/1', trackers=best) == (
+        'https://yts.mx/torrent/download/1')
+    monkeypatch.setenv(trackers.CANDIDATES_ENV, '')
+    assert trackers.candidates() == []
+    monkeypatch.setenv(trackers.CANDIDATES_ENV, 'udp://a.example:1, udp://c.example:2')
+    assert trackers.candidates() == ['udp://a.example:1', 'udp://c.example:2']
+
+
+def test_every_module_gets_trackers(tmp_path, monkeypatch):
+    monkeypatch.setenv('TGET_CACHE_DIR', str(tmp_path))
+    tracker_list = TrackerList(candidates=['udp://best.example:1/announce'])
+    tracker_list.ranking = [('udp://best.example:1/announce', 0.01)]
+    tracker_list.probed_candidates = tracker_list.candidates
+    tracker_list.checked = time.time()
+    monkeypatch.setattr(trackers, 'TRACKER_LIST', tracker_list)
+    links = list()
+    with replay(SitesAdapter(FakeSites(count=100))):
+        for target in ('the_pirate_bay', '1337x', 'limetorrents'):
+            sel = WGSelect({'--search': ['ubuntu'], '--target': [target]})
+            sel.quiet = True
+            items = sel.run(api_mode=True)
+            assert items
+            links += [item['link'] for item in items.values()]
+    for link in links:
+        found = parse_qs(urlsplit(link).query)['tr']
+        assert found.count('udp://best.example:1/announce') == 1
+        assert not any('coppersurfer' in url for url in found)
@@ -0,0 +1,50 @@
+import io
+
+from tget.core import utils
+from tget.core.view import ItemStyle, ItemView
+
+
+def make_items(count):
+    return {'Torrent.%05d' % (i): {'target': 'yts', 'seeds': str(count - i), 'leeches': '1',
+                                   'link': 'magnet:?xt=urn:btih:%040x' % (i)}
+            for i in range(count)}
+
+
+def test_line_matches_msg_item(capsys):
+    items = make_items(2)
+    items['Torrent.00001']['user_status'] = 'vip'
+    style = ItemStyle({'item': 'cyan'})
+    for name, item in items.items():
+        utils.msg_item(name, item, {'item': 'cyan'})
+        assert capsys.readouterr().out == style.line(name, item) + '\n'
+
+
+def test_window_formats_visible_lines_only():
+    view = ItemView(make_items(50000), height=20)
+    out = io.StringIO()
+    view.draw(out)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 21 and 'Torrent.00000' in lines[0]
+    assert lines[-1].endswith('-- 1-20 of 50000 -- list next/prev/all or list <n> --' + utils.RESET)
+    assert len(view.lines) == 20
+
+    assert view.move('next') and view.offset == 20
+    assert view.move('prev') and view.offset == 0
+    assert view.move('prev') and view.offset == 0
+    assert view.move('last') and view.offset == 49980
+    assert view.move('1000') and view.window()[0].split()[1] == 'Torrent.00999'
+    assert not view.move('sideways')
+    assert len(view.lines) == 40
+
+
+def test_small_result_has_no_footer():
+    view = ItemView(make_items(5), height=20)
+    out = io.StringIO()
+    view.draw(out)
+    assert len(out.getvalue().splitlines()) == 5
+
+
+def test_page_without_terminal_writes_everything():
+    out = io.StringIO()
+    ItemView(make_items(300), height=20).page(out)
+    assert len(out.getvalue().splitlines()) == 300
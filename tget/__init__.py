@@ -3,14 +3,27 @@ Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/
 See the file 'LICENSE' for copying permission
 """
 
+import sys
+
 from tget.core.tget import WG
 from tget.core.utils import msg_error
 
+# tget <command> [options]... - commands with their own options.
+COMMANDS = {
+    "serve": "tget.core.server",
+    "sync": "tget.core.sync",
+    "trackers": "tget.core.trackers",
+}
+
 
 def main():
-    we_get = WG()
-    we_get.parse_arguments()
     try:
+        if sys.argv[1:2] and sys.argv[1] in COMMANDS:
+            from importlib import import_module
+            import_module(COMMANDS[sys.argv[1]]).main(sys.argv[1:])
+            return
+        we_get = WG()
+        we_get.parse_arguments()
         we_get.start()
     except (EOFError, KeyboardInterrupt):
         msg_error("[KeyboardInterrupt]", True)
@@ -0,0 +1,202 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying permission
+
+Typed API to use tget as a library.
+
+    >>> from tget.api import SearchRequest, search
+    >>> for result in search(SearchRequest('ubuntu', targets=['the_pirate_bay'])):
+    ...     print(result.name, result.seeds)
+
+Results are yielded as soon as each target is done, so they are not sorted
+across targets; collect() returns them sorted and cut like the CLI does.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from tget.core.budget import seeds_to_int
+from tget.core.release import matches
+
+
+class SearchTimeout(TimeoutError):
+    """SearchTimeout: the search took longer than SearchRequest.timeout."""
+
+
+class SearchRequest(NamedTuple):
+    """SearchRequest: options of a search, like the tget command line.
+
+    query - text to search, None for the top lists of the targets.
+    timeout - seconds for the whole search, None to wait for every target.
+    """
+
+    query: Optional[str] = None
+    targets: Sequence[str] = ("all",)
+    results: Optional[int] = None
+    sort_type: str = "seeds"
+    filter: Optional[str] = None
+    quality: Optional[str] = None
+    genre: Optional[str] = None
+    sfw: bool = False
+    offline: bool = False
+    timeout: Optional[float] = None
+
+    def to_pargs(self) -> Dict[str, Any]:
+        """to_pargs: provided arguments for WGSelect and the modules."""
+        pargs = {"--target": [",".join(self.targets)], "--sort-type": [self.sort_type]}
+        if self.query is None:
+            pargs["--list"] = True
+        else:
+            pargs["--search"] = [self.query]
+        for arg, value in (("--results", self.results), ("--filter", self.filter),
+                           ("--quality", self.quality), ("--genre", self.genre)):
+            if value is not None:
+                pargs[arg] = [str(value)]
+        if self.sfw:
+            pargs["--sfw"] = True
+        if self.offline:
+            pargs["--offline"] = True
+        return pargs
+
+
+class SearchResult(NamedTuple):
+    """SearchResult: one torrent. extra has the other fields of the module (size, ...)."""
+
+    name: str
+    target: str
+    seeds: int
+    leeches: int
+    link: str
+    extra: Dict[str, Any]
+
+    @classmethod
+    def from_item(cls, name: str, item: Dict[str, Any]) -> "SearchResult":
+        extra = {key: item[key] for key in item
+                 if key not in ("target", "seeds", "leeches", "link")}
+        return cls(name, item.get("target", ""), seeds_to_int(item.get("seeds", 0)),
+                   seeds_to_int(item.get("leeches", 0)), item.get("link", ""), extra)
+
+
+class Search(object):
+    """Search: iterator over the results of a SearchRequest.
+
+    cancel() stops the outstanding work of the modules, it can be called
+    from any thread. close() (or leaving a with block) cancels and ends
+    the iteration.
+    """
+
+    def __init__(self, request: SearchRequest):
+        from tget.core.tget import WGSelect
+
+        self.request = request
+        self.select = WGSelect(request.to_pargs())
+        self.select.quiet = True
+        self._results = self._iter()
+
+    def __iter__(self) -> Iterator[SearchResult]:
+        return self
+
+    def __next__(self) -> SearchResult:
+        return next(self._results)
+
+    def __enter__(self) -> "Search":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _accept(self, items):
+        names = list(items)
+        if self.select.filter:
+            pattern = self.select.filter_pattern(self.select.filter)
+            names = [name for name in names if pattern.search(name)]
+        if self.select.quality:
+            names = [name for name in names if matches(name, self.select.quality)]
+        return names
+
+    def _iter(self) -> Iterator[SearchResult]:
+        self.select.expand_targets()
+        if self.request.offline:
+            items = self.select.local_items()
+            for name in self._accept(items):
+                yield SearchResult.from_item(name, items[name])
+            return
+        try:
+            for target, items in self.select.run_targets(True, self.request.timeout):
+                self.select.store_items(target, items)
+                for name in self._accept(items):
+                    yield SearchResult.from_item(name, items[name])
+                if self.cancelled:
+                    return
+        except FuturesTimeoutError:
+            raise SearchTimeout("search did not finish in %ss" % (self.request.timeout))
+
+    def cancel(self) -> None:
+        self.select.budget.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.select.budget.cancelled
+
+    def close(self) -> None:
+        self.cancel()
+        self._results.close()
+
+
+def search(request: SearchRequest) -> Search:
+    """search: results of @request, yielded as soon as each target is done."""
+    return Search(request)
+
+
+def collect(request: SearchRequest) -> List[SearchResult]:
+    """collect: all results of @request, sorted and cut like the CLI does."""
+    with search(request) as found:
+        results = list(found)
+    if request.sort_type == "name":
+        results.sort(key=lambda result: result.name)
+    else:
+        results.sort(key=lambda result: result.seeds, reverse=True)
+    if request.results:
+        results = results[:request.results]
+    return results
+
+
+async def asearch(request: SearchRequest) -> AsyncIterator[SearchResult]:
+    """asearch: async iterator over the results of @request.
+
+    The search runs in a worker thread. Cancelling the consuming task or
+    leaving the loop early cancels the search.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    results = search(request)
+
+    def put(value):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, value)
+        except RuntimeError:
+            results.cancel()  # The event loop is closed, nobody is listening.
+
+    def produce():
+        try:
+            for result in results:
+                put(result)
+        except Exception as err:
+            put(err)
+        finally:
+            put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            result = await queue.get()
+            if result is done:
+                return
+            if isinstance(result, Exception):
+                raise result
+            yield result
+    finally:
+        results.cancel()
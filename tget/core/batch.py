@@ -0,0 +1,82 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tget.core.cache import TTLCache
+from tget.core.module import Module
+from tget.core.output import dumps, parse_fields, record
+
+# Queries run at the same time when --jobs is not given.
+DEFAULT_WORKERS = 8
+# Fetched pages are shared between the queries of a batch for this long.
+BATCH_CACHE_TTL = 600
+# Arguments of the batch itself, not passed to every query.
+BATCH_ARGS = ("--batch", "--search", "--list", "--json", "--links", "--format", "--fields")
+
+
+class Batch(object):
+    """Batch: run many searches in one process.
+
+    The queries share the HTTP session, the page cache and the request
+    slots/rate limiter of Module, so the total throughput is bound by
+    the rate budget of the sites and not by process startup. Results
+    are written as NDJSON, one line per torrent, tagged with the query.
+
+    @pargs - provided arguments applied to every query (--target, ...).
+    @workers - queries run at the same time.
+    @out - file object for the NDJSON lines.
+    --fields of @pargs keeps only these fields of the torrents.
+    """
+
+    def __init__(self, pargs, workers=None, out=None):
+        self.pargs = {arg: pargs[arg] for arg in pargs if arg not in BATCH_ARGS}
+        self.fields = parse_fields((pargs.get("--fields") or [""])[0])
+        self.workers = workers or DEFAULT_WORKERS
+        self.out = out or sys.stdout
+        self.lock = threading.Lock()
+        if Module.response_cache is None:
+            Module.response_cache = TTLCache(BATCH_CACHE_TTL, maxsize=4096)
+
+    def queries(self, lines):
+        """queries: search texts from @lines, without blanks and # comments."""
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+    def search(self, query):
+        from tget.core.tget import WGSelect
+
+        pargs = dict(self.pargs)
+        pargs["--search"] = [query]
+        pargs.setdefault("--target", ["all"])
+        sel = WGSelect(pargs)
+        sel.quiet = True
+        try:
+            items = sel.run(api_mode=True)
+        except Exception as err:
+            self.write([{"query": query, "error": "%s: %s" % (type(err).__name__, err)}])
+            return 0
+        self.write(dict({"query": query}, **record(name, items[name], self.fields))
+                   for name in items)
+        return len(items)
+
+    def write(self, records):
+        lines = [dumps(data).decode("utf-8") for data in records]
+        if not lines:
+            return
+        with self.lock:
+            self.out.write("\n".join(lines) + "\n")
+            self.out.flush()
+
+    def run(self, lines):
+        """run: search every query of @lines.
+        @return: number of torrents written.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return sum(executor.map(self.search, self.queries(lines)))
@@ -0,0 +1,109 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+import heapq
+import threading
+import time
+
+
+def seeds_to_int(seeds):
+    """seeds_to_int: convert seeds/leeches value from a module to int.
+    @seeds - int or string like '1,234'.
+    @return: int, 0 when the value cannot be parsed.
+    """
+    try:
+        return int(str(seeds).replace(",", "").strip())
+    except ValueError:
+        return 0
+
+
+class ResultBudget(object):
+    """ResultBudget: number of results requested by the user (--results),
+    shared between all targets of a run.
+
+    Every finished item is offered to the budget. Once @limit items are
+    known and the results are sorted by seeds, the budget has a floor:
+    the seeds of the N-th best item. A candidate with fewer seeds than the
+    floor is certain to be cut, so modules can skip its detail page. So is
+    a candidate whose link shows another quality than --quality.
+
+    @deadline - seconds from now the run may take (--deadline), the budget
+      is cancelled when they are over.
+    """
+
+    def __init__(self, limit=None, sort_type="seeds", pattern=None, quality=None,
+                 deadline=None):
+        self.limit = limit
+        self.sort_type = sort_type or "seeds"
+        self.pattern = pattern
+        self.quality = quality
+        self.seeds = dict()
+        self._floor = None
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        # deadline: monotonic time the run ends by, None without --deadline.
+        self.deadline = time.monotonic() + deadline if deadline is not None else None
+
+    def offer(self, items):
+        """offer: record finished items.
+        @items - dict of items as returned by the modules.
+        """
+        if self.quality is not None:
+            from tget.core.release import matches
+        with self._lock:
+            for name in items:
+                if self.pattern is not None and not self.pattern.search(name):
+                    continue  # --filter will drop it, it can't take a place.
+                if self.quality is not None and not matches(name, self.quality):
+                    continue
+                self.seeds[name] = seeds_to_int(items[name].get("seeds", 0))
+            self._floor = None
+
+    def is_full(self):
+        return bool(self.limit) and len(self.seeds) >= self.limit
+
+    def floor(self):
+        """floor: seeds of the N-th best item, None if there is no floor yet."""
+        if self.sort_type != "seeds" or not self.is_full():
+            return None
+        with self._lock:
+            if self._floor is None:
+                self._floor = heapq.nlargest(self.limit, self.seeds.values())[-1]
+            return self._floor
+
+    def admits(self, seeds, link=None):
+        """admits: check if a candidate with @seeds can still reach the results.
+        @seeds - seeds shown on the listing page, None if unknown.
+        @link - link of its detail page, named after the torrent.
+        """
+        if self.cancelled:
+            return False
+        if self.quality is not None and link:
+            from tget.core.release import link_name, might_match
+
+            if not might_match(link_name(link), self.quality):
+                return False
+        floor = self.floor()
+        if floor is None or seeds is None:
+            return True
+        return seeds_to_int(seeds) >= floor
+
+    def cancel(self):
+        """cancel: stop all outstanding work of this run."""
+        self._cancelled.set()
+
+    def remaining(self):
+        """remaining: seconds left before the deadline, None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set() or self.expired
@@ -0,0 +1,83 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Client side of 'tget serve'. Kept apart from tget.core.server, so asking
+for a daemon that isn't running costs no http.server/http.client import.
+"""
+
+import json
+import logging
+import os
+import socket
+from urllib.parse import urlsplit
+
+from tget.core.utils import cache_dir
+
+SOCKET_FILE = "tget.sock"
+# Environment variable with the daemon address: unix:<path> or http://host:port.
+DAEMON_ENV = "TGET_DAEMON"
+# Set to 1 to never use the daemon.
+NO_DAEMON_ENV = "TGET_NO_DAEMON"
+# Arguments that only matter for the client side, not sent to the daemon.
+CLIENT_ARGS = ("--config",)
+
+log = logging.getLogger(__name__)
+
+
+def socket_path():
+    return os.path.join(cache_dir(), SOCKET_FILE)
+
+
+def daemon_connection(timeout=None):
+    """daemon_connection: connection to the running daemon, None if there is none."""
+    if os.environ.get(NO_DAEMON_ENV, "").lower() in ("1", "true", "yes"):
+        return None
+    address = os.environ.get(DAEMON_ENV)
+    if not address or not address.startswith("http://"):
+        path = address[len("unix:"):] if address else socket_path()
+        if not os.path.exists(path):
+            return None
+    import http.client
+
+    class UnixHTTPConnection(http.client.HTTPConnection):
+        """UnixHTTPConnection: HTTP client connection over a Unix socket."""
+
+        def connect(self):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(self.timeout)
+            self.sock.connect(path)
+
+    if address and address.startswith("http://"):
+        url = urlsplit(address)
+        return http.client.HTTPConnection(url.hostname, url.port or 80, timeout=timeout)
+    return UnixHTTPConnection("localhost", timeout=timeout)
+
+
+def daemon_query(pargs, timeout=300):
+    """daemon_query: send a query to the running daemon.
+    @return: the answer, {"items": items} and "partial" when cut short by
+      --deadline, None when no daemon answered.
+    """
+    conn = daemon_connection(timeout)
+    if conn is None:
+        return None
+    import http.client
+
+    pargs = {arg: pargs[arg] for arg in pargs if arg not in CLIENT_ARGS}
+    try:
+        conn.request(
+            "POST", "/query", json.dumps({"pargs": pargs}),
+            {"Content-Type": "application/json"}
+        )
+        res = conn.getresponse()
+        data = json.loads(res.read().decode("utf-8"))
+    except (OSError, ValueError, http.client.HTTPException) as err:
+        log.debug("daemon not available: {}".format(err))
+        return None
+    finally:
+        conn.close()
+    if res.status != 200:
+        log.debug("daemon error: {}".format(data.get("error")))
+        return None
+    return data
@@ -0,0 +1,142 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Near-duplicate releases (--cluster): the same release listed by several
+targets, or uploaded again, under names that differ in punctuation, group
+tag, site tag or case. Names are reduced to token sets, the sets get a
+MinHash signature and signatures sharing a band are compared, so a result
+set is clustered in one pass instead of comparing every pair of names.
+"""
+
+import random
+import re
+import zlib
+from collections import OrderedDict
+from functools import lru_cache
+
+from tget.core.release import PARSED, QUALITY_FIELDS, TOKEN_RE, parse
+
+# Token sets at least this similar (Jaccard) are one release.
+THRESHOLD = 0.7
+# MinHash signature: BANDS bands of ROWS hashes. A pair with a similarity of
+# THRESHOLD shares a band 99.9% of the time.
+BANDS = 8
+ROWS = 2
+PRIME = (1 << 61) - 1
+_random = random.Random(0x7467)
+PERMUTATIONS = [(_random.randrange(1, PRIME), _random.randrange(PRIME))
+                for _ in range(BANDS * ROWS)]
+# Tags of the sites a release was taken from, not part of the release.
+SITE_TAGS = frozenset(("www", "com", "org", "net", "mx", "to", "yts", "yify", "rarbg",
+                       "eztv", "ettv", "1337x", "limetorrents", "tpb", "torrent",
+                       "torrents"))
+WORD_RE = re.compile(r"[0-9a-z]+")
+
+
+def tokens(name):
+    """tokens: the token set of torrent @name: lowercase words without the group
+    and site tags, quality words replaced by their canonical value
+    (x264, H.264 and AVC are one token).
+    """
+    release = parse(name)
+    found = {"%s:%s" % (kind, getattr(release, kind).lower())
+             for kind in QUALITY_FIELDS if getattr(release, kind)}
+
+    def strip_quality(match):
+        return " " if match.lastgroup in QUALITY_FIELDS else match.group(0)
+
+    words = set(WORD_RE.findall(TOKEN_RE.sub(strip_quality, name).lower()))
+    if release.group:
+        words.discard(release.group.lower())
+    found.update(words - SITE_TAGS)
+    return frozenset(found or (name.lower(),))
+
+
+def block(name):
+    """block: fields two releases must share to be one: year, resolution,
+    season, episode and the numbers of the title. Another episode, sequel
+    or version is another release, however alike the names are.
+    """
+    release = parse(name)
+    numbers = tuple(word for word in WORD_RE.findall((release.title or "").lower())
+                    if word.isdigit())
+    return (release.year, release.resolution, release.season, release.episode, numbers)
+
+
+@lru_cache(maxsize=PARSED)
+def word_hashes(word):
+    """word_hashes: the hashes of @word under every permutation, words repeat
+    across names so they are computed once.
+    """
+    value = zlib.crc32(word.encode("utf-8"))
+    return tuple((a * value + b) % PRIME for a, b in PERMUTATIONS)
+
+
+def signature(words):
+    """signature: MinHash of token set @words, BANDS * ROWS hashes."""
+    return tuple(map(min, zip(*map(word_hashes, words))))
+
+
+def jaccard(first, second):
+    return len(first & second) / len(first | second)
+
+
+def cluster(names, threshold=THRESHOLD):
+    """cluster: group near-duplicate @names, in their order.
+
+    The first name of a group is its representative, a name joins the first
+    representative it is @threshold similar to. Only representatives are kept
+    in the bands, so each name is compared with a few of them.
+    @return: OrderedDict {representative: [other names of the group]}.
+    """
+    groups = OrderedDict()
+    words_of = dict()
+    # Names of the same token set (the usual duplicate) skip the signature.
+    same = dict()
+    bands = dict()
+    for name in names:
+        words = tokens(name)
+        key = block(name)
+        if (key, words) in same:
+            groups[same[key, words]].append(name)
+            continue
+        sig = signature(words)
+        keys = [(key, band, sig[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+        found = None
+        seen = set()
+        for band_key in keys:
+            for other in bands.get(band_key, ()):
+                if other not in seen:
+                    seen.add(other)
+                    if jaccard(words, words_of[other]) >= threshold:
+                        found = other
+                        break
+            if found is not None:
+                break
+        if found is not None:
+            groups[found].append(name)
+            same[key, words] = found
+            continue
+        groups[name] = []
+        words_of[name] = words
+        same[key, words] = name
+        for band_key in keys:
+            bands.setdefault(band_key, []).append(name)
+    return groups
+
+
+def cluster_items(items, threshold=THRESHOLD):
+    """cluster_items: one item per group of near-duplicates of @items.
+
+    @items - items dict, best first: the first item of a group stands for it.
+    @return: items dict of the representatives, each one with its group as
+    'duplicates' {name: item} when it has one.
+    """
+    clustered = OrderedDict()
+    for name, others in cluster(items, threshold).items():
+        item = items[name]
+        if others:
+            item = dict(item, duplicates=OrderedDict((other, items[other]) for other in others))
+        clustered[name] = item
+    return clustered
@@ -3,25 +3,87 @@ Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/
 See the file 'LICENSE' for copying.
 """
 
-# COMMANDS - built in tget shell commands.
+# COMMANDS - built in tget shell commands,
+#  torrent_argument: the first argument completes to torrent names.
 COMMANDS = {
     'show': {
         'help': 'Show torrent',
-        'usage': '[torrent/regex] [options]',
+        'usage': '[torrent/regex/infohash] [options]',
         'required_argument': True,
+        'torrent_argument': True,
         'opts': {
             '--link': 'show .torrent/magnet link',
             '--seeds': 'show number of seeds',
             '--leeches': 'show number of leeches for this torrent',
-            '--target': 'show torrent target'
+            '--target': 'show torrent target',
+            '--duplicates': 'list the near-duplicates of the torrent (--cluster)'
         },
     },
-    'list': {
-        'help': 'list torrents',
+    'filter': {
+        'help': 'narrow the torrents shown by list and show',
+        'usage': '[text/regex] [options]',
+        'required_argument': True,
+        'torrent_argument': True,
+        'opts': {
+            '--target': 'only the torrents of this target',
+            '--quality': 'only this quality: 1080p, x265, WEB-DL, ...',
+            '--clear': 'back to every torrent',
+        },
+    },
+    'sort': {
+        'help': 'sort the torrents shown',
+        'usage': '[seeds/leeches/name/target/year/resolution] [options]',
+        'required_argument': True,
+        'opts': {
+            'seeds': 'most seeds first',
+            'leeches': 'most leeches first',
+            'name': 'by name',
+            'target': 'by target',
+            'year': 'newest first',
+            'resolution': 'highest first',
+            '--reverse': 'reverse order',
+        },
+    },
+    'top': {
+        'help': 'keep the first N torrents shown',
+        'usage': '[n]',
+        'required_argument': True,
+        'opts': {},
+    },
+    'search': {
+        'help': 'new search, over the connections of this session',
+        'usage': '[query] [options]',
+        'required_argument': True,
+        'opts': {
+            '--target': 'targets to search, comma separated',
+        },
+    },
+    'refresh': {
+        'help': 'run the current search again, without cached pages',
         'usage': '',
         'required_argument': False,
         'opts': {},
     },
+    'watch': {
+        'help': 'refresh seeds/leeches of the results in the background',
+        'usage': '[seconds/off]',
+        'required_argument': False,
+        'opts': {
+            'off': 'stop refreshing',
+        },
+    },
+    'list': {
+        'help': 'list torrents, a page at a time',
+        'usage': '[next/prev/first/last/all/<n>]',
+        'required_argument': False,
+        'opts': {
+            'next': 'next page',
+            'prev': 'previous page',
+            'first': 'first page',
+            'last': 'last page',
+            'all': 'every torrent, in $PAGER',
+        },
+    },
     'exit': {
         'help': 'exit the shell',
         'usage': '',
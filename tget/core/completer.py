@@ -3,14 +3,87 @@ Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/
 See the file 'LICENSE' for copying.
 """
 
+import bisect
+import heapq
+import re
+
 from tget.core.commands import COMMANDS
 from prompt_toolkit.completion import Completer
 from prompt_toolkit.completion import Completion
 
+# Torrent names offered at most per keystroke, the menu can't show more anyway.
+MAX_COMPLETIONS = 200
+
+
+class NameIndex(object):
+    """NameIndex: torrent names indexed once per result set for completion.
+
+    Prefix lookups bisect the sorted names. Fuzzy lookups match the query
+    as a subsequence (case insensitive) with one regular expression pass
+    over all the names joined in a single string; a query extending the
+    previous one only searches the previous matches.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.folded = [name.lower() for name in self.names]
+        self.text = "\n".join(self.folded)
+        self.starts = list()
+        offset = 0
+        for name in self.folded:
+            self.starts.append(offset)
+            offset += len(name) + 1
+        self.last = (None, None)
+
+    def __len__(self):
+        return len(self.names)
+
+    def prefix(self, prefix, limit=MAX_COMPLETIONS):
+        """prefix: names starting with @prefix, in order."""
+        matches = list()
+        for index in range(bisect.bisect_left(self.names, prefix), len(self.names)):
+            if len(matches) >= limit or not self.names[index].startswith(prefix):
+                break
+            matches.append(self.names[index])
+        return matches
+
+    def fuzzy(self, query, limit=MAX_COMPLETIONS):
+        """fuzzy: names containing the letters of @query in order, best first.
+
+        A name ranks higher the shorter and earlier the matched span is.
+        """
+        query = query.lower()
+        if not query:
+            return self.names[:limit]
+        # The tail eats the rest of the line: one match per name at most.
+        pattern = re.compile("(%s)[^\n]*" % ("[^\n]*?".join(re.escape(char) for char in query)))
+        scores = dict()
+        last_query, last = self.last
+        if last is not None and query.startswith(last_query):
+            for index in last:
+                match = pattern.search(self.folded[index])
+                if match:
+                    scores[index] = (match.end(1) - match.start(1), match.start(1))
+        else:
+            for match in pattern.finditer(self.text):
+                index = bisect.bisect_right(self.starts, match.start()) - 1
+                scores[index] = (match.end(1) - match.start(1), match.start() - self.starts[index])
+        self.last = (query, list(scores))
+        ranked = heapq.nsmallest(limit, scores,
+                                 key=lambda index: scores[index] + (len(self.names[index]),))
+        return [self.names[index] for index in ranked]
+
 
 class WGCompleter(Completer):
-    def __init__(self, torrents):
+    """WGCompleter: complete the shell commands, their flags and torrent names.
+    @torrents - torrent names, indexed once (NameIndex).
+    @fuzzy - also offer the names matching the word as a subsequence.
+    """
+
+    def __init__(self, torrents, fuzzy=False):
         self.torrents = torrents
+        self.index = NameIndex(torrents)
+        self.fuzzy = fuzzy
         self.words = None
         self.word_before_cursor = None
         self.word_after_cursor = None
@@ -40,6 +113,14 @@ class WGCompleter(Completer):
             return COMMANDS[command]['opts']
         return list()
 
+    def torrent_matches(self, word):
+        """torrent_matches: names starting with @word, then the fuzzy matches."""
+        matches = self.index.prefix(word)
+        if self.fuzzy and len(matches) < MAX_COMPLETIONS:
+            seen = set(matches)
+            matches += [name for name in self.index.fuzzy(word) if name not in seen]
+        return matches[:MAX_COMPLETIONS]
+
     def get_completions(self, document, complete_event):
         """get_completion: main call from the abstract base class "Completer"
           in prompt_toolkit.
@@ -51,12 +132,12 @@ class WGCompleter(Completer):
             self.words = COMMANDS
         elif self.words_count(document.text) == 2:
             try:
-                if COMMANDS[document.text[:-1].split()[0]][
-                    'required_argument'
-                ]:
-                    self.words = self.torrents
+                if COMMANDS[document.text[:-1].split()[0]].get('torrent_argument'):
+                    for word in self.torrent_matches(self.word_before_cursor):
+                        yield Completion(word, -len(self.word_before_cursor))
+                    return
                 else:
-                    self.words = list()
+                    self.words = self.word_command_flags(document.text)
             except KeyError:
                 self.words = list()
         elif self.words_count(document.text) == 3:
@@ -0,0 +1,228 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Requests in flight to each host, adapted to what the host takes (AIMD):
+the limit grows by one request per window of fast, clean answers while
+the host is full, and is halved on 403/429/503, challenge pages, timeouts
+or answers much slower than usual. The limits are kept in the cache directory, so a run starts
+where the last one left off.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from tget.core.utils import cache_dir
+
+# Limit of a host never seen (or not for LIMITS_TTL).
+INITIAL = 4.0
+MINIMUM = 1.0
+MAXIMUM = 16.0
+# Added to the limit per window of good answers, and the factor of a cut.
+INCREASE = 1.0
+DECREASE = 0.5
+# An answer SLOW times the usual answer time of its host is congestion,
+# once SAMPLES answers made the usual time known.
+SLOW = 3.0
+SAMPLES = 5
+# Weight of a new answer time in the usual one.
+ALPHA = 0.1
+# Seconds learned limits are trusted.
+LIMITS_TTL = 7 * 24 * 3600
+LIMITS_FILE = "limits.json"
+# Outcomes of a request, see HostLimits.release().
+OK = "ok"
+THROTTLED = "throttled"
+TIMEOUT = "timeout"
+
+# saturated: the request took the last free place of its host, only then
+# a good answer says the host could take more.
+Ticket = namedtuple("Ticket", ("host", "start", "saturated"))
+
+# ENABLED - set by enable(), the limits are loaded on the first request.
+ENABLED = False
+_enable_lock = threading.Lock()
+
+
+class HostState(object):
+    """HostState: the limit, requests in flight and usual answer time of a host."""
+
+    def __init__(self, limit=INITIAL, latency=None):
+        self.limit = limit
+        self.in_flight = 0
+        self.latency = latency
+        self.samples = SAMPLES if latency is not None else 0
+        # cut: monotonic time of the last decrease, answers to requests sent
+        # before it don't cut again.
+        self.cut = float("-inf")
+        self.changed = False
+
+
+def host_of(url):
+    return urlsplit(url).netloc or url
+
+
+class HostLimits(object):
+    """HostLimits: AIMD limit of the requests in flight to each host.
+
+    @path - JSON file of the learned limits, limits.json in the cache directory.
+    """
+
+    def __init__(self, path=None, initial=INITIAL, maximum=MAXIMUM, ttl=LIMITS_TTL):
+        self.path = path
+        self.initial = initial
+        self.maximum = maximum
+        self.ttl = ttl
+        self.hosts = dict()
+        self.condition = threading.Condition()
+
+    def limits_path(self):
+        return self.path or os.path.join(cache_dir(), LIMITS_FILE)
+
+    def read(self):
+        try:
+            with open(self.limits_path()) as f:
+                data = json.load(f)
+            return dict(data["hosts"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return dict()
+
+    def load(self):
+        """load: the learned limits younger than @ttl, nothing when unreadable."""
+        now = time.time()
+        hosts = dict()
+        for host, data in self.read().items():
+            try:
+                if now - float(data["updated"]) > self.ttl:
+                    continue
+                limit = min(self.maximum, max(MINIMUM, float(data["limit"])))
+                latency = data.get("latency")
+                hosts[host] = HostState(limit, float(latency) if latency else None)
+            except (KeyError, TypeError, ValueError):
+                continue
+        with self.condition:
+            hosts.update(self.hosts)
+            self.hosts = hosts
+        return self
+
+    def save(self):
+        """save: write the limits of the hosts seen by this run, the others are
+        kept; replaced atomically for concurrent runs.
+        """
+        hosts = self.read()
+        now = time.time()
+        with self.condition:
+            for host, state in self.hosts.items():
+                if state.changed:
+                    hosts[host] = {"limit": round(state.limit, 3), "latency": state.latency,
+                                   "updated": now}
+        if not hosts:
+            return
+        path = self.limits_path()
+        fd, tmp = tempfile.mkstemp(prefix=".tget-limits-", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"hosts": hosts}, f, indent=2, sort_keys=True)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.initial)
+        return state
+
+    def limit(self, url):
+        """limit: requests allowed in flight to the host of @url now."""
+        with self.condition:
+            return max(1, int(self.state(host_of(url)).limit))
+
+    def acquire(self, url, deadline=None):
+        """acquire: wait until a request to the host of @url may be sent.
+        @deadline - monotonic time to give up at, None to wait as long as needed.
+        @return: the Ticket of the request for release(), None after @deadline.
+        """
+        host = host_of(url)
+        with self.condition:
+            state = self.state(host)
+            while state.in_flight >= max(1, int(state.limit)):
+                wait = None if deadline is None else deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    return None
+                self.condition.wait(wait)
+            state.in_flight += 1
+            saturated = state.in_flight >= max(1, int(state.limit))
+        return Ticket(host, time.monotonic(), saturated)
+
+    def release(self, ticket, outcome=None, elapsed=None):
+        """release: the request of @ticket is done.
+        @outcome - OK, THROTTLED (403/429/503, challenge page), TIMEOUT, or
+          None for failures that say nothing about the load of the host.
+        @elapsed - seconds the host took to answer, since acquire() when None.
+        """
+        if elapsed is None:
+            elapsed = time.monotonic() - ticket.start
+        with self.condition:
+            state = self.state(ticket.host)
+            saturated = ticket.saturated or state.in_flight >= max(1, int(state.limit))
+            state.in_flight -= 1
+            if outcome == OK:
+                if state.samples >= SAMPLES and elapsed > SLOW * state.latency:
+                    outcome = TIMEOUT
+                # Slow answers count too, a host slower for good is the usual.
+                state.latency = (elapsed if state.latency is None
+                                 else state.latency + ALPHA * (elapsed - state.latency))
+                state.samples += 1
+            if outcome == OK and saturated:
+                # One more request per window of `limit` good answers, only
+                # while the limit is what holds the requests back.
+                state.limit = min(self.maximum, state.limit + INCREASE / state.limit)
+                state.changed = True
+            elif outcome in (THROTTLED, TIMEOUT) and ticket.start >= state.cut:
+                state.limit = max(MINIMUM, state.limit * DECREASE)
+                state.cut = time.monotonic()
+                state.changed = True
+            self.condition.notify_all()
+
+
+def enable():
+    """enable: adapt the requests in flight of every module from now on,
+    starting from the limits learned by the last runs. Nothing is imported
+    or read before the first request (see active()), offline runs pay nothing.
+    """
+    global ENABLED
+    ENABLED = True
+
+
+def active():
+    """active: Module.host_limits, loaded on the first call after enable().
+    @return: the HostLimits, None when not enabled.
+    """
+    from tget.core.module import Module
+
+    if Module.host_limits is None and ENABLED:
+        with _enable_lock:
+            if Module.host_limits is None:
+                Module.host_limits = HostLimits().load()
+    return Module.host_limits
+
+
+def save():
+    """save: keep the limits learned so far for the next runs, if any request
+    was sent.
+    """
+    module = sys.modules.get("tget.core.module")
+    limits = module.Module.host_limits if module is not None else None
+    if limits is not None:
+        try:
+            limits.save()
+        except OSError:
+            pass
@@ -0,0 +1,208 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from tget.core.budget import seeds_to_int
+from tget.core.utils import cache_dir, infohash_from_magnet
+
+INDEX_FILE = "index.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS torrents (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    target TEXT NOT NULL,
+    infohash TEXT,
+    link TEXT,
+    size TEXT,
+    user_status TEXT,
+    seeds INTEGER,
+    leeches INTEGER,
+    seen_at REAL,
+    UNIQUE (target, name)
+);
+CREATE INDEX IF NOT EXISTS torrents_infohash ON torrents (infohash);
+CREATE TABLE IF NOT EXISTS lists (
+    target TEXT NOT NULL,
+    name TEXT NOT NULL,
+    rank INTEGER,
+    seen_at REAL,
+    PRIMARY KEY (target, name)
+);
+"""
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS torrents_fts USING fts5(
+    name, content='torrents', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS torrents_ai AFTER INSERT ON torrents BEGIN
+    INSERT INTO torrents_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS torrents_ad AFTER DELETE ON torrents BEGIN
+    INSERT INTO torrents_fts (torrents_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+"""
+COLUMNS = "name, target, link, size, user_status, seeds, leeches, seen_at"
+T_COLUMNS = ", ".join("t." + column for column in COLUMNS.split(", "))
+
+log = logging.getLogger(__name__)
+
+
+def fts_query(text):
+    """fts_query: turn a search text into an FTS5 query.
+    every word has to match the start of a word in the torrent name.
+    """
+    words = re.findall(r'\w+', text)
+    return " ".join('"%s"*' % (word) for word in words)
+
+
+class TorrentIndex(object):
+    """TorrentIndex: local full-text index of every fetched torrent.
+
+    Items are stored per target and name, with the last seen seeds and
+    leeches. Searches use SQLite FTS5 on the torrent name, or LIKE when
+    the SQLite build has no FTS5.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), INDEX_FILE)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.fts = True
+        with self.lock, self.conn:
+            self.conn.executescript(SCHEMA)
+            try:
+                self.conn.executescript(FTS_SCHEMA)
+            except sqlite3.OperationalError as err:
+                log.debug('{}:{}'.format(type(err), err))
+                self.fts = False
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, items, seen_at=None):
+        """add: store @items as returned by WGSelect (with 'target')."""
+        seen_at = seen_at or time.time()
+        with self.lock, self.conn:
+            for name, item in items.items():
+                row = (
+                    infohash_from_magnet(item.get("link")), item.get("link"),
+                    item.get("size"), item.get("user_status"),
+                    seeds_to_int(item.get("seeds", 0)),
+                    seeds_to_int(item.get("leeches", 0)),
+                    seen_at, item.get("target", ""), name,
+                )
+                cur = self.conn.execute(
+                    "UPDATE torrents SET infohash = ?, link = ?, size = ?, user_status = ?,"
+                    " seeds = ?, leeches = ?, seen_at = ? WHERE target = ? AND name = ?",
+                    row
+                )
+                if cur.rowcount == 0:
+                    self.conn.execute(
+                        "INSERT INTO torrents (infohash, link, size, user_status, seeds,"
+                        " leeches, seen_at, target, name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        row
+                    )
+
+    def _items(self, rows):
+        items = dict()
+        for name, target, link, size, user_status, seeds, leeches, seen_at in rows:
+            if name in items:
+                continue  # Same name from another target, keep the best one.
+            item = {
+                "seeds": str(seeds), "leeches": str(leeches), "link": link,
+                "target": target, "seen_at": seen_at,
+            }
+            if size:
+                item["size"] = size
+            if user_status:
+                item["user_status"] = user_status
+            items[name] = item
+        return items
+
+    def _targets_clause(self, targets, prefix):
+        if not targets:
+            return "", ()
+        return (
+            " AND %starget IN (%s)" % (prefix, ", ".join("?" * len(targets))),
+            tuple(targets)
+        )
+
+    def search(self, text, targets=None, limit=None):
+        """search: find torrents whose name match @text.
+        @targets - only return these targets (optional).
+        @limit - maximum number of items (optional).
+        @return: dict of items, best seeded first.
+        """
+        where, args = self._targets_clause(targets, "t.")
+        if self.fts:
+            query = fts_query(text)
+            if not query:
+                return dict()
+            sql = (
+                "SELECT %s FROM torrents_fts f JOIN torrents t ON t.id = f.rowid"
+                " WHERE torrents_fts MATCH ?%s ORDER BY t.seeds DESC"
+            ) % (T_COLUMNS, where)
+            args = (query,) + args
+        else:
+            like = ["t.name LIKE ?"] * len(text.split())
+            sql = "SELECT %s FROM torrents t WHERE %s%s ORDER BY t.seeds DESC" % (
+                T_COLUMNS, " AND ".join(like) or "1", where
+            )
+            args = tuple("%%%s%%" % (word) for word in text.split()) + args
+        if limit:
+            sql += " LIMIT %d" % (int(limit))
+        with self.lock:
+            return self._items(self.conn.execute(sql, args).fetchall())
+
+    def top(self, targets=None, limit=None):
+        """top: best seeded torrents of @targets."""
+        where, args = self._targets_clause(targets, "")
+        sql = "SELECT %s FROM torrents WHERE 1%s ORDER BY seeds DESC" % (COLUMNS, where)
+        if limit:
+            sql += " LIMIT %d" % (int(limit))
+        with self.lock:
+            return self._items(self.conn.execute(sql, args).fetchall())
+
+    def set_list(self, target, items, seen_at=None):
+        """set_list: @items are now the top list of @target."""
+        seen_at = seen_at or time.time()
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM lists WHERE target = ?", (target,))
+            self.conn.executemany(
+                "INSERT INTO lists (target, name, rank, seen_at) VALUES (?, ?, ?, ?)",
+                [(target, name, rank, seen_at) for rank, name in enumerate(items)]
+            )
+
+    def touch_list(self, target, seen_at=None):
+        """touch_list: the top list of @target was seen unchanged."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE lists SET seen_at = ? WHERE target = ?", (seen_at or time.time(), target)
+            )
+
+    def list_seen(self, target):
+        """list_seen: when the top list of @target was last seen, None if never."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT MAX(seen_at) FROM lists WHERE target = ?", (target,)
+            ).fetchone()[0]
+
+    def listed(self, targets=None, limit=None):
+        """listed: torrents on the stored top lists of @targets."""
+        where, args = self._targets_clause(targets, "l.")
+        sql = (
+            "SELECT %s FROM lists l JOIN torrents t ON t.target = l.target AND t.name = l.name"
+            " WHERE 1%s ORDER BY t.seeds DESC"
+        ) % (T_COLUMNS, where)
+        if limit:
+            sql += " LIMIT %d" % (int(limit))
+        with self.lock:
+            return self._items(self.conn.execute(sql, args).fetchall())
@@ -0,0 +1,204 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Latency and error metrics of a run in the Prometheus text exposition
+format, built from the tget.core.stats records (--metrics, --metrics-add).
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+# Upper bounds of the latency histograms, in seconds.
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# METRICS - name: (type, help).
+METRICS = {
+    "tget_request_duration_seconds": (
+        "histogram", "Time of the requests sent by the modules, per target and mirror."),
+    "tget_requests_total": (
+        "counter", "Requests of the modules per target, mirror and result (ok, empty, error)."),
+    "tget_request_cache_hits_total": (
+        "counter", "Pages served from the response cache or page store, without a request."),
+    "tget_target_duration_seconds": (
+        "histogram", "Time of the module runs, per target."),
+    "tget_target_runs_total": (
+        "counter", "Module runs per target and result (ok, empty, error)."),
+    "tget_target_items": (
+        "gauge", "Items found by the last run of the target."),
+    "tget_last_run_timestamp_seconds": (
+        "gauge", "End of the last tget run, Unix time."),
+}
+# Sample suffixes of a histogram.
+SUFFIXES = ("_bucket", "_sum", "_count")
+SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)\s*$')
+LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def unescape(value):
+    return re.sub(r'\\(.)', lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else "%d" % (value)
+
+
+def family(name):
+    """family: metric of a sample name, tget_x_bucket -> tget_x."""
+    for suffix in SUFFIXES:
+        if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+            return name[:-len(suffix)]
+    return name
+
+
+def mirror(url):
+    """mirror: scheme://host of @url, the mirror label of a request."""
+    parts = urlsplit(url)
+    return "%s://%s" % (parts.scheme, parts.netloc) if parts.netloc else "-"
+
+
+def result(error, empty):
+    return "error" if error else "empty" if empty else "ok"
+
+
+class Metrics(object):
+    """Metrics: samples {(name, labels): value}, labels a sorted tuple of pairs."""
+
+    def __init__(self):
+        self.samples = dict()
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        self.samples[key] = self.samples.get(key, 0) + value
+
+    def set(self, name, labels, value):
+        self.samples[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, labels, seconds):
+        """observe: add @seconds to the histogram @name."""
+        for bound in BUCKETS + (float("inf"),):
+            # Buckets are cumulative, and all of them exist even when empty.
+            self.inc(name + "_bucket", dict(labels, le=format_value(bound)),
+                     1 if seconds <= bound else 0)
+        self.inc(name + "_sum", labels, seconds)
+        self.inc(name + "_count", labels)
+
+    def add_stats(self, stats):
+        """add_stats: fold the requests and module runs of a tget.core.stats.Stats."""
+        with stats.lock:
+            requests = list(stats.requests)
+            runs = list(stats.runs)
+        for record in requests:
+            labels = {"target": record.target or "-", "mirror": mirror(record.url)}
+            if record.cache in ("memory", "store"):
+                self.inc("tget_request_cache_hits_total", labels)
+                continue
+            self.observe("tget_request_duration_seconds", labels, record.total)
+            self.inc("tget_requests_total",
+                     dict(labels, result=result(record.error, record.empty)))
+        for record in runs:
+            labels = {"target": record.target}
+            self.observe("tget_target_duration_seconds", labels, record.wall)
+            self.inc("tget_target_runs_total",
+                     dict(labels, result=result(record.error, not record.items)))
+            self.set("tget_target_items", labels, record.items)
+        self.set("tget_last_run_timestamp_seconds", {}, time.time())
+        return self
+
+    def merge(self, other):
+        """merge: add the counters and histograms of @other, take its gauges.
+
+        Histograms merge bucket by bucket, as long as BUCKETS didn't change.
+        """
+        for (name, labels), value in other.samples.items():
+            if METRICS.get(family(name), ("gauge",))[0] == "gauge":
+                self.samples[(name, labels)] = value
+            else:
+                self.samples[(name, labels)] = self.samples.get((name, labels), 0) + value
+        return self
+
+    def exposition(self):
+        """exposition: the samples in the Prometheus text format."""
+        by_family = dict()
+        for key in self.samples:
+            by_family.setdefault(family(key[0]), list()).append(key)
+        lines = list()
+        for name in sorted(by_family):
+            kind, text = METRICS.get(name, ("untyped", name))
+            lines.append("# HELP %s %s" % (name, text))
+            lines.append("# TYPE %s %s" % (name, kind))
+            for sample, labels in sorted(by_family[name], key=sort_key):
+                value = self.samples[(sample, labels)]
+                if labels:
+                    sample += "{%s}" % (",".join('%s="%s"' % (k, escape(v)) for k, v in labels))
+                lines.append("%s %s" % (sample, format_value(value)))
+        return "\n".join(lines) + "\n" if lines else ""
+
+    @classmethod
+    def parse(cls, text):
+        """parse: Metrics from the text format, as written by exposition()."""
+        metrics = cls()
+        for line in text.splitlines():
+            match = SAMPLE_RE.match(line)
+            if not match or line.startswith("#"):
+                continue
+            name, labels, value = match.groups()
+            labels = {key: unescape(value) for key, value in LABEL_RE.findall(labels or "")}
+            metrics.samples[(name, tuple(sorted(labels.items())))] = float(value)
+        return metrics
+
+
+def sort_key(key):
+    """sort_key: samples by labels, buckets by bound, then _sum and _count."""
+    name, labels = key
+    other = tuple((k, v) for k, v in labels if k != "le")
+    bound = dict(labels).get("le")
+    bound = float("inf") if bound == "+Inf" else float(bound) if bound else 0.0
+    return other, SUFFIXES.index(name[len(family(name)):]) if name != family(name) else 0, bound
+
+
+def write(metrics, path):
+    """write: @metrics to @path ('-' for stdout), atomically for the collectors."""
+    text = metrics.exposition()
+    if path == "-":
+        sys.stdout.write(text)
+        sys.stdout.flush()
+        return
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".tget-metrics-", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def store(metrics, path):
+    """store: merge @metrics into the cumulative file @path (e.g. a .prom file of
+    the node exporter textfile collector). Runs sharing the file take turns.
+    """
+    with open(path + ".lock", "a") as lock:
+        try:
+            import fcntl
+
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        except ImportError:
+            pass
+        total = Metrics()
+        if os.path.exists(path):
+            with open(path) as f:
+                total = Metrics.parse(f.read())
+        write(total.merge(metrics), path)
@@ -3,9 +3,16 @@ Copyright (c) 2016-2022 we-get developers (https://github.com/rachmadaniHaryono/
 See the file 'LICENSE' for copying.
 """
 
+import re
 import urllib.parse
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from html import unescape as html_decode
 import socket
+import sys
+import threading
+import time
 
 import requests
 
@@ -16,6 +23,9 @@ try:
 except ImportError:
     HAS_CLOUDSCRAPER = False
 
+from tget.core import concurrency
+from tget.core.concurrency import OK, THROTTLED, TIMEOUT
+from tget.core.profiling import stage, staged
 from tget.core.utils import random_user_agent
 
 # Modern user agents - always use these instead of old ones from the file
@@ -31,8 +41,152 @@ MODERN_USER_AGENTS = [
 from random import choice
 USER_AGENT = choice(MODERN_USER_AGENTS)
 
+# Number of detail pages fetched at the same time by fetch_details.
+DETAIL_WORKERS = 4
+# Failures of a detail page fetch_details skips: the request, or a page
+# that doesn't parse. Other exceptions are bugs and propagate.
+DETAIL_ERRORS = (requests.exceptions.RequestException, socket.error, IndexError, KeyError,
+                 ValueError)
+# Answers of a host asking for fewer requests.
+THROTTLE_STATUS = (403, 429, 503)
+# Seeds column of a listing row (1337x 'coll-2 seeds', limetorrents 'tdseed').
+ROW_SEEDS_RE = re.compile(
+    r'class=["\'][^"\']*\b(?:seeds|tdseed)\b[^"\']*["\'][^>]*>\s*([\d,]+)\s*<',
+    re.IGNORECASE
+)
+
+
+# fresh - set in a thread by fresh_pages(), its requests skip the cached pages.
+# deadline - set by request_deadline(), monotonic time its requests must end by.
+_local = threading.local()
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """DeadlineExceeded: the deadline of the run passed before the request,
+    a Timeout to the modules so they give up like on a slow site.
+    """
+
+
+@contextmanager
+def fresh_pages():
+    """fresh_pages: the requests of the with block (and of the detail pages
+    it fetches) go to the site, the response cache and page store are only
+    updated.
+    """
+    _local.fresh = True
+    try:
+        yield
+    finally:
+        _local.fresh = False
+
+
+@contextmanager
+def request_deadline(at):
+    """request_deadline: the requests of the with block (and of the detail
+    pages it fetches) end by monotonic time @at: their timeout is cut to the
+    time left and they raise DeadlineExceeded once it passed. None for no
+    deadline.
+    """
+    previous = getattr(_local, "deadline", None)
+    _local.deadline = at
+    try:
+        yield
+    finally:
+        _local.deadline = previous
+
+
+def remaining(deadline):
+    """remaining: seconds left before monotonic time @deadline, None without one."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def carry_local(fn):
+    """carry_local: @fn for a worker thread, with the fresh_pages() and
+    request_deadline() of the caller.
+    """
+    fresh = getattr(_local, "fresh", False)
+    deadline = getattr(_local, "deadline", None)
+    if not fresh and deadline is None:
+        return fn
+
+    def run(*args, **kwargs):
+        with request_deadline(deadline):
+            if not fresh:
+                return fn(*args, **kwargs)
+            with fresh_pages():
+                return fn(*args, **kwargs)
+
+    return run
+
+
+def response_outcome(res, text):
+    """response_outcome: what answer @res (page @text, see http_response_text)
+    tells of the load of its host, for Module.host_limits.
+    """
+    if res.status_code in THROTTLE_STATUS:
+        return THROTTLED
+    if res.status_code == 200 and not text and len(res.content) >= 100:
+        # A full page rejected as a challenge or blocking page.
+        return THROTTLED
+    return OK if res.status_code in (200, 304) else None
+
+
+def note(**fields):
+    """note: set @fields on the stats record of the running request, if any."""
+    if Module.stats is not None:
+        Module.stats.note(**fields)
+
+
+def count_attempt():
+    if Module.stats is not None:
+        Module.stats.add(attempts=1)
+
 
 class Module(object):
+    # Shared by every module instance, set by long running modes (tget sync/serve):
+    # page_store - PageStore for conditional requests, None to disable.
+    # rate_limiter - RateLimiter applied before every request, None to disable.
+    # response_cache - TTLCache of fetched pages by URL, None to disable.
+    # request_slots - semaphore bounding the requests in flight, None to disable.
+    # stats - tget.core.stats.Stats recording every request, None to disable.
+    # host_limits - HostLimits adapting the requests in flight per host, None to disable.
+    page_store = None
+    rate_limiter = None
+    response_cache = None
+    request_slots = None
+    stats = None
+    host_limits = None
+    # HTTP session and cloudscraper instances, reused so connections and
+    # Cloudflare clearance cookies stay warm between requests.
+    _session = None
+    _scrapers = dict()
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def session(cls):
+        """session: shared requests.Session with a connection pool per host."""
+        with cls._session_lock:
+            if cls._session is None:
+                cls._session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+                cls._session.mount("http://", adapter)
+                cls._session.mount("https://", adapter)
+            return cls._session
+
+    @classmethod
+    def scraper(cls, browser=None):
+        """scraper: shared cloudscraper instance for @browser settings."""
+        key = tuple(sorted(browser.items())) if browser else None
+        with cls._session_lock:
+            if key not in cls._scrapers:
+                if browser:
+                    cls._scrapers[key] = cloudscraper.create_scraper(browser=browser)
+                else:
+                    cls._scrapers[key] = cloudscraper.create_scraper()
+            return cls._scrapers[key]
+
     def __init__(self):
         self.cursor = None
 
@@ -44,9 +198,104 @@ class Module(object):
         @use_cloudscraper: Use cloudscraper to bypass Cloudflare (if available)
         @return: data.
         """
+        with stage("request", url):
+            if Module.stats is None:
+                return self._http_get_request(url, timeout, debug, use_cloudscraper)
+            with Module.stats.request(url) as record:
+                data = self._http_get_request(url, timeout, debug, use_cloudscraper)
+                record.empty = not data
+                return data
+
+    def _http_get_request(self, url, timeout, debug, use_cloudscraper):
         import os
         debug = debug or os.environ.get('TGET_DEBUG', '').lower() in ('1', 'true', 'yes')
-        
+
+        fresh_only = getattr(_local, "fresh", False)
+        if Module.response_cache is not None and not fresh_only:
+            cached = Module.response_cache.get(url)
+            if cached is not None:
+                if debug:
+                    print(f"[DEBUG] Response cache hit: {url}")
+                note(cache="memory")
+                return cached
+
+        conditional_headers = dict()
+        if Module.page_store is not None:
+            # A fresh request may still be answered '304 Not Modified'.
+            fresh = None if fresh_only else Module.page_store.fresh(url)
+            if fresh is not None:
+                if debug:
+                    print(f"[DEBUG] Page store hit: {url}")
+                note(cache="store")
+                return fresh
+            conditional_headers = Module.page_store.headers(url)
+        deadline = getattr(_local, "deadline", None)
+        if Module.rate_limiter is not None:
+            if not Module.rate_limiter.acquire(url, remaining(deadline)):
+                raise DeadlineExceeded("deadline passed before %s" % (url))
+
+        # The host's ticket first: a request waiting for a busy host holds
+        # no --jobs slot, requests to the other hosts go on.
+        limits = concurrency.active()
+        ticket = None
+        if limits is not None:
+            ticket = limits.acquire(url, deadline)
+            if ticket is None:
+                raise DeadlineExceeded("deadline passed before %s" % (url))
+        slot = None
+        outcome = None
+        elapsed = None
+        try:
+            if Module.request_slots is not None:
+                if not Module.request_slots.acquire(timeout=remaining(deadline)):
+                    raise DeadlineExceeded("deadline passed before %s" % (url))
+                slot = Module.request_slots
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise DeadlineExceeded("deadline passed before %s" % (url))
+                timeout = min(timeout, left)
+            start = time.perf_counter()
+            try:
+                res = self.http_fetch(url, timeout, debug, use_cloudscraper, conditional_headers)
+            finally:
+                elapsed = time.perf_counter() - start
+            if Module.stats is not None:
+                # elapsed: until the headers arrived, the body is read after.
+                record = Module.stats.current()
+                headers = res.elapsed.total_seconds()
+                record.ttfb = max(0.0, headers - record.dns - record.connect - record.tls)
+                record.download = max(0.0, elapsed - headers)
+                record.status = res.status_code
+                record.bytes = len(res.content)
+            text = self.http_response_text(url, res, debug)
+            outcome = response_outcome(res, text)
+            return text
+        except requests.exceptions.Timeout as err:
+            if not isinstance(err, DeadlineExceeded):
+                # stderr: stdout carries the results (-J, --format, --batch).
+                print("Error: Timeout when opening following url: {}".format(url),
+                      file=sys.stderr)
+                outcome = TIMEOUT
+            raise
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.RequestException,
+                socket.gaierror,
+                socket.error) as err:
+            # http_fetch errors, http_response_text only reads the response.
+            print("Error: Network error when opening following url: {} - {}".format(url, err),
+                  file=sys.stderr)
+            raise
+        finally:
+            if slot is not None:
+                slot.release()
+            if ticket is not None:
+                limits.release(ticket, outcome, elapsed)
+
+    def http_fetch(self, url, timeout, debug, use_cloudscraper, conditional_headers):
+        """http_fetch: send the GET request of http_get_request.
+        @return: requests.Response.
+        """
         # Use cloudscraper if requested and available (for Cloudflare protection)
         res = None
         if use_cloudscraper and HAS_CLOUDSCRAPER:
@@ -55,10 +304,13 @@ class Module(object):
             # Try different cloudscraper configurations
             try:
                 # First try: default cloudscraper
-                scraper = cloudscraper.create_scraper()
+                scraper = self.scraper()
                 if debug:
                     print(f"[DEBUG] Requesting URL: {url}")
-                res = scraper.get(url, timeout=timeout, allow_redirects=True)
+                count_attempt()
+                res = scraper.get(
+                    url, headers=conditional_headers, timeout=timeout, allow_redirects=True
+                )
                 # If we got a challenge page, try with browser-like settings
                 if res.status_code == 403 and 'just a moment' in res.text.lower():
                     if debug:
@@ -66,13 +318,14 @@ class Module(object):
                     import time
                     time.sleep(2)  # Small delay
                     # Try with a browser-like scraper
-                    scraper = cloudscraper.create_scraper(
+                    scraper = self.scraper(
                         browser={
                             'browser': 'chrome',
                             'platform': 'windows',
                             'desktop': True
                         }
                     )
+                    count_attempt()
                     res = scraper.get(url, timeout=timeout + 5, allow_redirects=True)
             except Exception as err:
                 if debug:
@@ -92,28 +345,46 @@ class Module(object):
                 "Referer": "https://www.google.com/",
                 "DNT": "1"
             }
+            headers.update(conditional_headers)
             if debug:
                 print(f"[DEBUG] Requesting URL: {url}")
                 print(f"[DEBUG] User-Agent: {USER_AGENT[:50]}...")
-            res = requests.get(url, headers=headers, timeout=timeout, allow_redirects=True)
-        
+            count_attempt()
+            res = self.session().get(
+                url, headers=headers, timeout=timeout, allow_redirects=True
+            )
+        return res
+
+    def http_response_text(self, url, res, debug):
+        """http_response_text: check the response of http_get_request.
+        @return: page text, "" for errors, blocked and challenge pages.
+        """
         # Process response (works for both cloudscraper and requests)
         try:
+            # Decode once, res.text decodes the body again on every access.
+            start = time.perf_counter()
+            text = res.text
+            note(decode=time.perf_counter() - start)
             if debug:
                 print(f"[DEBUG] Status Code: {res.status_code}")
-                print(f"[DEBUG] Response Length: {len(res.content)} bytes (raw), {len(res.text)} bytes (decoded)")
+                print(f"[DEBUG] Response Length: {len(res.content)} bytes (raw), {len(text)} bytes (decoded)")
                 print(f"[DEBUG] Final URL (after redirects): {res.url}")
                 print(f"[DEBUG] Content-Type: {res.headers.get('Content-Type', 'N/A')}")
                 print(f"[DEBUG] Content-Encoding: {res.headers.get('Content-Encoding', 'N/A')}")
                 if 'cf-ray' in res.headers:
                     print(f"[DEBUG] Cloudflare detected (CF-Ray: {res.headers.get('cf-ray')})")
             
+            if res.status_code == 304 and Module.page_store is not None:
+                if debug:
+                    print("[DEBUG] Not modified, using stored page")
+                note(cache="304")
+                return Module.page_store.not_modified(url)
             # Check if we got blocked or got an error page
             if res.status_code == 403:
                 if debug:
                     print(f"[DEBUG] 403 Forbidden - Site is blocking the request")
                     # Check if it's a Cloudflare challenge
-                    response_lower = res.text.lower() if res.text else ""
+                    response_lower = text.lower() if text else ""
                     if 'just a moment' in response_lower or 'checking your browser' in response_lower:
                         print(f"[DEBUG] Cloudflare JavaScript challenge detected - cloudscraper cannot bypass this level of protection")
                         print(f"[DEBUG] This site requires a real browser with JavaScript execution")
@@ -121,8 +392,8 @@ class Module(object):
                         print(f"[DEBUG] Cloudflare protection detected")
                     # Show first 500 chars of decoded text
                     try:
-                        if res.text and len(res.text) > 0:
-                            preview = res.text[:500]
+                        if text and len(text) > 0:
+                            preview = text[:500]
                             print(f"[DEBUG] Response preview (text): {preview}")
                         else:
                             print(f"[DEBUG] Response is binary/compressed, cannot preview as text")
@@ -132,7 +403,7 @@ class Module(object):
                 return ""
             # Also check for challenge pages even with 200 status
             elif res.status_code == 200:
-                response_lower = res.text.lower() if res.text else ""
+                response_lower = text.lower() if text else ""
                 if 'just a moment' in response_lower or 'checking your browser' in response_lower:
                     if debug:
                         print(f"[DEBUG] Got 200 but response is a Cloudflare challenge page")
@@ -142,18 +413,18 @@ class Module(object):
                     print(f"[DEBUG] Non-200 status code: {res.status_code}")
                 return ""
             # Check if response is too short (likely an error page or block)
-            if len(res.text) < 100:
+            if len(text) < 100:
                 if debug:
-                    print(f"[DEBUG] Response too short ({len(res.text)} bytes), likely error page")
+                    print(f"[DEBUG] Response too short ({len(text)} bytes), likely error page")
                 return ""
             
             # Check for actual blocking/error pages (not just presence of words)
             # Only check if we got a 200 status and reasonable content length
-            text_lower = res.text.lower()
+            text_lower = text.lower()
             
             # For 200 status codes with good content length, be more lenient
             # Only reject if we see clear blocking page patterns
-            if res.status_code == 200 and len(res.text) > 1000:
+            if res.status_code == 200 and len(text) > 1000:
                 # Check for actual blocking page patterns, not just word presence
                 blocking_patterns = [
                     'just a moment',  # Cloudflare challenge
@@ -178,17 +449,12 @@ class Module(object):
                         print(f"[DEBUG] Blocking indicators found: {found_indicators}")
                     return ""
             if debug:
-                print(f"[DEBUG] Successfully received {len(res.text)} bytes of data")
-            return res.text
-        except requests.exceptions.Timeout:
-            print("Error: Timeout when opening following url: {}".format(url))
-            raise
-        except (requests.exceptions.ConnectionError, 
-                requests.exceptions.RequestException,
-                socket.gaierror,
-                socket.error) as err:
-            print("Error: Network error when opening following url: {} - {}".format(url, err))
-            raise
+                print(f"[DEBUG] Successfully received {len(text)} bytes of data")
+            if Module.page_store is not None:
+                Module.page_store.save(url, text, res.headers)
+            if Module.response_cache is not None:
+                Module.response_cache.set(url, text)
+            return text
         except Exception as err:
             print("Error when opening following url: {}.\n{}".format(err, url))
             raise err
@@ -201,7 +467,7 @@ class Module(object):
         @return: data.
         """
         try:
-            return requests.get(url, headers=headers, timeout=timeout).text
+            return self.session().get(url, headers=headers, timeout=timeout).text
         except requests.exceptions.Timeout:
             print("Error: Timeout when opening following url: {}".format(url))
             raise
@@ -215,6 +481,77 @@ class Module(object):
             print("Error when opening following url: {}.\n{}".format(err, url))
             raise
 
+    def listing_seeds(self, data, link):
+        """listing_seeds: seeds shown next to @link on a listing page.
+        @data: listing page HTML
+        @link: detail link found on the page
+        @return: seeds as string, None if the row has no seeds column.
+        """
+        start = data.find(link)
+        if start == -1:
+            return None
+        end = data.find("</tr>", start)
+        match = ROW_SEEDS_RE.search(data, start, end if end != -1 else len(data))
+        if match:
+            return match.group(1)
+        return None
+
+    def fetch_details(self, links, set_item, limit, budget=None, workers=DETAIL_WORKERS,
+                      site=None):
+        """fetch_details: fetch detail pages concurrently.
+
+        Links are consumed in listing order and the first @limit items are
+        kept, like a sequential loop would. Candidates the @budget cannot
+        admit are never fetched, and pending fetches are dropped as soon
+        as @limit items are found or the budget is cancelled.
+        @links: list of (link, listing seeds or None)
+        @set_item: callable returning a dict with at most one item
+        @limit: number of items to collect
+        @budget: ResultBudget shared by the run (optional)
+        @site: URL of the detail pages, their host's limit replaces @workers
+          with Module.host_limits (optional)
+        @return: dict of items.
+        """
+        limits = concurrency.active()
+        if site and limits is not None:
+            workers = limits.limit(site)
+        items = dict()
+        pending = deque()
+        links = iter(links)
+        set_item = carry_local(staged(set_item, "detail"))
+        if Module.stats is not None:
+            set_item = Module.stats.bind(set_item)
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+        def submit_next():
+            for link, seeds in links:
+                if budget is not None and not budget.admits(seeds, link):
+                    continue
+                pending.append(executor.submit(set_item, link))
+                return True
+            return False
+
+        try:
+            while len(pending) < workers and submit_next():
+                pass
+            while pending and len(items) < limit:
+                if budget is not None and budget.cancelled:
+                    break
+                try:
+                    item = pending.popleft().result()
+                except DETAIL_ERRORS:
+                    item = None
+                if item:
+                    items.update(item)
+                    if budget is not None:
+                        budget.offer(item)
+                submit_next()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+        return items
+
     def magnet2name(self, link):
         """magnet2name: return torrent name from magnet link.
         @magnet - link.
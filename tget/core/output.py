@@ -0,0 +1,267 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Streaming encoders of the results (--json, --format, --fields): each item
+is encoded on its own and written in chunks, so the output takes the same
+memory for 10 or 100000 results. orjson and msgpack are used when they
+are installed.
+"""
+
+import csv
+import io
+import json
+import struct
+import sys
+
+from tget.core.release import RELEASE_FIELDS, field as release_field
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMATS = ("json", "ndjson", "csv", "msgpack")
+# Columns of the csv output when --fields is not given.
+CSV_FIELDS = ("name", "target", "seeds", "leeches", "link")
+# Bytes gathered before a write to the output.
+CHUNK = 64 * 1024
+
+
+def parse_fields(text):
+    """parse_fields: --fields 'name,seeds,link' -> ['name', 'seeds', 'link'], None if empty."""
+    fields = [field.strip() for field in (text or "").split(",") if field.strip()]
+    return fields or None
+
+
+def field_value(name, item, key):
+    """field_value: field @key of item @name, release fields (year, resolution, ...)
+    parsed from the name when the item doesn't have them.
+    """
+    if key == "name":
+        return name
+    if key in item:
+        return item[key]
+    if key in RELEASE_FIELDS:
+        return release_field(name, key)
+    return None
+
+
+def record(name, item, fields=None):
+    """record: item @name as one flat dict with its name, only @fields when given."""
+    if fields is None:
+        data = {"name": name}
+        data.update(item)
+        return data
+    return {key: field_value(name, item, key) for key in fields}
+
+
+def dumps(obj):
+    """dumps: compact JSON of @obj as UTF-8 bytes, with orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # Out of orjson's range (e.g. integers over 64 bits), json copes.
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def pretty(obj):
+    """pretty: JSON of @obj as json.dumps(indent=2, sort_keys=True), the -J layout."""
+    return json.dumps(obj, indent=2, sort_keys=True)
+
+
+def encode_json(items, fields=None, indent=False, extra=None):
+    """encode_json: the JSON object {name: item} of @items, one item at a time.
+
+    @indent - the layout of json.dumps(items, indent=2, sort_keys=True).
+    @extra - {key: value} written next to the items: {"items": ..., key: value}.
+    """
+    def projected(name):
+        item = items[name]
+        if fields is None:
+            return item
+        return {key: field_value(name, item, key) for key in fields}
+
+    if indent:
+        # Strings in JSON never hold a new line, so nesting is a re-indent.
+        depth = "  " * (2 if extra else 1)
+        names = sorted(items)
+        yield ('{\n  "items": {' if extra else "{").encode("utf-8")
+        for i, name in enumerate(names):
+            text = pretty(projected(name)).replace("\n", "\n" + depth)
+            yield ('%s\n%s%s: %s' % ("," if i else "", depth, json.dumps(name), text)).encode(
+                "utf-8")
+        yield ("\n" + depth[2:] + "}" if names else "}").encode("utf-8")
+        if extra:
+            for key in sorted(extra):
+                text = pretty(extra[key]).replace("\n", "\n  ")
+                yield (',\n  %s: %s' % (json.dumps(key), text)).encode("utf-8")
+            yield b"\n}"
+        yield b"\n"
+        return
+    yield b'{"items":{' if extra else b"{"
+    for i, name in enumerate(items):
+        yield (b"," if i else b"") + dumps(name) + b":" + dumps(projected(name))
+    yield b"}"
+    if extra:
+        for key, data in extra.items():
+            yield b"," + dumps(key) + b":" + dumps(data)
+        yield b"}"
+    yield b"\n"
+
+
+def encode_ndjson(items, fields=None):
+    """encode_ndjson: one JSON line per item, with its name."""
+    for name in items:
+        yield dumps(record(name, items[name], fields)) + b"\n"
+
+
+def cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list, tuple)):
+        return dumps(value).decode("utf-8")
+    return value
+
+
+def encode_csv(items, fields=None):
+    """encode_csv: a header row of @fields (CSV_FIELDS) and one row per item."""
+    fields = list(fields or CSV_FIELDS)
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(fields)
+    for name in items:
+        data = record(name, items[name], fields)
+        writer.writerow([cell(data[field]) for field in fields])
+        if text.tell() >= CHUNK:
+            yield text.getvalue().encode("utf-8")
+            text.seek(0)
+            text.truncate()
+    yield text.getvalue().encode("utf-8")
+
+
+def pack(obj, out):
+    """pack: append the MessagePack encoding of @obj to bytearray @out."""
+    if obj is None:
+        out += b"\xc0"
+    elif obj is True or obj is False:
+        out += b"\xc3" if obj else b"\xc2"
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -0x20 <= obj < 0:
+            out.append(obj & 0xff)
+        elif 0 <= obj < 1 << 64:
+            for code, fmt in ((0xcc, ">B"), (0xcd, ">H"), (0xce, ">I"), (0xcf, ">Q")):
+                if obj < 1 << (8 * struct.calcsize(fmt)):
+                    out += bytes((code,)) + struct.pack(fmt, obj)
+                    break
+        elif -(1 << 63) <= obj < 0:
+            for code, fmt in ((0xd0, ">b"), (0xd1, ">h"), (0xd2, ">i"), (0xd3, ">q")):
+                if obj >= -(1 << (8 * struct.calcsize(fmt) - 1)):
+                    out += bytes((code,)) + struct.pack(fmt, obj)
+                    break
+        else:
+            pack(str(obj), out)
+    elif isinstance(obj, float):
+        out += b"\xcb" + struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        size = len(data)
+        if size < 32:
+            out.append(0xa0 | size)
+        elif size < 1 << 8:
+            out += b"\xd9" + struct.pack(">B", size)
+        elif size < 1 << 16:
+            out += b"\xda" + struct.pack(">H", size)
+        else:
+            out += b"\xdb" + struct.pack(">I", size)
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        size = len(obj)
+        if size < 1 << 8:
+            out += b"\xc4" + struct.pack(">B", size)
+        elif size < 1 << 16:
+            out += b"\xc5" + struct.pack(">H", size)
+        else:
+            out += b"\xc6" + struct.pack(">I", size)
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        size = len(obj)
+        if size < 16:
+            out.append(0x90 | size)
+        elif size < 1 << 16:
+            out += b"\xdc" + struct.pack(">H", size)
+        else:
+            out += b"\xdd" + struct.pack(">I", size)
+        for value in obj:
+            pack(value, out)
+    elif isinstance(obj, dict):
+        size = len(obj)
+        if size < 16:
+            out.append(0x80 | size)
+        elif size < 1 << 16:
+            out += b"\xde" + struct.pack(">H", size)
+        else:
+            out += b"\xdf" + struct.pack(">I", size)
+        for key, value in obj.items():
+            pack(key, out)
+            pack(value, out)
+    else:
+        pack(str(obj), out)
+    return out
+
+
+def packb(obj):
+    """packb: MessagePack of @obj, with the msgpack package when installed."""
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    return bytes(pack(obj, bytearray()))
+
+
+def encode_msgpack(items, fields=None):
+    """encode_msgpack: a stream of MessagePack maps, one per item with its name."""
+    for name in items:
+        yield packb(record(name, items[name], fields))
+
+
+def encode(items, fmt="json", fields=None, indent=False, extra=None):
+    """encode: byte chunks of @items in @fmt (see FORMATS).
+    @extra - more data for the json output, see encode_json().
+    @raise ValueError: unknown @fmt.
+    """
+    if fmt == "json":
+        return encode_json(items, fields, indent, extra)
+    if fmt == "ndjson":
+        return encode_ndjson(items, fields)
+    if fmt == "csv":
+        return encode_csv(items, fields)
+    if fmt == "msgpack":
+        return encode_msgpack(items, fields)
+    raise ValueError("unknown format '%s', use one of %s" % (fmt, ", ".join(FORMATS)))
+
+
+def write(chunks, out=None):
+    """write: byte @chunks to @out (stdout), CHUNK bytes at a time."""
+    out = out or sys.stdout
+    out.flush()
+    # Text files (stdout) are written through their binary buffer.
+    out = getattr(out, "buffer", out)
+    pending = list()
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= CHUNK:
+            out.write(b"".join(pending))
+            pending = list()
+            size = 0
+    if pending:
+        out.write(b"".join(pending))
+    out.flush()
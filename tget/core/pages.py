@@ -0,0 +1,110 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from tget.core.utils import cache_dir
+
+PAGES_FILE = "pages.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    digest TEXT,
+    body BLOB,
+    last_seen REAL,
+    last_changed REAL
+);
+"""
+
+
+class PageStore(object):
+    """PageStore: fetched pages with their HTTP validators.
+
+    Module.http_get_request uses the store, when one is set, to send
+    conditional requests (If-None-Match / If-Modified-Since) and to reuse
+    the stored body on '304 Not Modified'. Pages seen less than @max_age
+    seconds ago are served without any request.
+    """
+
+    def __init__(self, path=None, max_age=0):
+        self.path = path or os.path.join(cache_dir(), PAGES_FILE)
+        self.max_age = max_age
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.lock = threading.Lock()
+        # url -> True if the last fetch of this process changed the page.
+        self.changed = dict()
+        with self.lock, self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _row(self, url):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT etag, last_modified, digest, body, last_seen, last_changed"
+                " FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def fresh(self, url):
+        """fresh: stored body of @url if it was seen less than max_age ago."""
+        row = self._row(url)
+        if row and self.max_age and time.time() - row[4] < self.max_age:
+            return zlib.decompress(row[3]).decode("utf-8")
+        return None
+
+    def headers(self, url):
+        """headers: conditional request headers for @url."""
+        row = self._row(url)
+        headers = dict()
+        if row:
+            if row[0]:
+                headers["If-None-Match"] = row[0]
+            if row[1]:
+                headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def not_modified(self, url):
+        """not_modified: the server answered 304, return the stored body."""
+        row = self._row(url)
+        if not row:
+            return ""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE pages SET last_seen = ? WHERE url = ?", (time.time(), url))
+        self.changed[url] = False
+        return zlib.decompress(row[3]).decode("utf-8")
+
+    def save(self, url, text, headers):
+        """save: store a fetched page.
+        @headers - response headers, for ETag and Last-Modified.
+        """
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        row = self._row(url)
+        now = time.time()
+        changed = row is None or row[2] != digest
+        last_changed = now if changed else row[5]
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, digest, body,"
+                " last_seen, last_changed) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, headers.get("ETag"), headers.get("Last-Modified"), digest,
+                 zlib.compress(text.encode("utf-8")), now, last_changed)
+            )
+        self.changed[url] = changed
+
+    def last_seen(self, url):
+        """last_seen: (last_seen, last_changed) of @url, None if never fetched."""
+        row = self._row(url)
+        if row:
+            return row[4], row[5]
+        return None
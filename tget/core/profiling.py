@@ -0,0 +1,211 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Profiling hooks around the stages of a run, enabled with --profile or
+from the library with add_hook().
+
+A hook is a callable hook(stage, name) returning a context manager, it is
+entered around every stage:
+  target  - the main() of a module, @name is the target.
+  request - a Module.http_get_request call, @name is the URL.
+  detail  - a detail page of a module (1337x, limetorrents), @name is the link.
+  filter, scrape, sort, cluster, cut, render - the WGSelect stages, @name is None.
+"""
+
+import os
+import threading
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+STAGES = ("target", "request", "detail", "filter", "scrape", "sort", "cluster", "cut", "render")
+KINDS = ("cpu", "mem")
+# Rows written to the text summary of a profile.
+TOP = 40
+
+HOOKS = list()
+
+
+def add_hook(hook):
+    """add_hook: run @hook(stage, name) around every stage from now on."""
+    HOOKS.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    if hook in HOOKS:
+        HOOKS.remove(hook)
+
+
+@contextmanager
+def stage(kind, name=None):
+    """stage: run the with block as a @kind stage, inside every hook."""
+    if not HOOKS:
+        yield
+        return
+    with ExitStack() as stack:
+        for hook in list(HOOKS):
+            stack.enter_context(hook(kind, name))
+        yield
+
+
+def staged(fn, kind):
+    """staged: @fn(arg) run as a @kind stage named after its first argument."""
+    def run(arg, *args, **kwargs):
+        with stage(kind, arg):
+            return fn(arg, *args, **kwargs)
+
+    return run
+
+
+def profile_name(kind, name):
+    """profile_name: file name of the profile of a stage, one per target for 'target'."""
+    if kind == "target" and name:
+        return "target-%s" % (name)
+    return kind
+
+
+class CPUProfiler(object):
+    """CPUProfiler: hook running cProfile around every stage.
+
+    A stage entered inside another one in the same thread (a request of a
+    module) pauses the outer profile, so each profile holds the time of its
+    own stage only: the network wait lands in 'request', the parsing in
+    'target' and 'detail'.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles = defaultdict(list)
+
+    @contextmanager
+    def __call__(self, kind, name=None):
+        import cProfile
+
+        running = getattr(self.local, "running", None)
+        if running is None:
+            running = self.local.running = list()
+        profile = cProfile.Profile()
+        if running:
+            running[-1].disable()
+        running.append(profile)
+        profile.enable()
+        try:
+            yield profile
+        finally:
+            profile.disable()
+            running.pop()
+            if running:
+                running[-1].enable()
+            with self.lock:
+                self.profiles[profile_name(kind, name)].append(profile)
+
+    def write(self, directory):
+        """write: <stage>.prof (pstats, for snakeviz & co) and <stage>.txt per stage.
+        @return: list of written paths.
+        """
+        import pstats
+
+        with self.lock:
+            profiles = dict(self.profiles)
+        paths = list()
+        for key, runs in sorted(profiles.items()):
+            stats = pstats.Stats(runs[0])
+            if len(runs) > 1:
+                stats.add(*runs[1:])
+            path = os.path.join(directory, key + ".prof")
+            stats.dump_stats(path)
+            paths.append(path)
+            with open(os.path.join(directory, key + ".txt"), "w") as f:
+                f.write("%s: %d run(s)\n" % (key, len(runs)))
+                pstats.Stats(path, stream=f).sort_stats("cumulative").print_stats(TOP)
+            paths.append(os.path.join(directory, key + ".txt"))
+        return paths
+
+
+class MemProfiler(object):
+    """MemProfiler: hook comparing tracemalloc snapshots around every stage.
+
+    tracemalloc traces the whole process, so the allocations of stages
+    running at the same time in other threads (other targets) show up in
+    each other's profiles. Run one target to keep them apart.
+    """
+
+    def __init__(self, frames=1):
+        self.lock = threading.Lock()
+        self.frames = frames
+        # key: {line: [size, count]}, runs and peak per key.
+        self.lines = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+        self.runs = defaultdict(int)
+        self.peaks = defaultdict(int)
+
+    @contextmanager
+    def __call__(self, kind, name=None):
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        before = tracemalloc.take_snapshot()
+        try:
+            yield
+        finally:
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            key = profile_name(kind, name)
+            # Leave out the allocations of the tracer and of the hooks themselves.
+            trace_filter = [tracemalloc.Filter(False, tracemalloc.__file__),
+                            tracemalloc.Filter(False, __file__)]
+            diff = after.filter_traces(trace_filter).compare_to(
+                before.filter_traces(trace_filter), "lineno")
+            with self.lock:
+                self.runs[key] += 1
+                self.peaks[key] = max(self.peaks[key], peak)
+                lines = self.lines[key]
+                for stat in diff:
+                    if stat.size_diff or stat.count_diff:
+                        line = str(stat.traceback[0])
+                        lines[line][0] += stat.size_diff
+                        lines[line][1] += stat.count_diff
+
+    def write(self, directory):
+        """write: <stage>.txt per stage, the lines that allocated the most.
+        @return: list of written paths.
+        """
+        with self.lock:
+            keys = sorted(self.runs)
+        paths = list()
+        for key in keys:
+            lines = sorted(self.lines[key].items(), key=lambda x: x[1][0], reverse=True)
+            path = os.path.join(directory, key + ".txt")
+            with open(path, "w") as f:
+                f.write("%s: %d run(s), process peak %.1f KB\n" % (
+                    key, self.runs[key], self.peaks[key] / 1024))
+                f.write("%12s %10s  %s\n" % ("KB", "blocks", "line"))
+                for line, (size, count) in lines[:TOP]:
+                    f.write("%12.1f %10d  %s\n" % (size / 1024, count, line))
+            paths.append(path)
+        return paths
+
+
+def enable(kind="cpu"):
+    """enable: profile every stage from now on with a @kind profiler (see KINDS).
+    @return: the profiler, write its profiles with profiler.write(directory).
+    """
+    if kind not in KINDS:
+        raise ValueError("unknown profile '%s', use one of %s" % (kind, ", ".join(KINDS)))
+    profiler = CPUProfiler() if kind == "cpu" else MemProfiler()
+    return add_hook(profiler)
+
+
+def finish(profiler, directory):
+    """finish: stop @profiler and write its profiles to @directory.
+    @return: list of written paths.
+    """
+    remove_hook(profiler)
+    if isinstance(profiler, MemProfiler):
+        import tracemalloc
+
+        tracemalloc.stop()
+    os.makedirs(directory, exist_ok=True)
+    return profiler.write(directory)
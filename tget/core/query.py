@@ -0,0 +1,145 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Queries of the shell (show, filter, sort, top) over the results of a run.
+"""
+
+import re
+from collections import OrderedDict
+from functools import lru_cache
+
+from tget.core.release import matches, parse
+
+# Info hash in a magnet (btih:<hash>) or .torrent download link.
+HASH_RE = re.compile(r"(?<![0-9a-fA-F])([0-9a-fA-F]{40})(?![0-9a-fA-F])")
+# Match sets kept by ItemIndex.match(), least recently used dropped first.
+MATCHES = 64
+SORT_FIELDS = ("seeds", "leeches", "name", "target", "year", "resolution")
+
+
+@lru_cache(maxsize=128)
+def compile_pattern(text, ignore_case=False):
+    """compile_pattern: compiled regex of @text, cached across queries.
+    @raise re.error: @text is not a valid regex.
+    """
+    return re.compile(text, re.IGNORECASE if ignore_case else 0)
+
+
+def number(value):
+    """number: seeds/leeches as int, '1,024' -> 1024, 0 when unknown."""
+    try:
+        return int(str(value).replace(",", ""))
+    except ValueError:
+        return 0
+
+
+class ItemIndex(object):
+    """ItemIndex: the items of a run, indexed by name, target and info hash.
+
+    Regex matches are kept as sets of names (LRU of MATCHES patterns), and
+    each sort order is computed once over all the items, so narrowing,
+    re-sorting or repeating a query only walks the current selection.
+    """
+
+    def __init__(self, items):
+        self.items = items
+        self.names = list(items)
+        self.by_target = dict()
+        self.by_hash = dict()
+        for name, item in items.items():
+            self.by_target.setdefault(item.get("target"), list()).append(name)
+            match = HASH_RE.search(item.get("link") or "")
+            if match:
+                self.by_hash[match.group(1).lower()] = name
+        self.matches = OrderedDict()
+        self.orders = dict()
+
+    def __len__(self):
+        return len(self.names)
+
+    def match(self, text, ignore_case=False):
+        """match: names matching regex @text anywhere.
+        @return: frozenset of names.
+        @raise re.error: @text is not a valid regex.
+        """
+        key = (text, ignore_case)
+        names = self.matches.get(key)
+        if names is not None:
+            self.matches.move_to_end(key)
+            return names
+        search = compile_pattern(text, ignore_case).search
+        names = self.matches[key] = frozenset(name for name in self.names if search(name))
+        if len(self.matches) > MATCHES:
+            self.matches.popitem(last=False)
+        return names
+
+    def find(self, text, names=None):
+        """find: names of @names (all by default) that are @text, have the
+        info hash @text, or match regex @text.
+        @raise re.error: @text is not a valid regex.
+        """
+        names = self.names if names is None else names
+        if text in self.items:
+            return [text] if text in names or names is self.names else []
+        name = self.by_hash.get(text.lower())
+        if name is not None:
+            return [name]
+        found = self.match(text)
+        return [name for name in names if name in found]
+
+    def quality(self, quality):
+        """quality: names of @quality (see tget.core.release.wanted()), kept like match().
+        @raise ValueError: no known quality in @quality.
+        """
+        key = ("--quality", quality)
+        names = self.matches.get(key)
+        if names is None:
+            names = self.matches[key] = frozenset(
+                name for name in self.names if matches(name, quality))
+            if len(self.matches) > MATCHES:
+                self.matches.popitem(last=False)
+        return names
+
+    def filter(self, names, text=None, target=None, quality=None):
+        """filter: @names matching @text (regex, or plain text when it isn't
+        one, case insensitive), of @target and of @quality.
+        """
+        if quality:
+            found = self.quality(quality)
+            names = [name for name in names if name in found]
+        if target is not None:
+            wanted = set(self.by_target.get(target, ()))
+            names = [name for name in names if name in wanted]
+        if text:
+            try:
+                found = self.match(text, True)
+            except re.error:
+                found = self.match(re.escape(text), True)
+            names = [name for name in names if name in found]
+        return names
+
+    def order(self, field):
+        """order: rank of every name sorted by @field (see SORT_FIELDS), computed once."""
+        if field not in self.orders:
+            items = self.items
+            if field == "name":
+                ranked = sorted(self.names)
+            elif field == "target":
+                ranked = sorted(self.names, key=lambda name: (items[name].get("target") or "", name))
+            elif field == "year":
+                ranked = sorted(self.names, key=lambda name: parse(name).year or 0, reverse=True)
+            elif field == "resolution":
+                ranked = sorted(self.names, key=lambda name: number(
+                    (parse(name).resolution or "0")[:-1]), reverse=True)
+            else:
+                ranked = sorted(self.names, key=lambda name: number(items[name].get(field)),
+                                reverse=True)
+            self.orders[field] = {name: rank for rank, name in enumerate(ranked)}
+        return self.orders[field]
+
+    def sort(self, names, field, reverse=False):
+        """sort: @names by @field, seeds, leeches, year and resolution from the highest."""
+        if field not in SORT_FIELDS:
+            raise ValueError("unknown sort field '%s'" % (field))
+        return sorted(names, key=self.order(field).__getitem__, reverse=reverse)
@@ -0,0 +1,44 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class RateLimiter(object):
+    """RateLimiter: token bucket per host.
+
+    @rate - requests per minute allowed to one host.
+    @burst - requests that can be sent at once after an idle period.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.buckets = dict()
+        self.lock = threading.Lock()
+
+    def acquire(self, url, timeout=None):
+        """acquire: wait until a request to the host of @url is allowed.
+        @timeout - seconds to wait at most, None to wait as long as needed.
+        @return: True, False when the request is not allowed within @timeout.
+        """
+        host = urlsplit(url).netloc or url
+        interval = 60.0 / self.rate
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                tokens, last = self.buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) / interval)
+                if tokens >= 1:
+                    self.buckets[host] = (tokens - 1, now)
+                    return True
+                self.buckets[host] = (tokens, now)
+                wait = (1 - tokens) * interval
+            if end is not None and now + wait > end:
+                return False
+            time.sleep(wait)
@@ -0,0 +1,107 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+import json
+import os
+import sys
+from importlib import import_module
+
+from tget.modules import TARGETS
+
+# Third-party targets register a module (with a main(pargs) function) here:
+#   [tool.poetry.plugins."tget.modules"]
+#   mysite = "tget_mysite.module"
+ENTRY_POINT_GROUP = "tget.modules"
+REGISTRY_FILE = "targets.json"
+
+
+def _fingerprint():
+    """_fingerprint: mtime of the import paths, they change on (un)install."""
+    fingerprint = list()
+    for path in sys.path:
+        try:
+            fingerprint.append([path, os.stat(path or ".").st_mtime])
+        except OSError:
+            continue
+    return fingerprint
+
+
+def _scan_entry_points():
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:  # Python < 3.8
+        try:
+            import pkg_resources
+        except ImportError:
+            return dict()
+        return {
+            ep.name: ep.module_name + (":" + ".".join(ep.attrs) if ep.attrs else "")
+            for ep in pkg_resources.iter_entry_points(ENTRY_POINT_GROUP)
+        }
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        group = eps.select(group=ENTRY_POINT_GROUP)
+    else:
+        group = eps.get(ENTRY_POINT_GROUP, ())
+    return {ep.name: ep.value for ep in group}
+
+
+def entry_points():
+    """entry_points: third-party targets, name -> 'module[:attr]'.
+
+    Scanning the installed packages is slow, so the result is cached in
+    the cache directory until an import path changes.
+    """
+    from tget.core.utils import cache_dir
+
+    fingerprint = _fingerprint()
+    try:
+        path = os.path.join(cache_dir(), REGISTRY_FILE)
+    except OSError:
+        return _scan_entry_points()
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        if cached["fingerprint"] == fingerprint:
+            return cached["entry_points"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    found = _scan_entry_points()
+    try:
+        with open(path, "w") as f:
+            json.dump({"fingerprint": fingerprint, "entry_points": found}, f)
+    except OSError:
+        pass
+    return found
+
+
+def targets():
+    """targets: bundled targets followed by the third-party ones."""
+    return list(TARGETS) + sorted(name for name in entry_points() if name not in TARGETS)
+
+
+def load_target(name):
+    """load_target: import the module of target @name.
+    @return: module (or object) with a main(pargs) function.
+    @raise ImportError: there is no such target.
+    """
+    if name in TARGETS:
+        return import_module("tget.modules.%s" % (name))
+    value = entry_points().get(name)
+    if value is None:
+        return import_module("tget.modules.%s" % (name))
+    module_name, _, attrs = value.partition(":")
+    obj = import_module(module_name.strip())
+    for attr in filter(None, attrs.strip().split(".")):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def accepts_budget(main):
+    """accepts_budget: check if a module main() takes the budget argument."""
+    code = getattr(main, "__code__", None)
+    if code is None:
+        return False
+    return "budget" in code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
@@ -0,0 +1,167 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Release names: title, year, resolution, source, codec, season/episode and
+group of a torrent name, parsed once per name (--quality, --fields, the
+shell filter and sort).
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import unquote, urlsplit
+
+# Names parsed and kept, a few result sets worth.
+PARSED = 65536
+RELEASE_FIELDS = ("title", "year", "resolution", "source", "codec", "season", "episode",
+                  "group")
+# Fields --quality can match.
+QUALITY_FIELDS = ("resolution", "source", "codec")
+
+Release = namedtuple("Release", RELEASE_FIELDS)
+
+# Tokens of a release name, between separators (. _ - space brackets).
+TOKEN_RE = re.compile(r"""
+    (?<![a-z0-9])(?:
+        (?P<resolution>2160p|1440p|1080[pi]|720p|576p|480p|360p|4k|uhd)
+      | (?P<source>blu-?ray|bdrip|brrip|bdremux|remux|web-?dl|web-?rip|web|hdtv|pdtv
+                   |dvdrip|dvd-?r|dvdscr|hdrip|hdcam|camrip|telesync|hdts)
+      | (?P<codec>[xh]\.?26[45]|hevc|avc|xvid|divx|av1|vp9)
+      | s(?P<season>\d{1,2})[ ._-]?e(?P<episode>\d{1,3})
+      | (?P<xseason>\d{1,2})x(?P<xepisode>\d{2,3})
+      | season[ ._-]?(?P<wseason>\d{1,2})
+      | (?P<year>(?:19|20)\d\d)
+    )(?![a-z0-9])
+""", re.IGNORECASE | re.VERBOSE)
+# -GROUP at the end of the name, maybe followed by a [site] tag.
+GROUP_RE = re.compile(r"-([a-z0-9][a-z0-9_]*)\s*(?:\[[^\]]*\]\s*)*$", re.IGNORECASE)
+SEPARATORS_RE = re.compile(r"[\s._\[\]()]+")
+WORD_RE = re.compile(r"[0-9a-z]+")
+# --quality words that are no resolution, source or codec (3D, 10bit, ...):
+# words of the name. ALL is no filter, like the YTS API value.
+WORDS = "words"
+ALL = "all"
+
+CANONICAL = {
+    "resolution": {"4k": "2160p", "uhd": "2160p", "1080i": "1080p"},
+    "source": {
+        "bluray": "BluRay", "blu-ray": "BluRay", "bdrip": "BDRip", "brrip": "BDRip",
+        "bdremux": "Remux", "remux": "Remux", "web-dl": "WEB-DL", "webdl": "WEB-DL",
+        "webrip": "WEBRip", "web-rip": "WEBRip", "web": "WEB", "hdtv": "HDTV", "pdtv": "PDTV",
+        "dvdrip": "DVDRip", "dvdr": "DVD-R", "dvd-r": "DVD-R", "dvdscr": "DVDScr",
+        "hdrip": "HDRip", "hdcam": "CAM", "camrip": "CAM", "telesync": "TS", "hdts": "TS",
+    },
+    "codec": {
+        "x264": "H.264", "h264": "H.264", "h.264": "H.264", "x.264": "H.264", "avc": "H.264",
+        "x265": "H.265", "h265": "H.265", "h.265": "H.265", "x.265": "H.265", "hevc": "H.265",
+        "xvid": "XviD", "divx": "DivX", "av1": "AV1", "vp9": "VP9",
+    },
+}
+
+
+def canonical(kind, value):
+    value = value.lower()
+    return CANONICAL[kind].get(value, value)
+
+
+@lru_cache(maxsize=PARSED)
+def parse(name):
+    """parse: the Release of torrent @name, fields it doesn't show are None.
+
+    The title is the text before the first release token (a year that
+    starts the name is part of the title), the year the last one found.
+    """
+    fields = dict.fromkeys(RELEASE_FIELDS)
+    start = end = None
+    for match in TOKEN_RE.finditer(name):
+        kind = match.lastgroup
+        if kind == "year":
+            if match.start() == 0:
+                continue
+            fields["year"] = int(match.group(kind))
+        elif kind in QUALITY_FIELDS:
+            if fields[kind] is None:
+                fields[kind] = canonical(kind, match.group(kind))
+        elif fields["season"] is None:
+            season, episode = {"episode": ("season", "episode"),
+                               "xepisode": ("xseason", "xepisode"),
+                               "wseason": ("wseason", None)}[kind]
+            fields["season"] = int(match.group(season))
+            fields["episode"] = int(match.group(episode)) if episode else None
+        if start is None:
+            start = match.start()
+        end = match.end()
+    title = name if start is None else name[:start]
+    fields["title"] = SEPARATORS_RE.sub(" ", title).strip(" -") or None
+    if end is not None:
+        group = GROUP_RE.search(name, end)
+        if group:
+            fields["group"] = group.group(1)
+    return Release(**fields)
+
+
+def link_name(link):
+    """link_name: the torrent name in the path of a detail page link (1337x,
+    limetorrents), the longest part of it.
+    """
+    parts = [unquote(part) for part in urlsplit(link or "").path.split("/") if part]
+    return max(parts, key=len) if parts else ""
+
+
+@lru_cache(maxsize=PARSED)
+def name_words(name):
+    """name_words: the lowercase words of torrent @name."""
+    return frozenset(WORD_RE.findall(name.lower()))
+
+
+@lru_cache(maxsize=128)
+def wanted(quality):
+    """wanted: --quality '1080p,720p,x265' -> {field: set of values}.
+
+    Values of one field are alternatives, fields must all match:
+    (1080p or 720p) and H.265. Other words (3D) must be words of the name,
+    'all' matches any name.
+    @raise ValueError: nothing in @quality.
+    """
+    found = dict()
+    words = [word.strip() for word in (quality or "").split(",") if word.strip()]
+    if not words:
+        raise ValueError("no quality in '%s'" % (quality))
+    for word in words:
+        match = TOKEN_RE.fullmatch(word)
+        if match and match.lastgroup in QUALITY_FIELDS:
+            kind = match.lastgroup
+            found.setdefault(kind, set()).add(canonical(kind, word))
+        elif word.lower() != ALL:
+            found.setdefault(WORDS, set()).add(word.lower())
+    return {kind: frozenset(values) for kind, values in found.items()}
+
+
+def value_of(name, kind):
+    if kind == WORDS:
+        return name_words(name)
+    return getattr(parse(name), kind)
+
+
+def matches(name, quality):
+    """matches: torrent @name is of @quality (see wanted())."""
+    for kind, values in wanted(quality).items():
+        value = value_of(name, kind)
+        if not (values & value if kind == WORDS else value in values):
+            return False
+    return True
+
+
+def might_match(name, quality):
+    """might_match: @name doesn't show another quality, fields it doesn't show
+    can still match. For names cut short, like the ones of the links.
+    """
+    release = parse(name)
+    return all(getattr(release, kind) in values for kind, values in wanted(quality).items()
+               if kind != WORDS and getattr(release, kind) is not None)
+
+
+def field(name, key):
+    """field: release field @key of torrent @name."""
+    return getattr(parse(name), key)
@@ -0,0 +1,296 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Swarm numbers straight from the trackers: UDP tracker scrape (BEP 15) of
+the info hashes in the magnets of the modules, many torrents per packet.
+"""
+
+import base64
+import binascii
+import random
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+PROTOCOL_ID = 0x41727101980
+CONNECT, ANNOUNCE, SCRAPE, ERROR = 0, 1, 2, 3
+# Info hashes per scrape packet, BEP 15 allows about 74.
+MAX_HASHES = 70
+# Seconds to wait for an answer, and packets sent before a tracker is given up.
+TIMEOUT = 2.0
+RETRIES = 2
+# Trackers keep a connection ID valid for a minute.
+CONNECTION_TTL = 60
+# Trackers asked at the same time.
+WORKERS = 8
+
+
+class TrackerError(Exception):
+    """TrackerError: a tracker answered with an error, or didn't answer."""
+
+
+def magnet_params(link):
+    if not link or not link.startswith("magnet:"):
+        return dict()
+    return parse_qs(urlsplit(link).query)
+
+
+def info_hash(link):
+    """info_hash: info hash of magnet @link as 40 upper case hex digits, None without one."""
+    for xt in magnet_params(link).get("xt", ()):
+        if not xt.lower().startswith("urn:btih:"):
+            continue
+        value = xt[9:]
+        try:
+            if len(value) == 40:
+                return bytes.fromhex(value).hex().upper()
+            if len(value) == 32:
+                return base64.b32decode(value.upper()).hex().upper()
+        except (ValueError, binascii.Error):
+            pass
+    return None
+
+
+def trackers(link):
+    """trackers: (host, port) of the udp:// trackers of magnet @link, in order."""
+    found = list()
+    for tracker in magnet_params(link).get("tr", ()):
+        url = urlsplit(tracker)
+        try:
+            address = (url.hostname, url.port)
+        except ValueError:
+            continue
+        if url.scheme == "udp" and all(address) and address not in found:
+            found.append(address)
+    return found
+
+
+class UDPTracker(object):
+    """UDPTracker: scrape client of one UDP tracker.
+
+    Every packet is sent again after @timeout seconds, @retries times in all,
+    and the connection ID is kept for the next scrapes of the tracker.
+    @address - (host, port).
+    """
+
+    def __init__(self, address, timeout=TIMEOUT, retries=RETRIES):
+        self.address = address
+        self.timeout = timeout
+        self.retries = retries
+        self.lock = threading.Lock()
+        # connection - (connection ID, time.monotonic() of the connect).
+        self.connection = None
+
+    def exchange(self, sock, connection_id, action, body=b"", deadline=None):
+        """exchange: send a request, wait for the answer with its transaction ID.
+        @deadline - monotonic time to stop waiting at, None for the retries only.
+        @return: the answer after its action and transaction ID.
+        @raise TrackerError: error answer, or no answer after the retries.
+        """
+        for _ in range(self.retries):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            transaction = random.getrandbits(32)
+            sock.send(struct.pack(">QII", connection_id, action, transaction) + body)
+            wait = time.monotonic() + self.timeout
+            if deadline is not None:
+                wait = min(wait, deadline)
+            while True:
+                left = wait - time.monotonic()
+                if left <= 0:
+                    break
+                sock.settimeout(left)
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    break
+                if len(data) < 8:
+                    continue
+                answer, answer_transaction = struct.unpack_from(">II", data)
+                if answer_transaction != transaction:
+                    # Late answer to a packet sent before.
+                    continue
+                if answer == ERROR:
+                    raise TrackerError(data[8:].decode("utf-8", "replace"))
+                if answer == action:
+                    return data[8:]
+        raise TrackerError("no answer from %s:%d" % (self.address))
+
+    def connect(self, sock, deadline=None):
+        """connect: the connection ID, a new one when the last one is too old."""
+        if self.connection and time.monotonic() - self.connection[1] < CONNECTION_TTL:
+            return self.connection[0]
+        data = self.exchange(sock, PROTOCOL_ID, CONNECT, deadline=deadline)
+        if len(data) < 8:
+            raise TrackerError("short connect answer from %s:%d" % (self.address))
+        self.connection = (struct.unpack_from(">Q", data)[0], time.monotonic())
+        return self.connection[0]
+
+    def scrape_packet(self, sock, hashes, deadline=None):
+        body = b"".join(bytes.fromhex(value) for value in hashes)
+        try:
+            data = self.exchange(sock, self.connect(sock, deadline), SCRAPE, body, deadline)
+        except TrackerError:
+            if self.connection is None:
+                raise
+            # The kept connection ID may have expired on the tracker side.
+            self.connection = None
+            data = self.exchange(sock, self.connect(sock, deadline), SCRAPE, body, deadline)
+        found = dict()
+        for i, value in enumerate(hashes[:len(data) // 12]):
+            seeds, completed, leeches = struct.unpack_from(">III", data, 12 * i)
+            found[value] = (seeds, leeches, completed)
+        return found
+
+    def open(self):
+        """open: UDP socket connected to the tracker.
+        @raise TrackerError: the host is unknown.
+        """
+        try:
+            family, kind, proto, _, address = socket.getaddrinfo(
+                self.address[0], self.address[1], 0, socket.SOCK_DGRAM)[0]
+            sock = socket.socket(family, kind, proto)
+        except (OSError, UnicodeError) as err:
+            raise TrackerError("%s:%d: %s" % (self.address + (err,)))
+        try:
+            sock.connect(address)
+        except OSError as err:
+            sock.close()
+            raise TrackerError("%s:%d: %s" % (self.address + (err,)))
+        return sock
+
+    def handshake(self):
+        """handshake: get a new connection ID.
+        @return: seconds the tracker took to answer.
+        @raise TrackerError: the tracker is unknown or didn't answer.
+        """
+        with self.lock, self.open() as sock:
+            start = time.monotonic()
+            self.connection = None
+            try:
+                self.connect(sock)
+            except OSError as err:
+                raise TrackerError(str(err))
+            return time.monotonic() - start
+
+    def scrape(self, hashes, deadline=None):
+        """scrape: swarm of @hashes (hex), MAX_HASHES per packet.
+        @deadline - monotonic time to give up at, see exchange().
+        @return: {info hash: (seeds, leeches, completed)}, the hashes scraped
+          before a failure when the tracker stops answering.
+        @raise TrackerError: the tracker is unknown or didn't answer at all.
+        """
+        found = dict()
+        with self.lock, self.open() as sock:
+            try:
+                for start in range(0, len(hashes), MAX_HASHES):
+                    found.update(self.scrape_packet(sock, hashes[start:start + MAX_HASHES],
+                                                    deadline))
+            except (TrackerError, OSError) as err:
+                if not found:
+                    raise TrackerError(str(err))
+        return found
+
+
+class Scraper(object):
+    """Scraper: swarm numbers of many magnets in a few round trips.
+
+    The hashes are grouped by their first tracker and the trackers are
+    asked at the same time; the hashes of a tracker that fails move on to
+    their next tracker. Trackers (and their connection IDs) are kept for
+    the next scrapes.
+    """
+
+    def __init__(self, timeout=TIMEOUT, retries=RETRIES, workers=WORKERS):
+        self.timeout = timeout
+        self.retries = retries
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.trackers = dict()
+        # dead - trackers that failed during the last scrape().
+        self.dead = set()
+
+    def tracker(self, address):
+        with self.lock:
+            tracker = self.trackers.get(address)
+            if tracker is None:
+                tracker = self.trackers[address] = UDPTracker(
+                    address, self.timeout, self.retries)
+            return tracker
+
+    def ask(self, job, deadline=None):
+        address, hashes = job
+        try:
+            return self.tracker(address).scrape(hashes, deadline)
+        except TrackerError:
+            with self.lock:
+                self.dead.add(address)
+            return dict()
+
+    def scrape(self, links, deadline=None):
+        """scrape: swarm of the torrents of magnet @links.
+        @deadline - monotonic time to give up at (--deadline), None to ask
+          every tracker of the magnets.
+        @return: {info hash: (seeds, leeches, completed)}, without the
+          torrents none of whose trackers answered.
+        """
+        pending = OrderedDict()
+        for link in links:
+            value = info_hash(link)
+            if value is not None and value not in pending:
+                pending[value] = trackers(link)
+        self.dead = set()
+        found = dict()
+        while pending:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            groups = OrderedDict()
+            for value, addresses in pending.items():
+                addresses = [address for address in addresses if address not in self.dead]
+                if addresses:
+                    groups.setdefault(addresses[0], list()).append(value)
+                pending[value] = addresses
+            if not groups:
+                break
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(groups))) as executor:
+                answers = list(executor.map(self.ask, groups.items(),
+                                            [deadline] * len(groups)))
+            for (address, hashes), answer in zip(groups.items(), answers):
+                for value in hashes:
+                    if value in answer:
+                        found[value] = answer[value]
+                        del pending[value]
+                    else:
+                        pending[value] = pending[value][1:]
+        return found
+
+
+def update_items(items, swarms):
+    """update_items: set seeds/leeches of @items from @swarms (see Scraper.scrape).
+    @return: names of the changed items.
+    """
+    changed = list()
+    for name, item in items.items():
+        swarm = swarms.get(info_hash(item.get("link")))
+        if swarm is None:
+            continue
+        seeds, leeches = str(swarm[0]), str(swarm[1])
+        if (seeds, leeches) != (item.get("seeds"), item.get("leeches")):
+            item["seeds"], item["leeches"] = seeds, leeches
+            changed.append(name)
+    return changed
+
+
+def scrape_items(items, scraper=None, deadline=None):
+    """scrape_items: refresh seeds/leeches of @items from their trackers.
+    @deadline - monotonic time to give up at, see Scraper.scrape().
+    @return: names of the changed items.
+    """
+    scraper = scraper or Scraper()
+    links = (item.get("link") for item in items.values())
+    return update_items(items, scraper.scrape(links, deadline))
@@ -0,0 +1,177 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+import json
+import logging
+import os
+import signal
+import socketserver
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from tget.core.client import (  # noqa: F401 - client API, also used from here
+    CLIENT_ARGS,
+    daemon_connection,
+    daemon_query,
+    socket_path,
+)
+from tget.core.utils import msg_info
+
+__doc__ = """Usage: tget serve [options]
+
+Keep sessions, caches and modules warm and answer queries over a local
+JSON API. While the daemon runs, tget sends its queries to it.
+
+Options:
+  -u --socket=<path>    Unix socket to listen on (default: tget.sock in the cache directory).
+  -p --port=<port>      Listen on 127.0.0.1:<port> instead of a Unix socket.
+  --cache-ttl=<sec>     Reuse fetched pages for <sec> seconds [default: 300].
+  -h --help             Help message.
+
+API:
+  GET  /health                          daemon status.
+  GET  /search?q=<text>&target=<t>&n=<n>&sort=<type>&filter=<str>
+  GET  /list?target=<t>&n=<n>&sort=<type>&filter=<str>
+  POST /query                           {"pargs": {provided tget arguments}}
+  Queries take deadline=<sec> (--deadline), answers cut by it have "partial".
+"""
+
+QUERY_ARGS = {
+    "target": "--target", "n": "--results", "sort": "--sort-type",
+    "filter": "--filter", "quality": "--quality", "genre": "--genre",
+    "deadline": "--deadline",
+}
+
+log = logging.getLogger(__name__)
+
+
+def select(pargs):
+    """select: the WGSelect of a query, see query()."""
+    from tget.core.tget import WGSelect
+
+    pargs = dict(pargs)
+    pargs.setdefault("--target", ["all"])
+    for arg in CLIENT_ARGS:
+        pargs.pop(arg, None)
+    return WGSelect(pargs)
+
+
+def query(pargs):
+    """query: run a WGSelect query in this process.
+    @pargs - provided arguments, like WG.parguments.
+    @return: items in the order WGSelect returns them.
+    """
+    return select(pargs).run(api_mode=True)
+
+
+def pargs_from_query(path, params):
+    """pargs_from_query: provided arguments from a GET /search or /list URL."""
+    pargs = dict()
+    if path == "/search":
+        pargs["--search"] = params.get("q", [""])[:1]
+    else:
+        pargs["--list"] = True
+    for key, arg in QUERY_ARGS.items():
+        if key in params:
+            pargs[arg] = params[key][:1]
+    for flag in ("sfw", "offline", "local-first"):
+        if params.get(flag, ["0"])[0] not in ("0", "false", ""):
+            pargs["--" + flag] = True
+    return pargs
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Handler: JSON API of the daemon."""
+
+    server_version = "tget"
+
+    def address_string(self):
+        # Unix socket clients have no address.
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        log.info("%s %s", self.address_string(), format % args)
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def answer(self, pargs):
+        try:
+            sel = select(pargs)
+            data = {"items": sel.run(api_mode=True)}
+            if sel.partial is not None:
+                # --deadline: the items found before it passed.
+                data["partial"] = {"reason": sel.partial, "unfinished": sel.unfinished}
+            self.send_json(200, data)
+        except Exception as err:
+            log.exception("query failed")
+            self.send_json(500, {"error": "%s: %s" % (type(err).__name__, err)})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            from tget.core.tget import __version__
+            self.send_json(200, {"status": "ok", "version": __version__})
+        elif url.path in ("/search", "/list"):
+            self.answer(pargs_from_query(url.path, parse_qs(url.query)))
+        else:
+            self.send_json(404, {"error": "no such endpoint"})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/query":
+            self.send_json(404, {"error": "no such endpoint"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            pargs = json.loads(self.rfile.read(length).decode("utf-8"))["pargs"]
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, {"error": "expected {\"pargs\": {...}}"})
+            return
+        self.answer(pargs)
+
+
+class TCPHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main(argv=None):
+    from docopt import docopt
+
+    from tget.core import concurrency
+    from tget.core.cache import TTLCache
+    from tget.core.module import Module
+
+    args = docopt(__doc__, argv=argv)
+    Module.response_cache = TTLCache(int(args["--cache-ttl"]))
+    Module.session()
+    concurrency.enable()
+    if args["--port"]:
+        server = TCPHTTPServer(("127.0.0.1", int(args["--port"])), Handler)
+        msg_info("tget serve: http://127.0.0.1:%s" % (args["--port"]))
+    else:
+        path = args["--socket"] or socket_path()
+        if os.path.exists(path):
+            os.unlink(path)  # Stale socket of a daemon that is gone.
+        server = UnixHTTPServer(path, Handler)
+        msg_info("tget serve: unix:%s" % (path))
+    # Clean up the socket when the daemon is stopped by a service manager.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        concurrency.save()
+        server.server_close()
+        if not args["--port"]:
+            os.unlink(path)
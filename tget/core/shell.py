@@ -4,6 +4,7 @@ See the file 'LICENSE' for copying.
 """
 import logging
 import re
+import time
 from json import dumps
 from sys import stdout
 
@@ -14,8 +15,11 @@ from prompt_toolkit.history import InMemoryHistory
 
 from tget.core.commands import COMMANDS
 from tget.core.completer import WGCompleter
+from tget.core.query import SORT_FIELDS, ItemIndex
+from tget.core.swarm import SwarmRefresher
 from tget.core.style import tget_prompt_style
-from tget.core.utils import color, msg_error, msg_item, printc, printc_raw
+from tget.core.utils import color, msg_error, msg_info, printc, printc_raw
+from tget.core.view import ItemStyle, ItemView
 
 PROMPT_TOOLKIT_V2 = prompt_toolkit.__version__.split('.')[0] == '2'
 if PROMPT_TOOLKIT_V2:
@@ -32,6 +36,21 @@ class Shell(object):
         self.items = None
         self.show_links = False
         self.item_color = None
+        self.view = None
+        # fuzzy - complete torrent names by subsequence too ([shell] fuzzy_completion).
+        self.fuzzy = False
+        self.completer = None
+        # index - ItemIndex of the items, selection - names left by filter/sort/top.
+        self.index = None
+        self.selection = None
+        # searcher - searcher(pargs, fresh) -> items, runs 'search' and 'refresh'
+        #   (WGSelect.search_items), query - pargs of the items shown.
+        self.searcher = None
+        self.query = None
+        # watch - seconds between swarm refreshes of a target, 0 for none
+        #   ([shell] watch); refresher - the running SwarmRefresher.
+        self.watch = 0
+        self.refresher = None
 
     def prompt_usage(self):
         printc("white", "Usage: help")
@@ -52,9 +71,18 @@ class Shell(object):
             return True
         return False
 
-    def prompt_show_items(self):
-        for item in self.items:
-            msg_item(item, self.items[item], self.item_color)
+    def prompt_show_items(self, where=None):
+        """prompt_show_items: draw a page of the items.
+        @where - 'next', 'prev', 'all' (pager) or an item number, the current page if None.
+        """
+        if self.view is None:
+            self.view = ItemView(self.items, self.item_color, names=self.selection)
+        if where == "all":
+            self.view.page()
+        elif where and not self.view.move(where):
+            msg_error("Use list next/prev/first/last/all or list <n>.", False)
+        else:
+            self.view.draw()
 
     def prompt_verify_command(self, command, args):
         for x in COMMANDS:
@@ -85,16 +113,13 @@ class Shell(object):
             show .Cool --link # Show all torrents with .Cool
             show Cool.Torrent\\d --target
         """
-        if torrent in self.items.keys():
-            items_idx = [torrent]
-        else:
-            try:
-                items_idx = [item for item in self.items.keys() if
-                             re.search(torrent, item)]
-            except Exception as e:
-                log.error('{}: {}'.format(type(e), e))
-                msg_error("Invalid regular expression or torrent name.", False)
-                return
+        try:
+            # Exact name, info hash or regex, within the current selection.
+            items_idx = self.index.find(torrent, self.selection)
+        except re.error as e:
+            log.error('{}: {}'.format(type(e), e))
+            msg_error("Invalid regular expression or torrent name.", False)
+            return
 
         for x in items_idx:
             if args == '--link':
@@ -107,6 +132,10 @@ class Shell(object):
                 print("%s se(%s)" % (
                     color("cyan", x), color("green", self.items[x]['seeds'])
                 ))
+            elif args == "--duplicates":
+                style = ItemStyle(self.item_color)
+                for name, item in self.items[x].get("duplicates", {}).items():
+                    print(style.line(name, item))
             elif args == "--leeches":
                 print("%s le(%s)" % (
                     color("cyan", x), color("red", self.items[x]['leeches'])
@@ -116,14 +145,144 @@ class Shell(object):
                     x, dumps(self.items[x], indent=2, sort_keys=True)
                 ))
 
+    def select(self, names):
+        """select: show @names from now on (list, show, filter, sort, top)."""
+        self.selection = names
+        self.view = None
+        self.prompt_show_items()
+
+    def prompt_command_filter(self, args):
+        """filter [text/regex] [--target <target>] [--quality <q>]: narrow the
+        selection, 'filter --clear' goes back to every item."""
+        words = args.split()
+        if "--clear" in words:
+            return self.select(self.index.names)
+        opts = dict()
+        for opt in ("--target", "--quality"):
+            if opt in words:
+                at = words.index(opt)
+                opts[opt] = words[at + 1] if at + 1 < len(words) else None
+                del words[at:at + 2]
+        try:
+            names = self.index.filter(self.selection, " ".join(words), opts.get("--target"),
+                                      opts.get("--quality"))
+        except ValueError as err:
+            msg_error("filter: %s." % (err), False)
+            return
+        self.select(names)
+
+    def prompt_command_sort(self, args):
+        words = args.split()
+        if words[0] not in SORT_FIELDS:
+            msg_error("Sort by %s." % ("/".join(SORT_FIELDS)), False)
+            return
+        self.select(self.index.sort(self.selection, words[0], "--reverse" in words))
+
+    def prompt_command_top(self, args):
+        if not args.strip().isdigit():
+            msg_error("Use top <n>.", False)
+            return
+        self.select(self.selection[:int(args)])
+
+    def load(self, items):
+        """load: show @items, indexed for show/filter/sort/top and completion."""
+        self.items = items
+        self.view = None
+        self.index = ItemIndex(items)
+        self.selection = self.index.names
+        self.completer = WGCompleter(self.index.names, fuzzy=self.fuzzy)
+
+    def run_query(self, pargs, fresh=False):
+        """run_query: replace the items with the results of @pargs."""
+        if self.searcher is None:
+            msg_error("No live search in this shell.", False)
+            return
+        start = time.perf_counter()
+        try:
+            items = self.searcher(pargs, fresh)
+        except KeyboardInterrupt:
+            msg_error("Search cancelled.", False)
+            return
+        except Exception as e:
+            log.error('{}: {}'.format(type(e), e))
+            msg_error("Search failed: %s" % (e), False)
+            return
+        self.query = pargs
+        self.load(items)
+        self.prompt_show_items()
+        what = pargs["--search"][0] if "--search" in pargs else "top list"
+        msg_info("'%s': %d results in %.2fs" % (what, len(items), time.perf_counter() - start))
+
+    def prompt_command_search(self, args):
+        """search <query> [--target <target,...>]: new search, same session."""
+        words = args.split()
+        pargs = {arg: value for arg, value in (self.query or self.pargs).items()
+                 if arg not in ("--search", "--list")}
+        if "--target" in words:
+            at = words.index("--target")
+            if at + 1 < len(words):
+                pargs["--target"] = [words[at + 1]]
+            del words[at:at + 2]
+        if not words:
+            msg_error("Use search <query> [--target <target>].", False)
+            return
+        pargs["--search"] = [" ".join(words)]
+        self.run_query(pargs)
+
+    def swarm_source(self):
+        return self.items, self.query or self.pargs
+
+    def swarm_changed(self, names):
+        """swarm_changed: seeds/leeches of @names changed, drop what was drawn from them."""
+        view, index = self.view, self.index
+        if view is not None:
+            view.lines.clear()
+        if index is not None:
+            index.orders.pop("seeds", None)
+            index.orders.pop("leeches", None)
+
+    def toolbar(self):
+        return self.refresher.status if self.refresher is not None else ""
+
+    def prompt_command_watch(self, args):
+        """watch [seconds/off]: refresh the swarm of the results in the background."""
+        if args == "off":
+            if self.refresher is not None:
+                self.refresher.stop()
+                self.refresher = None
+            return
+        if args and not args.isdigit():
+            msg_error("Use watch [seconds/off].", False)
+            return
+        if self.refresher is not None:
+            self.refresher.stop()
+        self.refresher = SwarmRefresher(self.swarm_source, int(args or self.watch or 0) or 60,
+                                        self.swarm_changed).start()
+        msg_info("refreshing seeds/leeches every %ds per target, 'list' shows them" % (
+            self.refresher.interval))
+
     def prompt_parse_command(self, command, args):
         if command == "show":
             self.prompt_command_show(args)
+        elif command == "filter":
+            self.prompt_command_filter(args)
+        elif command == "sort":
+            self.prompt_command_sort(args)
+        elif command == "top":
+            self.prompt_command_top(args)
+        elif command == "search":
+            self.prompt_command_search(args)
+        elif command == "refresh":
+            self.run_query(self.query or self.pargs, fresh=True)
+        elif command == "watch":
+            self.prompt_command_watch(args)
         elif command in ('list', 'l'):
-            self.prompt_show_items()
+            self.prompt_show_items(args)
         elif command in ('help', 'h', '?'):
             self.prompt_usage()
         elif command in ('exit', 'q', 'quit'):
+            if self.refresher is not None:
+                self.refresher.stop()
             return False
         else:
             if not command.split()[0] in COMMANDS:
@@ -137,20 +296,25 @@ class Shell(object):
 
     def shell(self, items, pargs):
         self.pargs = pargs
-        self.items = items
+        # Indexed once for the result set, not on every prompt.
+        self.load(items)
         stdout.write(
             '\n')  # When the fetching messege ends need to add \n after \r.
         self.prompt_show_items()
         history = InMemoryHistory()
+        if self.watch and self.searcher is not None:
+            self.prompt_command_watch(str(self.watch))
 
         session = PromptSession() if PROMPT_TOOLKIT_V2 else None
         while True:
             kwargs = dict(
                 history=history,
                 auto_suggest=AutoSuggestFromHistory(),
-                completer=WGCompleter(list(self.items.keys())),
+                completer=self.completer,
                 style=tget_prompt_style
             )
+            if self.refresher is not None:
+                kwargs.update(bottom_toolbar=self.toolbar, refresh_interval=1.0)
             try:
                 p = prompt(u'tget > ', **kwargs)
             except TypeError as e:
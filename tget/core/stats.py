@@ -0,0 +1,300 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Per-target and per-request timings, enabled with --stats or by setting
+Module.stats = Stats() from the library.
+"""
+
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# CPU time of the running thread: time spent parsing, not waiting on the network.
+thread_time = getattr(time, "thread_time", time.process_time)
+
+# Request phases in seconds, in the order they happen.
+PHASES = ("dns", "connect", "tls", "ttfb", "download", "decode", "parse")
+
+
+class RequestRecord(object):
+    """RequestRecord: what one Module.http_get_request call did.
+
+    cache - 'memory' (response cache), 'store' (fresh page store copy),
+      '304' (not modified), None when the page was downloaded.
+    attempts - GET requests sent, more than 1 when a challenge was retried.
+    """
+
+    def __init__(self, url, target):
+        self.url = url
+        self.target = target
+        self.start = time.perf_counter()
+        self.total = 0.0
+        self.status = None
+        self.bytes = 0
+        self.cache = None
+        self.attempts = 0
+        self.error = None
+        self.empty = False
+        for phase in PHASES:
+            setattr(self, phase, 0.0)
+
+    def as_dict(self):
+        """as_dict: the record, times in ms."""
+        data = {key: getattr(self, key) for key in (
+            "url", "target", "status", "bytes", "cache", "attempts", "error", "empty")}
+        data["total"] = 1000 * self.total
+        data.update({phase: 1000 * getattr(self, phase) for phase in PHASES})
+        return data
+
+
+class TargetRecord(object):
+    """TargetRecord: one module run."""
+
+    def __init__(self, target):
+        self.target = target
+        self.start = time.perf_counter()
+        self.wall = 0.0
+        self.items = 0
+        self.error = None
+
+
+class Stats(object):
+    """Stats: collect RequestRecord and TargetRecord of a run, thread safe.
+
+    A request belongs to the target whose module runs in the thread (see
+    target() and bind()). Its parse time is the CPU time the thread spends
+    after the request returned, until its next request or the end of the
+    module run / detail page.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.requests = list()
+        # targets - last run of every target, runs - every run (--batch runs each many times).
+        self.targets = dict()
+        self.runs = list()
+
+    def current(self):
+        """current: record of the request running in this thread, None if none."""
+        return getattr(self.local, "record", None)
+
+    def flush(self):
+        """flush: charge the CPU time since the last request of the thread to it."""
+        pending = getattr(self.local, "pending", None)
+        if pending is not None:
+            record, cpu = pending
+            record.parse += thread_time() - cpu
+            self.local.pending = None
+
+    @contextmanager
+    def request(self, url):
+        """request: record the request of @url made inside the with block."""
+        self.flush()
+        record = RequestRecord(url, getattr(self.local, "target", None))
+        self.local.record = record
+        try:
+            yield record
+        except Exception as err:
+            record.error = type(err).__name__
+            raise
+        finally:
+            record.total = time.perf_counter() - record.start
+            self.local.record = None
+            self.local.pending = (record, thread_time())
+            with self.lock:
+                self.requests.append(record)
+
+    def note(self, **fields):
+        """note: set @fields on the record of the running request."""
+        record = self.current()
+        if record is not None:
+            for key, value in fields.items():
+                setattr(record, key, value)
+
+    def add(self, **fields):
+        """add: add @fields to the record of the running request."""
+        record = self.current()
+        if record is not None:
+            for key, value in fields.items():
+                setattr(record, key, getattr(record, key) + value)
+
+    @contextmanager
+    def target(self, target):
+        """target: the requests made in the with block belong to @target."""
+        record = TargetRecord(target)
+        self.local.target = target
+        try:
+            yield record
+        except Exception as err:
+            record.error = type(err).__name__
+            raise
+        finally:
+            self.flush()
+            self.local.target = None
+            record.wall = time.perf_counter() - record.start
+            with self.lock:
+                self.targets[target] = record
+                self.runs.append(record)
+
+    def bind(self, fn):
+        """bind: @fn for a worker thread, its requests belong to the current target."""
+        target = getattr(self.local, "target", None)
+
+        def run(*args, **kwargs):
+            self.local.target = target
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.flush()
+                self.local.target = None
+
+        return run
+
+    def summary(self):
+        """summary: totals per target, times in ms.
+        @return: {target: {...}}, requests of no target under None.
+        """
+        with self.lock:
+            requests = list(self.requests)
+            targets = dict(self.targets)
+        summary = dict()
+        for name in list(targets) + [r.target for r in requests]:
+            if name in summary:
+                continue
+            summary[name] = dict(requests=0, failed=0, cached=0, attempts=0, bytes=0,
+                                 items=0, wall=0.0, slowest=None,
+                                 **{phase: 0.0 for phase in PHASES})
+        for record in requests:
+            total = summary[record.target]
+            total["requests"] += 1
+            total["attempts"] += record.attempts
+            total["bytes"] += record.bytes
+            total["cached"] += 1 if record.cache else 0
+            total["failed"] += 1 if record.error or record.empty else 0
+            for phase in PHASES:
+                total[phase] += 1000 * getattr(record, phase)
+            if total["slowest"] is None or record.total * 1000 > total["slowest"]["ms"]:
+                phase = max(PHASES, key=lambda phase: getattr(record, phase))
+                total["slowest"] = {"url": record.url, "ms": 1000 * record.total,
+                                    "phase": phase}
+        for name, record in targets.items():
+            summary[name]["items"] = record.items
+            summary[name]["wall"] = 1000 * record.wall
+            summary[name]["error"] = record.error
+        return summary
+
+    def as_dict(self):
+        """as_dict: summary and every request, for the JSON output (times in ms)."""
+        with self.lock:
+            requests = [record.as_dict() for record in self.requests]
+        summary = {str(name): value for name, value in self.summary().items()}
+        return {"targets": summary, "requests": requests}
+
+    def show(self, out=None):
+        """show: print the summary table to @out (stderr by default)."""
+        out = out or sys.stderr
+        columns = ("requests", "failed", "cached", "KB") + PHASES + ("items", "wall")
+        out.write("%-16s" % ("target") + "".join("%9s" % (c[:8]) for c in columns) + "\n")
+        summary = self.summary()
+        for name, total in summary.items():
+            values = [total["requests"], total["failed"], total["cached"],
+                      "%.1f" % (total["bytes"] / 1024)]
+            values += ["%.1f" % (total[phase]) for phase in PHASES]
+            values += [total["items"], "%.1f" % (total["wall"])]
+            out.write("%-16s" % (name or "-") + "".join("%9s" % (v) for v in values) + "\n")
+        out.write("(times in ms, summed over the requests of the target)\n")
+        for name, total in summary.items():
+            slowest = total["slowest"]
+            if slowest:
+                out.write("slowest %s: %.1fms, mostly %s, %s\n" % (
+                    name or "-", slowest["ms"], slowest["phase"], slowest["url"]))
+        out.flush()
+
+
+def timed_connection(base):
+    """timed_connection: urllib3 connection class noting DNS, connect and TLS time."""
+
+    class TimedConnection(base):
+        def _new_conn(self):
+            from tget.core.module import Module
+
+            stats = Module.stats
+            start = time.perf_counter()
+            if stats is not None:
+                # Resolve once to time DNS apart from the TCP handshake. urllib3
+                # resolves again (from the resolver cache) and still tries every
+                # address, IPv4 and IPv6.
+                try:
+                    socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+                except OSError:
+                    pass
+            resolved = time.perf_counter()
+            try:
+                return super()._new_conn()
+            finally:
+                if stats is not None:
+                    stats.add(dns=resolved - start, connect=time.perf_counter() - resolved)
+
+        def connect(self):
+            from tget.core.module import Module
+
+            stats = Module.stats
+            record = stats.current() if stats is not None else None
+            before = (record.dns + record.connect) if record else 0
+            start = time.perf_counter()
+            super().connect()
+            if record is not None and isinstance(self, HTTPSConnection):
+                spent = time.perf_counter() - start
+                record.tls += max(0.0, spent - (record.dns + record.connect - before))
+
+    return TimedConnection
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = timed_connection(HTTPConnection)
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = timed_connection(HTTPSConnection)
+
+
+class StatsAdapter(HTTPAdapter):
+    """StatsAdapter: HTTPAdapter whose connections note their DNS/connect/TLS time."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+def install(session, pool_size=16):
+    """install: time the connections of a requests @session."""
+    adapter = StatsAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
+def enable():
+    """enable: record every request of the modules from now on.
+
+    Requests sent through cloudscraper (1337x) keep its own adapter, they
+    get no DNS/connect/TLS split.
+    @return: the Stats, also in Module.stats, the running one if already enabled.
+    """
+    from tget.core.module import Module
+
+    if Module.stats is not None:
+        return Module.stats
+    Module.stats = Stats()
+    install(Module.session())
+    return Module.stats
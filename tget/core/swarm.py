@@ -0,0 +1,126 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Background refresh of the seeds/leeches of the shell results ('watch').
+"""
+
+import threading
+import time
+
+from tget.core.module import fresh_pages
+from tget.core.registry import accepts_budget, load_target
+from tget.core.scrape import Scraper, info_hash, update_items
+
+# Seconds between two refreshes of the same target, at least MIN_INTERVAL.
+DEFAULT_INTERVAL = 60
+MIN_INTERVAL = 15
+
+
+class SwarmRefresher(object):
+    """SwarmRefresher: thread re-polling the swarm numbers of the results.
+
+    Each target is refreshed from the UDP trackers of its magnets (a few
+    packets for all the results), or when some torrents have no tracker
+    answering, by running its query again with fresh pages: a single API
+    request for the_pirate_bay and yts, the listing and the detail pages
+    of its first --results entries for 1337x and limetorrents, which are
+    not always the shown results: the others keep their numbers. Targets
+    are refreshed one after the other, each one at most every @interval
+    seconds, and every request still goes through Module.rate_limiter and
+    Module.request_slots when they are set.
+
+    @source - source() -> (items, pargs): the shown items and their query.
+    @on_change - on_change(names) after seeds/leeches of @names changed,
+      called from the refresher thread.
+    @scrape - ask the trackers first, re-run the queries only when False.
+    """
+
+    def __init__(self, source, interval=DEFAULT_INTERVAL, on_change=None, scrape=True):
+        self.source = source
+        self.interval = max(MIN_INTERVAL, interval)
+        self.on_change = on_change
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last = dict()
+        self.scraper = Scraper() if scrape else None
+        # status - what the last refresh did, for the shell toolbar.
+        self.status = "swarm: waiting"
+        self.updated = 0
+
+    def targets(self, items):
+        return sorted({item.get("target") for item in items.values() if item.get("target")})
+
+    def due(self, items):
+        """due: the target refreshed the longest ago, None if none is due yet."""
+        now = time.monotonic()
+        never = float("-inf")
+        due = [(self.last.get(target, never), target) for target in self.targets(items)
+               if now - self.last.get(target, never) >= self.interval]
+        return min(due)[1] if due else None
+
+    def refresh(self, target, items, pargs):
+        """refresh: fetch the swarm of @target again and update @items in place.
+        @return: names of the changed items.
+        """
+        self.last[target] = time.monotonic()
+        if self.scraper is not None:
+            own = {name: item for name, item in items.items() if item.get("target") == target}
+            swarms = self.scraper.scrape(item.get("link") for item in own.values())
+            if all(info_hash(item.get("link")) in swarms for item in own.values()):
+                return update_items(own, swarms)
+        run = load_target(target)
+        pargs = dict(pargs, **{"--target": [target]})
+        with fresh_pages():
+            found = (run.main(pargs, budget=None) if accepts_budget(run.main)
+                     else run.main(pargs)) or dict()
+        changed = list()
+        for name, new in found.items():
+            item = items.get(name)
+            if item is None or item.get("target") != target:
+                continue
+            swarm = (new.get("seeds"), new.get("leeches"))
+            if swarm != (item.get("seeds"), item.get("leeches")):
+                item["seeds"], item["leeches"] = swarm
+                changed.append(name)
+        return changed
+
+    def step(self):
+        """step: refresh the target that is due, if any.
+        @return: the target, None when nothing was due.
+        """
+        items, pargs = self.source()
+        target = self.due(items or dict())
+        if target is None:
+            return None
+        try:
+            changed = self.refresh(target, items, pargs)
+        except Exception as err:
+            self.status = "swarm: %s failed (%s)" % (target, type(err).__name__)
+            return target
+        self.updated += len(changed)
+        self.status = "swarm: %s %d changed at %s" % (
+            target, len(changed), time.strftime("%H:%M:%S"))
+        if changed and self.on_change is not None:
+            self.on_change(changed)
+        return target
+
+    def run(self):
+        # Results were just fetched, wait a full interval before the first poll.
+        for target in self.targets(self.source()[0] or dict()):
+            self.last.setdefault(target, time.monotonic())
+        while not self.stop_event.wait(1.0):
+            self.step()
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="swarm-refresh", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive() and not self.stop_event.is_set()
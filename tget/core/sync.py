@@ -0,0 +1,159 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+import json
+import socket
+import time
+
+import requests
+from docopt import docopt
+
+from tget.core import concurrency
+from tget.core.index import TorrentIndex
+from tget.core.module import Module
+from tget.core.pages import PageStore
+from tget.core.ratelimit import RateLimiter
+from tget.core.registry import load_target
+from tget.core.utils import list_wg_modules, msg_error, msg_info
+
+__doc__ = """Usage: tget sync [options]
+
+Crawl the top lists of the targets into the local index.
+
+Options:
+  -t --target=<target>  Targets to crawl or 'all' [default: all].
+  -i --interval=<sec>   Crawl a target again after <sec> seconds [default: 3600].
+  -r --rate=<n>         Requests per minute to one host [default: 30].
+  -n --results=<n>      Detail pages to fetch per top list [default: 10].
+  -1 --once             Crawl the targets that are due once and exit.
+  -h --help             Help message.
+"""
+
+# Pages fetched during one crawl are reused without a new request.
+CRAWL_MAX_AGE = 300
+# Seconds before a failed crawl is tried again, doubled on every failure in a
+# row up to the interval.
+RETRY_DELAY = 60
+
+
+class Sync(object):
+    """Sync: keep the top lists of the targets in the local index.
+
+    A target is due when its list was last seen more than @interval
+    seconds ago. The list page is requested first, conditionally; when it
+    did not change the stored list is only marked as seen, otherwise the
+    module runs and the index is updated. A target whose crawl failed waits
+    RETRY_DELAY seconds, twice as long after every failure in a row.
+    """
+
+    def __init__(self, targets, interval, results, index=None):
+        self.targets = targets
+        self.interval = interval
+        self.results = results
+        self.index = index or TorrentIndex()
+        # failures - {target: (failed crawls in a row, time of the last one)}.
+        self.failures = dict()
+
+    def retry_delay(self, failed):
+        """retry_delay: seconds to wait after @failed crawls in a row."""
+        return min(self.interval, RETRY_DELAY * 2 ** (failed - 1))
+
+    def due(self, target, now=None):
+        """due: seconds until @target has to be crawled, 0 if it is due."""
+        now = now or time.time()
+        wait = 0
+        seen = self.index.list_seen(target)
+        if seen is not None:
+            wait = seen + self.interval - now
+        if target in self.failures:
+            failed, failed_at = self.failures[target]
+            wait = max(wait, failed_at + self.retry_delay(failed) - now)
+        return max(0, wait)
+
+    def list_changed(self, run):
+        """list_changed: fetch the top list page of a module.
+        @return: True/False, None if no list page could be fetched.
+        """
+        if not hasattr(run, "list_urls"):
+            return True
+        module = Module()
+        for url in run.list_urls():
+            try:
+                if module.http_get_request(url):
+                    return Module.page_store.changed.get(url, False)
+            except (requests.exceptions.RequestException, socket.error):
+                continue
+        return None
+
+    def crawl(self, target):
+        """crawl: update the top list of @target in the index, or note the
+        failure for the next retry.
+        @return: True when the top list was seen.
+        """
+        if self.fetch_list(target):
+            self.failures.pop(target, None)
+            return True
+        failed = self.failures.get(target, (0, None))[0] + 1
+        self.failures[target] = (failed, time.time())
+        msg_info("%s: next try in %ds" % (target, self.retry_delay(failed)))
+        return False
+
+    def fetch_list(self, target):
+        """fetch_list: crawl() without the failure count.
+        @return: True when the top list was seen.
+        """
+        run = load_target(target)
+        changed = self.list_changed(run)
+        if changed is None:
+            msg_error("%s: top list not available" % (target), False)
+            return False
+        if not changed and self.index.list_seen(target) is not None:
+            self.index.touch_list(target)
+            msg_info("%s: top list not changed" % (target))
+            return True
+        try:
+            items = run.main({"--list": True, "--results": [str(self.results)]})
+        except (IndexError, json.decoder.JSONDecodeError,
+                requests.exceptions.RequestException, socket.error) as err:
+            msg_error("Module: '%s.py' %s: %s!" % (target, type(err).__name__, err), False)
+            return False
+        if not items:
+            msg_error("%s: no results" % (target), False)
+            return False
+        for name in items:
+            items[name]["target"] = target
+        self.index.add(items)
+        self.index.set_list(target, items)
+        msg_info("%s: %d torrents" % (target, len(items)))
+        return True
+
+    def run_once(self):
+        """run_once: crawl the due targets.
+        @return: seconds until the next target is due, None without targets.
+        """
+        for target in self.targets:
+            if not self.due(target):
+                self.crawl(target)
+        return min((self.due(target) for target in self.targets), default=None)
+
+
+def main(argv=None):
+    args = docopt(__doc__, argv=argv)
+    targets = [target for target in args["--target"].split(",") if target]
+    if targets == ["all"]:
+        targets = list_wg_modules()
+    if not targets:
+        msg_error("no target to crawl.", True)
+
+    Module.page_store = PageStore(max_age=CRAWL_MAX_AGE)
+    Module.rate_limiter = RateLimiter(int(args["--rate"]))
+    concurrency.enable()
+    sync = Sync(targets, int(args["--interval"]), int(args["--results"]))
+    while True:
+        wait = sync.run_once()
+        concurrency.save()
+        if args["--once"] or wait is None:
+            break
+        time.sleep(max(1, wait))
@@ -4,21 +4,18 @@ See the file 'LICENSE' for copying.
 """
 
 import collections
-import configparser
 import itertools
-import json
 import logging
 import re
-import socket
 from collections import OrderedDict
-from importlib import import_module
-from json import dumps
 from sys import exit
-from urllib.error import HTTPError, URLError
-
-import requests
-from docopt import docopt
 
+# XXX: requests, docopt, json, sqlite3, ... are imported where they are
+# used, so -v/-G and the links/JSON outputs don't pay for them at startup.
+from tget.core.budget import ResultBudget
+from tget.core.profiling import stage
+from tget.core.registry import accepts_budget
+from tget.core.registry import load_target as registry_load_target
 from tget.core.utils import (
     format_help,
     list_wg_modules,
@@ -29,6 +26,11 @@ from tget.core.utils import (
 )
 
 __version__ = "1.1.5"
+# Pages fetched by the searches of the shell are reused for this long.
+SHELL_CACHE_TTL = 300
+# Seconds the targets get to hand in what they found once they are stopped
+# (--deadline, Ctrl-C), the unfinished ones are left behind.
+STOP_GRACE = 0.5
 __doc__ = """Usage: tget [options]...
 
 Options:
@@ -43,9 +45,24 @@ Options:
   -S --sort-type=<type> Sort torrents by name/seeds [default: seeds].
   -c --config=<file>    Load config file.
   -w --sfw              Restrict results to safe for work content (the_pirate_bay only)
+  -o --offline          Search the local index only, without network access.
+  -O --local-first      Show results from the local index first, then merge live results.
+  -b --batch=<file>     Search every line of <file> ('-' for stdin), output NDJSON.
+  -j --jobs=<n>         Maximum number of requests in flight.
+  -r --rate=<n>         Maximum number of requests per minute to one host.
+  -T --stats            Print time spent per target and request phase.
+  -P --profile=<kind>   Profile every target, request and stage: cpu or mem.
+  -D --profile-dir=<d>  Directory of the --profile output, ./tget-profile by default.
+  -M --metrics=<file>   Write Prometheus metrics of the run to <file> ('-' for stdout).
+  -A --metrics-add=<f>  Add the metrics of the run to the cumulative file <f>.
+  -e --format=<fmt>     Output results as json, ndjson, csv or msgpack.
+  -F --fields=<list>    Output only these fields, e.g. name,seeds,link.
+  -U --scrape           Update seeds/leeches from the UDP trackers of the magnets.
+  -C --cluster          Show one torrent per group of near-duplicate releases.
+  -d --deadline=<sec>   Stop after <sec> seconds with the results found so far.
 
 Video options:
-  -q --quality=<q>      Try to match quality for the torrent (720p,1080p, ...).
+  -q --quality=<q>      Only torrents of this quality (720p,1080p, x265, WEB-DL, ...).
   -g --genre=<g>        Try to select video genre for the torrent (action, comedy, etc..).
 
 General options:
@@ -63,11 +80,37 @@ class WGSelect(object):
         self.targets = list()
         self.items = dict()
         self.results_type = None
+        # output_format: --format of the results, json for -J.
+        self.output_format = None
+        self.fields = None
         self.results = None
         self.filter = None
         self.quality = None
-        self.parse_args()
+        self.deadline = None
+        # partial: why the results are incomplete, 'deadline' or 'interrupted'.
+        self.partial = None
+        self.unfinished = list()
         self.sort_type = None
+        self.offline = False
+        self.local_first = False
+        self.index = None
+        self.shown_links = set()
+        # quiet: no messages on stdout (batch mode writes NDJSON there).
+        self.quiet = False
+        self.parse_args()
+        # --cluster: the --results best groups, not items. The modules and the
+        # budget get no limit, items of a group would take the places of others.
+        self.module_pargs = self.pargs
+        self.fetch_limit = self.results
+        if "--cluster" in self.pargs:
+            self.module_pargs = {arg: value for arg, value in self.pargs.items()
+                                 if arg != "--results"}
+            self.fetch_limit = None
+        self.budget = ResultBudget(
+            self.fetch_limit, self.sort_type,
+            self.filter_pattern(self.filter) if self.filter else None,
+            self.quality, self.deadline
+        )
 
     def parse_args(self):
         for arg in self.pargs:
@@ -75,17 +118,31 @@ class WGSelect(object):
                 self.filter = self.pargs[arg][0]
             elif arg == "--quality":
                 self.quality = self.pargs[arg][0]
+            elif arg == "--deadline":
+                self.deadline = float(self.pargs[arg][0])
             elif arg == "--results":
                 self.results = int(self.pargs[arg][0])
             elif arg == "--target":
                 self.targets = self.pargs[arg][0].split(",")
             elif arg == "--links":
                 self.results_type = "L"
-            elif arg == "--json":
+            elif arg == "--json" and "--format" not in self.pargs:
                 self.results_type = "J"
-            elif arg == "--sort":
+                self.output_format = "json"
+            elif arg == "--format":
+                self.results_type = "F"
+                self.output_format = self.pargs[arg][0]
+            elif arg == "--fields":
+                from tget.core.output import parse_fields
+                self.fields = parse_fields(self.pargs[arg][0])
+            elif arg == "--sort-type":
                 self.sort_type = self.pargs[arg][0]
+            elif arg == "--offline":
+                self.offline = True
+            elif arg == "--local-first":
+                self.local_first = True
             elif arg == "--config":
+                import configparser
                 self.config = configparser.ConfigParser()
                 config_file = self.pargs[arg][0]
                 with open(config_file) as f:
@@ -116,23 +173,26 @@ class WGSelect(object):
             nitems = items
         return nitems
 
-    def filter_items(self, fx):
-        """filter_items: match text or regex in the torrent name."""
-        import os
-        debug = os.environ.get('TGET_DEBUG', '').lower() in ('1', 'true', 'yes')
-        nitems = dict()
+    @staticmethod
+    def filter_pattern(fx):
+        """filter_pattern: compile --filter, as regex or as plain text."""
         # Try to compile the regex pattern, fallback to case-insensitive search if it fails
         try:
             # Try as regex first
-            pattern = re.compile(fx, re.IGNORECASE)
-            if debug:
-                print(f"[DEBUG] Filter pattern (regex): {fx}")
+            return re.compile(fx, re.IGNORECASE)
         except re.error:
             # If not valid regex, treat as plain text search (case-insensitive)
-            pattern = re.compile(re.escape(fx), re.IGNORECASE)
-            if debug:
-                print(f"[DEBUG] Filter pattern (text): {fx}")
-        
+            return re.compile(re.escape(fx), re.IGNORECASE)
+
+    def filter_items(self, fx):
+        """filter_items: match text or regex in the torrent name."""
+        import os
+        debug = os.environ.get('TGET_DEBUG', '').lower() in ('1', 'true', 'yes')
+        nitems = dict()
+        pattern = self.filter_pattern(fx)
+        if debug:
+            print(f"[DEBUG] Filter pattern: {pattern.pattern}")
+
         for item in self.items:
             if pattern.search(item):
                 nitems.update({item: self.items[item]})
@@ -143,6 +203,20 @@ class WGSelect(object):
             print(f"[DEBUG] Filter '{fx}': {len(nitems)}/{len(self.items)} items matched")
         return nitems
 
+    def quality_items(self, quality):
+        """quality_items: the items of --quality, from their parsed names (any target)."""
+        from tget.core.release import matches
+
+        return {name: item for name, item in self.items.items() if matches(name, quality)}
+
+    def cluster_items(self, items):
+        """cluster_items: one item per group of near-duplicate releases (--cluster),
+        the others under its 'duplicates'.
+        """
+        from tget.core.cluster import cluster_items
+
+        return cluster_items(items)
+
     def add_items_label(self, target, items):
         """add_items_label - add label of the target to the torrent name.
         @target
@@ -170,89 +244,336 @@ class WGSelect(object):
     def sort_items_by_name(self, items):
         return collections.OrderedDict(sorted(items.items()))
 
-    def run(self, api_mode=False):
-        items = dict()
+    def load_target(self, target):
+        """load_target: import the module of @target, None on failure."""
+        try:
+            return registry_load_target(target)
+        except ImportError:
+            msg_info("Cannot find target '%s'." % (target))
+            msg_err_trace(True)
+        except Exception:
+            msg_info("Module: '%s.py' stopped!" % (target))
+            msg_err_trace(True)
+        return None
+
+    def call_main(self, run, target=None):
+        with stage("target", target):
+            if accepts_budget(run.main):
+                return run.main(self.module_pargs, budget=self.budget)
+            # Third-party modules with the plain main(pargs).
+            return run.main(self.module_pargs)
+
+    def run_target(self, target, run):
+        """run_target: run the module of @target with the shared budget.
+        @return: labeled items with the best trackers in their magnets, empty
+          dict when the module failed.
+        """
+        import json
+        import socket
+        from urllib.error import HTTPError, URLError
 
+        import requests
+
+        from tget.core.module import Module, request_deadline
+        from tget.core.trackers import add_to_items
+
+        stats = Module.stats
+        try:
+            with request_deadline(self.budget.deadline):
+                if stats is None:
+                    items = self.call_main(run, target)
+                else:
+                    with stats.target(target) as record:
+                        items = self.call_main(run, target)
+                        record.items = len(items or ())
+            # The best trackers go into the magnets of every module.
+            return add_to_items(self.add_items_label(target, items))
+        except (IndexError, HTTPError, URLError, json.decoder.JSONDecodeError,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.RequestException,
+                requests.exceptions.Timeout,
+                socket.gaierror,
+                socket.error) as err:
+            if not self.quiet:
+                msg_error("Module: '%s.py' %s: %s!" % (target, type(err).__name__, err), False)
+        return dict()
+
+    def expand_targets(self):
+        """expand_targets: replace 'all' with the list of targets."""
         if self.targets[0] == "all":
             self.targets.pop()
             self.targets = list_wg_modules()
 
+    def open_index(self):
+        """open_index: open the local torrent index, None if it is unusable."""
+        if self.index is None:
+            import sqlite3
+
+            from tget.core.index import TorrentIndex
+            try:
+                self.index = TorrentIndex()
+            except (OSError, sqlite3.Error) as err:
+                logging.error("Cannot open local index: {}".format(err))
+                self.index = False
+        return self.index
+
+    def local_items(self):
+        """local_items: answer the query from the local index."""
+        index = self.open_index()
+        if not index:
+            return dict()
+        if "--search" in self.pargs:
+            return index.search(self.pargs["--search"][0], self.targets)
+        # Top lists stored by 'tget sync', best seeded torrents otherwise.
+        return (index.listed(self.targets, self.fetch_limit)
+                or index.top(self.targets, self.fetch_limit))
+
+    def store_items(self, target, items):
+        """store_items: add items fetched from @target to the local index."""
+        import sqlite3
+
+        index = self.open_index()
+        if not index or not items:
+            return
+        try:
+            index.add(items)
+            if "--list" in self.pargs:
+                index.set_list(target, items)
+        except sqlite3.Error as err:
+            logging.error("Cannot update local index: {}".format(err))
+
+    def run_targets(self, api_mode=False, timeout=None):
+        """run_targets: run all targets at the same time.
+
+        Yield (target, items) as soon as a target is done. Finished items
+        raise the budget floor, so slower targets skip detail pages that
+        can't make it into the --results cut.
+
+        When the --deadline passes or on Ctrl-C the targets are stopped:
+        they get STOP_GRACE seconds to return the items found so far, and
+        self.partial tells why the results are incomplete.
+        @timeout - seconds to wait for all targets, raise
+          concurrent.futures.TimeoutError and cancel the rest when exceeded.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+        self.expand_targets()
+        modules = list()
         for target in self.targets:
             if not self.results_type and not api_mode:
                 msg_fetching(target)
-            path = "tget.modules.%s" % (target)
-            run = None
-            try:
-                run = import_module(path)
-            except ImportError:
-                msg_info("Cannot find target '%s'." % (target))
-                msg_err_trace(True)
-            except Exception:
-                msg_info("Module: '%s.py' stopped!" % (target))
-                msg_err_trace(True)
-            if not run:
-                continue
-            try:
-                items = run.main(self.pargs)
-                items = self.add_items_label(target, items)
-                if items:
-                    import os
-                    debug = os.environ.get('TGET_DEBUG', '').lower() in ('1', 'true', 'yes')
-                    if debug:
-                        print(f"[DEBUG] Module '{target}' returned {len(items)} items")
-                    self.items.update(items)
-                else:
-                    msg_error(" '%s' - no results" % (target), False)
-                    continue
-            except (IndexError, HTTPError, URLError, json.decoder.JSONDecodeError,
-                    requests.exceptions.ConnectionError,
-                    requests.exceptions.RequestException,
-                    requests.exceptions.Timeout,
-                    socket.gaierror,
-                    socket.error) as err:
-                msg_error("Module: '%s.py' %s: %s!" % (target, type(err).__name__, err), False)
+            run = self.load_target(target)
+            if run:
+                modules.append((target, run))
+        if not modules:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=len(modules))
+        futures = {
+            executor.submit(self.run_target, target, run): target for target, run in modules
+        }
+        pending = dict(futures)
+        wait = timeout if self.budget.deadline is None else self.budget.remaining()
+        try:
+            while pending:
+                try:
+                    for future in as_completed(list(pending), timeout=wait):
+                        items = future.result()
+                        self.budget.offer(items)
+                        yield pending.pop(future), items
+                except FuturesTimeoutError:
+                    if self.partial is not None:
+                        break
+                    if self.budget.deadline is None:
+                        raise
+                    self.stop_targets("deadline")
+                except KeyboardInterrupt:
+                    if self.partial is not None:
+                        raise
+                    self.stop_targets("interrupted")
+                wait = STOP_GRACE
+            self.unfinished = sorted(pending.values())
+        finally:
+            if not all(future.done() for future in futures):
+                self.budget.cancel()
+            executor.shutdown(wait=False)
+
+    def stop_targets(self, reason):
+        """stop_targets: cancel the outstanding work of the targets, @reason
+        ('deadline', 'interrupted') is kept in self.partial.
+        """
+        self.partial = reason
+        self.budget.cancel()
+
+    def scrape_items(self):
+        """scrape_items: fresh seeds/leeches of self.items from their trackers (--scrape)."""
+        from tget.core.scrape import scrape_items
+
+        changed = scrape_items(self.items, deadline=self.budget.deadline)
+        if self.budget.expired and self.partial is None:
+            # Cut by --deadline: some seeds/leeches are the ones of the sites.
+            self.partial = "deadline"
+        if not self.quiet and not self.results_type:
+            msg_info("scrape: %d/%d torrents updated" % (len(changed), len(self.items)))
+
+    def show_links(self, items, skip=()):
+        """show_links: print the link of @items, except the links in @skip.
+        @return: the printed links.
+        """
+        links = [items[item]["link"] for item in items if items[item]["link"] not in skip]
+        [print(link) for link in links]
+        return links
 
-        """Sort self.items"""
+    def run(self, api_mode=False):
         import os
         debug = os.environ.get('TGET_DEBUG', '').lower() in ('1', 'true', 'yes')
+        self.expand_targets()
+        if self.offline or self.local_first:
+            self.items.update(self.local_items())
+            if debug:
+                print(f"[DEBUG] Local index returned {len(self.items)} items")
+            if self.local_first and self.results_type == "L" and not api_mode:
+                # Links can be printed now, live results only add new ones.
+                local = self.filter_items(self.filter) if self.filter else self.items
+                if self.results:
+                    local = self.cut_items(local, self.results)
+                self.shown_links.update(self.show_links(local))
+        if self.offline:
+            if not self.items and not self.quiet:
+                msg_error(" local index - no results", False)
+        else:
+            try:
+                for target, items in self.run_targets(api_mode):
+                    if items:
+                        if debug:
+                            print(f"[DEBUG] Module '{target}' returned {len(items)} items")
+                        self.store_items(target, items)
+                        self.items.update(items)
+                    elif not self.quiet:
+                        msg_error(" '%s' - no results" % (target), False)
+            except KeyboardInterrupt:
+                # Ctrl-C out of the stopped targets: show what was found.
+                self.stop_targets("interrupted")
+
+        """Sort self.items"""
         if debug:
             print(f"[DEBUG] Total items before filtering/sorting: {len(self.items)}")
         if self.filter:
-            self.items = self.filter_items(self.filter)
+            with stage("filter"):
+                self.items = self.filter_items(self.filter)
             if debug:
                 print(f"[DEBUG] Items after filter '{self.filter}': {len(self.items)}")
-        if self.sort_type == "name":
-            self.items = self.sort_items_by_name(self.items)
-        else:
-            self.items = self.sort_items_by_seeds(self.items)
+        if self.quality:
+            with stage("filter"):
+                self.items = self.quality_items(self.quality)
+            if debug:
+                print(f"[DEBUG] Items of quality '{self.quality}': {len(self.items)}")
+        if "--scrape" in self.pargs and not self.offline and not self.budget.expired:
+            with stage("scrape"):
+                self.scrape_items()
+        with stage("sort"):
+            if self.sort_type == "name":
+                self.items = self.sort_items_by_name(self.items)
+            else:
+                self.items = self.sort_items_by_seeds(self.items)
+        if "--cluster" in self.pargs:
+            # After the sort: the first release of a group stands for it.
+            with stage("cluster"):
+                self.items = self.cluster_items(self.items)
+            if debug:
+                print(f"[DEBUG] Groups of near-duplicates: {len(self.items)}")
         # items cut must at the end of item processing.
         if self.results:
             if debug:
                 print(f"[DEBUG] Cutting results to {self.results} items")
-            self.items = self.cut_items(self.items, self.results)
+            with stage("cut"):
+                self.items = self.cut_items(self.items, self.results)
         if debug:
             print(f"[DEBUG] Final items to display: {len(self.items)}")
+        if api_mode:
+            return self.items
+        with stage("render"):
+            return self.render(api_mode)
+
+    def search_items(self, pargs, fresh=False):
+        """search_items: results of @pargs for the shell 'search' and 'refresh'.
 
+        The query runs in this process: the HTTP sessions, Cloudflare
+        clearances and modules of the first run stay warm, and fetched pages
+        are kept SHELL_CACHE_TTL seconds. @fresh drops the cached pages first.
+        """
+        from tget.core.cache import TTLCache
+        from tget.core.module import Module
+
+        if Module.response_cache is None:
+            Module.response_cache = TTLCache(SHELL_CACHE_TTL, maxsize=1024)
+        elif fresh:
+            Module.response_cache.clear()
+        sel = WGSelect(pargs)
+        sel.quiet = True
+        return sel.run(api_mode=True)
+
+    def show_partial(self):
+        """show_partial: tell on stderr that the results are incomplete."""
+        import sys
+
+        text = "# partial results (%s)" % ("deadline of %gs passed" % (self.deadline)
+                                           if self.partial == "deadline" else "interrupted")
+        if self.unfinished:
+            text += ", unfinished: %s" % (", ".join(self.unfinished))
+        print(text, file=sys.stderr)
+
+    def render(self, api_mode=False):
+        """render: show self.items, or return them in api_mode."""
         if api_mode:
             return self.items
-        elif self.results_type == "J":
-            print(dumps(self.items, indent=2, sort_keys=True))
-        elif self.results_type == "L":
-            [print(self.items[item]["link"]) for item in self.items]
+        stats = None
+        if "--stats" in self.pargs:
+            # XXX: only here, tget.core.module imports requests.
+            from tget.core.module import Module
+            stats = Module.stats
+        if self.partial is not None:
+            self.show_partial()
+        if self.results_type in ("J", "F"):
+            from tget.core import output
+            # -J keeps its indented layout, --format json is compact.
+            extra = dict()
+            if stats is not None and self.output_format == "json":
+                extra["stats"] = stats.as_dict()
+            elif stats is not None:
+                stats.show()
+            if self.partial is not None and self.output_format == "json":
+                extra["partial"] = {"reason": self.partial, "unfinished": self.unfinished}
+            output.write(output.encode(self.items, self.output_format, self.fields,
+                                       indent=self.results_type == "J", extra=extra or None))
+            return
+        if stats is not None:
+            stats.show()
+        if self.results_type == "L":
+            self.show_links(self.items, self.shown_links)
         else:
-            # XXX: import tget.core.shell is here for optimization.
-            # tget will load 50% faster!
+            # XXX: import tget.core.shell is here for optimization, it costs
+            # more than the rest of tget (benchmarks/startup.py).
             from tget.core.shell import Shell
 
             self.shell = Shell()
-            if hasattr(self, "config") and self.config["item_color"]:
-                self.shell.item_color.update(self.config["item_color"])
+            self.shell.searcher = self.search_items
+            config = getattr(self, "config", None)
+            if config is not None and config.has_section("item_color"):
+                self.shell.item_color = dict(config["item_color"])
+            if config is not None and config.has_section("shell"):
+                self.shell.fuzzy = config["shell"].getboolean("fuzzy_completion", False)
+                self.shell.watch = config["shell"].getint("watch", 0)
             self.shell.shell(self.items, self.pargs)
 
 
 class WG(object):
     """Main module"""
 
+    # profiler - hook of --profile, None when not profiling.
+    profiler = None
+
     def __init__(self):
         self.arguments = None
         self.parguments = dict()
@@ -270,6 +591,8 @@ class WG(object):
         return parg
 
     def parse_arguments(self, argv=None):
+        from docopt import docopt
+
         if argv:
             self.arguments = docopt(__doc__, argv=argv)
         else:
@@ -285,15 +608,127 @@ class WG(object):
         elif "--get-list" in self.parguments:
             [print(module) for module in list_wg_modules()]
             exit(0)
-        elif "--list" in self.parguments or "--search" in self.parguments:
+        elif ("--list" in self.parguments or "--search" in self.parguments
+              or "--batch" in self.parguments):
             if "--target" in self.parguments:
                 self.tget_run = 1
         if self.tget_run != 1:
             format_help(__doc__, "Use --search/--list with --target.")
             exit(1)
+        if "--quality" in self.parguments:
+            from tget.core.release import wanted
+
+            try:
+                wanted(self.parguments["--quality"][0])
+            except ValueError as err:
+                format_help(__doc__, "Use --quality with a resolution, source, codec or "
+                            "word: %s." % (err))
+                exit(1)
+        if "--deadline" in self.parguments:
+            try:
+                if float(self.parguments["--deadline"][0]) <= 0:
+                    raise ValueError
+            except ValueError:
+                format_help(__doc__, "Use --deadline with a number of seconds.")
+                exit(1)
+        if "--format" in self.parguments:
+            from tget.core.output import FORMATS
+
+            if self.parguments["--format"][0] not in FORMATS:
+                format_help(__doc__, "Use --format with %s." % (", ".join(FORMATS)))
+                exit(1)
+
+    def set_limits(self):
+        """set_limits: apply --jobs, --rate, --stats, --metrics and --profile to the
+        process, with the per host limits learned by the last runs.
+        """
+        from tget.core import concurrency
+        concurrency.enable()
+        if "--jobs" in self.parguments:
+            import threading
+            from tget.core.module import Module
+            Module.request_slots = threading.BoundedSemaphore(int(self.parguments["--jobs"][0]))
+        if "--rate" in self.parguments:
+            from tget.core.module import Module
+            from tget.core.ratelimit import RateLimiter
+            Module.rate_limiter = RateLimiter(int(self.parguments["--rate"][0]))
+        if self.measured():
+            from tget.core.stats import enable
+            enable()
+        if "--profile" in self.parguments:
+            from tget.core import profiling
+            kind = self.parguments["--profile"][0]
+            if kind not in profiling.KINDS:
+                format_help(__doc__, "Use --profile with %s." % (" or ".join(profiling.KINDS)))
+                exit(1)
+            self.profiler = profiling.enable(kind)
+
+    def start_batch(self):
+        """start_batch: run the queries of --batch, write NDJSON to stdout."""
+        import sys
+        from tget.core.batch import Batch
+
+        path = self.parguments["--batch"][0]
+        workers = int(self.parguments["--jobs"][0]) if "--jobs" in self.parguments else None
+        batch = Batch(self.parguments, workers)
+        if path == "-":
+            return batch.run(sys.stdin)
+        with open(path) as f:
+            return batch.run(f)
+
+    def measured(self):
+        """measured: the requests of this process are recorded (--stats, --metrics*)."""
+        return any(arg in self.parguments for arg in ("--stats", "--metrics", "--metrics-add"))
 
     def start(self, api_mode=False):
+        self.set_limits()
+        try:
+            return self.run(api_mode)
+        finally:
+            from tget.core import concurrency
+            concurrency.save()
+            if self.profiler is not None:
+                self.write_profiles()
+            if "--metrics" in self.parguments or "--metrics-add" in self.parguments:
+                self.write_metrics()
+
+    def write_metrics(self):
+        """write_metrics: export the metrics of the run (--metrics, --metrics-add)."""
+        from tget.core import metrics
+        from tget.core.module import Module
+
+        run = metrics.Metrics().add_stats(Module.stats)
+        if "--metrics" in self.parguments:
+            metrics.write(run, self.parguments["--metrics"][0])
+        if "--metrics-add" in self.parguments:
+            metrics.store(run, self.parguments["--metrics-add"][0])
+
+    def write_profiles(self):
+        """write_profiles: write the profiles of --profile to --profile-dir."""
+        import sys
+        from tget.core.profiling import finish
+
+        directory = (self.parguments.get("--profile-dir") or ["tget-profile"])[0]
+        paths = finish(self.profiler, directory)
+        self.profiler = None
+        print("profiles: %d files in %s" % (len(paths), directory), file=sys.stderr)
+
+    def run(self, api_mode=False):
+        if "--batch" in self.parguments:
+            return self.start_batch()
         sel = WGSelect(self.parguments)
+        # A running 'tget serve' daemon answers with warm sessions and caches,
+        # --stats, --metrics and --profile measure the requests of this process.
+        from tget.core.client import daemon_query
+        local = self.measured() or "--profile" in self.parguments
+        data = None if local else daemon_query(self.parguments)
+        if data is not None:
+            sel.items = data["items"]
+            partial = data.get("partial")
+            if partial is not None:
+                sel.partial = partial["reason"]
+                sel.unfinished = partial["unfinished"]
+            return sel.render(api_mode)
         if api_mode:
             return sel.run(api_mode)
         sel.run()
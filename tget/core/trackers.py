@@ -0,0 +1,244 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Trackers added to the magnets of every module. The candidate trackers are
+probed with a connect handshake (BEP 15 for udp://, TCP/TLS for http(s)://)
+all at the same time, ranked by answer time, and the ranking is kept in the
+cache directory. A stale ranking is probed again in the background, so a
+run never waits for the trackers.
+"""
+
+import json
+import os
+import socket
+import ssl
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote, urlsplit
+
+from tget.core.scrape import TrackerError, UDPTracker
+from tget.core.utils import cache_dir
+
+__doc__ = """Usage: tget trackers [options]
+
+Probe the candidate trackers now and show their ranking, best first.
+Candidates are $TGET_TRACKERS (comma separated) or the built-in list.
+
+Options:
+  -w --timeout=<sec>    Seconds to wait for a tracker [default: 2].
+  -h --help             Help message.
+"""
+
+# Public trackers probed when $TGET_TRACKERS is not set, best known first.
+CANDIDATES = (
+    "udp://tracker.opentrackr.org:1337/announce",
+    "udp://open.demonii.com:1337/announce",
+    "udp://open.stealth.si:80/announce",
+    "udp://tracker.torrent.eu.org:451/announce",
+    "udp://exodus.desync.com:6969/announce",
+    "udp://explodie.org:6969/announce",
+    "udp://tracker.theoks.net:6969/announce",
+    "udp://opentracker.io:6969/announce",
+    "udp://tracker.dler.org:6969/announce",
+    "udp://tracker-udp.gbitt.info:80/announce",
+    "http://tracker.opentrackr.org:1337/announce",
+    "https://tracker.gbitt.info:443/announce",
+)
+CANDIDATES_ENV = "TGET_TRACKERS"
+# Trackers added to a magnet.
+TOP = 5
+# Seconds a ranking is used before the trackers are probed again.
+RANKING_TTL = 6 * 3600
+# ... and when no tracker answered the last time (offline).
+RETRY_TTL = 600
+PROBE_TIMEOUT = 2.0
+RANKING_FILE = "trackers.json"
+
+
+def candidates():
+    """candidates: $TGET_TRACKERS, empty when set to nothing, or CANDIDATES."""
+    value = os.environ.get(CANDIDATES_ENV)
+    if value is None:
+        return list(CANDIDATES)
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+def probe(url, timeout=PROBE_TIMEOUT):
+    """probe: seconds tracker @url takes to answer a connect handshake, None if it doesn't."""
+    parts = urlsplit(url)
+    try:
+        address = (parts.hostname, parts.port or {"https": 443, "http": 80}.get(parts.scheme))
+    except ValueError:
+        return None
+    if not all(address):
+        return None
+    if parts.scheme == "udp":
+        try:
+            return UDPTracker(address, timeout, retries=1).handshake()
+        except TrackerError:
+            return None
+    if parts.scheme not in ("http", "https"):
+        return None
+    start = time.monotonic()
+    try:
+        with socket.create_connection(address, timeout=timeout) as sock:
+            if parts.scheme == "https":
+                context = ssl.create_default_context()
+                with context.wrap_socket(sock, server_hostname=parts.hostname):
+                    pass
+    except (OSError, UnicodeError):
+        return None
+    return time.monotonic() - start
+
+
+class TrackerList(object):
+    """TrackerList: the candidate trackers ranked by their answer time.
+
+    @path - JSON file of the ranking, trackers.json in the cache directory.
+    @candidates - tracker URLs, candidates() by default.
+    """
+
+    def __init__(self, path=None, candidates=None, ttl=RANKING_TTL, timeout=PROBE_TIMEOUT):
+        self.path = path
+        self.candidates = list(candidates) if candidates is not None else None
+        self.ttl = ttl
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        # ranking - [(url, seconds)] of the trackers that answered, None before load().
+        self.ranking = None
+        self.checked = 0
+        self.probed_candidates = None
+        self.thread = None
+
+    def urls(self):
+        return self.candidates if self.candidates is not None else candidates()
+
+    def ranking_path(self):
+        return self.path or os.path.join(cache_dir(), RANKING_FILE)
+
+    def load(self):
+        """load: the stored ranking, nothing when it is missing or unreadable."""
+        try:
+            with open(self.ranking_path()) as f:
+                data = json.load(f)
+            ranking = [(url, float(seconds)) for url, seconds in data["trackers"]]
+            checked, probed = float(data["checked"]), list(data["candidates"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return self
+        with self.lock:
+            self.ranking, self.checked, self.probed_candidates = ranking, checked, probed
+        return self
+
+    def save(self):
+        """save: write the ranking, replaced atomically for concurrent runs."""
+        with self.lock:
+            data = {"checked": self.checked, "candidates": self.probed_candidates,
+                    "trackers": self.ranking}
+        path = self.ranking_path()
+        fd, tmp = tempfile.mkstemp(prefix=".tget-trackers-", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def probe(self):
+        """probe: probe every candidate at the same time, rank and save them.
+        @return: the ranking, [(url, seconds)] best first.
+        """
+        urls = self.urls()
+        with ThreadPoolExecutor(max_workers=max(1, len(urls))) as executor:
+            times = list(executor.map(lambda url: probe(url, self.timeout), urls))
+        ranking = sorted(((url, seconds) for url, seconds in zip(urls, times)
+                          if seconds is not None), key=lambda pair: pair[1])
+        with self.lock:
+            self.ranking, self.checked, self.probed_candidates = ranking, time.time(), urls
+        try:
+            self.save()
+        except OSError:
+            pass
+        return ranking
+
+    def stale(self):
+        if self.ranking is None or self.probed_candidates != self.urls():
+            return True
+        ttl = self.ttl if self.ranking else min(self.ttl, RETRY_TTL)
+        return time.time() - self.checked > ttl
+
+    def refresh(self):
+        """refresh: probe again in a background thread, one probe at a time."""
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(target=self.probe, name="tracker-probe",
+                                           daemon=True)
+        self.thread.start()
+
+    def best(self, count=TOP):
+        """best: URLs of the @count best trackers.
+
+        Before the first ranking, and when no tracker answered (offline),
+        the candidates are used in their order.
+        """
+        if self.ranking is None:
+            self.load()
+        if self.stale():
+            self.refresh()
+        with self.lock:
+            ranked = [url for url, _ in self.ranking or ()]
+        return (ranked or self.urls())[:count]
+
+
+TRACKER_LIST = None
+
+
+def tracker_list():
+    """tracker_list: the TrackerList of the process."""
+    global TRACKER_LIST
+    if TRACKER_LIST is None:
+        TRACKER_LIST = TrackerList()
+    return TRACKER_LIST
+
+
+def add_trackers(link, count=TOP, trackers=None):
+    """add_trackers: magnet @link with the best trackers it doesn't have yet.
+    @trackers - tracker URLs, tracker_list().best(@count) by default.
+    Other links (.torrent downloads) are returned as they are.
+    """
+    if not link or not link.startswith("magnet:"):
+        return link
+    if trackers is None:
+        trackers = tracker_list().best(count)
+    known = set(parse_qs(urlsplit(link).query).get("tr", ()))
+    return link + "".join("&tr=" + quote(url, safe="") for url in trackers if url not in known)
+
+
+def add_to_items(items, count=TOP):
+    """add_to_items: add the best trackers to the magnets of @items, in place."""
+    trackers = None
+    for item in items.values():
+        link = item.get("link")
+        if link and link.startswith("magnet:"):
+            if trackers is None:
+                trackers = tracker_list().best(count)
+            item["link"] = add_trackers(link, trackers=trackers)
+    return items
+
+
+def main(argv=None):
+    from docopt import docopt
+
+    args = docopt(__doc__, argv=argv)
+    trackers = TrackerList(timeout=float(args["--timeout"]))
+    ranking = trackers.probe()
+    for url, seconds in ranking:
+        print("%8.1f ms  %s" % (1000 * seconds, url))
+    dead = len(trackers.urls()) - len(ranking)
+    if dead:
+        print("%d tracker(s) didn't answer" % (dead), file=sys.stderr)
@@ -3,32 +3,33 @@ Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/
 See the file 'LICENSE' for copying.
 """
 
+import os
 import re
 import sys
-from glob import glob
 from os import sep
 from random import choice
 from typing import Dict, Optional
 
-from colorama import Fore, Style
-from colorama import init as colorama_init
-
 from tget import __file__ as p
 
-colorama_init(autoreset=True)
-
-# supported color from colorama 0.4.3
+# supported color, same codes as colorama.Fore (0.4.3)
 #  BLACK, RED, GREEN, YELLOW, BLUE, MAGENTA, CYAN, WHITE
-COLORS = {
-    "black": Fore.BLACK,
-    "blue": Fore.BLUE,
-    "cyan": Fore.CYAN,
-    "green": Fore.GREEN,
-    "magenta": Fore.MAGENTA,
-    "red": Fore.RED,
-    "white": Fore.WHITE,
-    "yellow": Fore.YELLOW,
+ANSI_COLORS = {
+    "black": "\x1b[30m",
+    "blue": "\x1b[34m",
+    "cyan": "\x1b[36m",
+    "green": "\x1b[32m",
+    "magenta": "\x1b[35m",
+    "red": "\x1b[31m",
+    "white": "\x1b[37m",
+    "yellow": "\x1b[33m",
 }
+ANSI_RESET = "\x1b[0m"
+# COLORS/RESET - codes in use, empty when stdout is not a terminal.
+# Set by init_colors() on the first colored output, so starting tget
+# does not import colorama (only needed on Windows).
+COLORS = dict()
+RESET = ""
 ITEM_COLOR_SET = {
     'leeches': 'red',
     'target': 'green',
@@ -39,6 +40,23 @@ ITEM_COLOR_SET = {
 }
 
 
+def init_colors():
+    """ init_colors: choose the color codes for sys.stdout.
+    """
+    global RESET
+    if COLORS:
+        return
+    tty = hasattr(sys.stdout, 'isatty') and sys.stdout.isatty()
+    if os.name == 'nt':
+        # colorama converts the codes for the Windows console and strips
+        # them when the output is redirected.
+        from colorama import init as colorama_init
+        colorama_init(autoreset=True)
+        tty = True
+    COLORS.update({x: ANSI_COLORS[x] if tty else '' for x in ANSI_COLORS})
+    RESET = ANSI_RESET if tty else ''
+
+
 def format_help(doc, errmsg):
     """ format_help: fix help message.
     """
@@ -64,9 +82,9 @@ def printc(color, text):
       @color
       @text
     """
-    for x in COLORS:
-        if x == color:
-            sys.stdout.write("%s%s%s\n" % (COLORS[x], text, Style.RESET_ALL))
+    init_colors()
+    if color in COLORS:
+        sys.stdout.write("%s%s%s\n" % (COLORS[color], text, RESET))
 
 
 def printc_raw(color, text):
@@ -74,9 +92,9 @@ def printc_raw(color, text):
     @color
     @text
     """
-    for x in COLORS:
-        if x == color:
-            sys.stdout.write("%s%s%s" % (COLORS[x], text, Style.RESET_ALL))
+    init_colors()
+    if color in COLORS:
+        sys.stdout.write("%s%s%s" % (COLORS[color], text, RESET))
 
 
 def msg_err_trace(exit=False):
@@ -93,9 +111,10 @@ def msg_err_trace(exit=False):
 
 
 def msg_fetching(target):
+    init_colors()
     sys.stdout.write("%s#%s Fetching data from %s\'%s'%s ...\r" % (
-        Fore.YELLOW, Style.RESET_ALL,
-        Fore.BLUE, target, Style.RESET_ALL
+        COLORS['yellow'], RESET,
+        COLORS['blue'], target, RESET
     ))
 
 
@@ -104,9 +123,9 @@ def color(color, msg):
        @color - Fore.color
        @msg - string.
     """
-    for x in COLORS:
-        if x == color:
-            return "%s%s%s" % (COLORS[x], msg, Style.RESET_ALL)
+    init_colors()
+    if color in COLORS:
+        return "%s%s%s" % (COLORS[color], msg, RESET)
 
 
 def msg_error(msg, exit):
@@ -114,7 +133,8 @@ def msg_error(msg, exit):
       @msg: string.
       @exit  : exit?
     """
-    sys.stdout.write("%s# error: %s\n" % (Fore.RED, msg))
+    init_colors()
+    sys.stdout.write("%s# error: %s%s\n" % (COLORS['red'], msg, RESET))
     if exit:
         sys.exit(1)
 
@@ -123,7 +143,8 @@ def msg_info(msg):
     """ msg_info: info message.
       @msg - string.
     """
-    sys.stdout.write("%s# %s\n" % (Fore.BLUE, msg))
+    init_colors()
+    sys.stdout.write("%s# %s%s\n" % (COLORS['blue'], msg, RESET))
 
 
 def msg_item(
@@ -181,6 +202,49 @@ def pkgpath():
     return sep.join(x)
 
 
+def cache_dir():
+    """ cache_dir - directory for the local data of tget (index, caches).
+
+      $TGET_CACHE_DIR, or tget/ in $XDG_CACHE_HOME (default ~/.cache).
+      the directory is created when missing.
+    """
+    path = os.environ.get('TGET_CACHE_DIR')
+    if not path:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+            os.path.expanduser('~'), '.cache'
+        )
+        path = os.path.join(base, 'tget')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def site_url(target, default):
+    """ site_url - base URL of the site scraped by @target.
+
+      $TGET_URL_<TARGET> (e.g. TGET_URL_1337X), or <target>/ in $TGET_SITES,
+      to point a module at a mirror or at the local stand-in server
+      (python -m tget.testing.server). @default otherwise.
+    """
+    url = os.environ.get('TGET_URL_%s' % (target.upper()))
+    if url:
+        return url.rstrip('/')
+    sites = os.environ.get('TGET_SITES')
+    if sites:
+        return '%s/%s' % (sites.rstrip('/'), target)
+    return default
+
+
+def infohash_from_magnet(link):
+    """ infohash_from_magnet - return the btih infohash of a magnet link.
+      @link - magnet link.
+      @return: upper case infohash, None if @link has no btih.
+    """
+    match = re.search(r'xt=urn:btih:([0-9A-Za-z]+)', link or '')
+    if match:
+        return match.group(1).upper()
+    return None
+
+
 def random_user_agent():
     """ rand_user_agent - return random user agent from txt/useragents.txt
     """
@@ -195,14 +259,7 @@ def random_user_agent():
 
 
 def list_wg_modules():
-    """ list_wg_modules - list all modules from modules/.
-    """
-    modules = list()
-    path = mkpath("%s/modules/*.py" % (pkgpath()))
-    for module in glob("%s" % (path)):
-        if "__init__" not in module:
-            module = module.split("%s" % (sep))[-1].split(".")[0]
-            modules.append(module)
-    # Sort with 1337x last — it returns unreliable results for multi-word searches
-    modules.sort(key=lambda m: (m == "1337x", m))
-    return modules
+    """ list_wg_modules - list all targets, bundled and from entry points.
+    """
+    from tget.core.registry import targets
+    return targets()
@@ -0,0 +1,156 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Item rendering of the shell: styles are resolved once per result set, lines
+are formatted only when they come into view and written in one go.
+"""
+
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+
+from tget.core import utils
+
+# Lines kept free under a page for the footer and the prompt.
+PROMPT_LINES = 3
+
+
+class ItemStyle(object):
+    """ItemStyle: the color codes of an item line, looked up once.
+    @item_color - colors overriding utils.ITEM_COLOR_SET (config 'item_color').
+    """
+
+    def __init__(self, item_color=None):
+        utils.init_colors()
+        cset = dict(utils.ITEM_COLOR_SET)
+        if item_color is not None:
+            cset.update(item_color)
+        reset = utils.RESET
+        self.formats = {
+            key: "%s%%s%s" % (utils.COLORS[value], reset) if value in utils.COLORS else "%s"
+            for key, value in cset.items()
+        }
+        self.line_format = "%s %s [%s/%s] %%s" % (
+            self.formats["target"], self.formats["item"],
+            self.formats["seeds"], self.formats["leeches"])
+
+    def line(self, name, item):
+        """line: the text of utils.msg_item() for item @name, without the new line."""
+        status = ""
+        if item.get("user_status") == "vip":
+            status = self.formats["user_status_vip"] % ("vip")
+        if item.get("duplicates"):
+            # --cluster: the near-duplicates listed under this one.
+            status += "%s(+%d)" % (" " if status else "", len(item["duplicates"]))
+        return self.line_format % (item["target"], name, item["seeds"], item["leeches"], status)
+
+
+class ItemView(object):
+    """ItemView: a window over the items of the shell.
+
+    Only the lines of the window are formatted, each one once, so showing
+    a page costs the same with 50 or 50000 items.
+    @items - items dict (name: item), in display order.
+    @height - lines of a page, the terminal height by default.
+    @names - the names of @items to show, in order, all of them by default.
+    """
+
+    def __init__(self, items, item_color=None, height=None, names=None):
+        self.items = items
+        self.names = list(items) if names is None else names
+        self.style = ItemStyle(item_color)
+        self.height = height
+        self.offset = 0
+        self.lines = dict()
+
+    def __len__(self):
+        return len(self.names)
+
+    def page_size(self):
+        if self.height:
+            return self.height
+        if not (hasattr(sys.stdout, "isatty") and sys.stdout.isatty()):
+            # Piped or captured: no screen to fit, one page holds everything.
+            return max(1, len(self))
+        return max(1, shutil.get_terminal_size().lines - PROMPT_LINES)
+
+    def line(self, index):
+        line = self.lines.get(index)
+        if line is None:
+            name = self.names[index]
+            line = self.lines[index] = self.style.line(name, self.items[name])
+        return line
+
+    def window(self, start=None, size=None):
+        """window: lines of the items from @start (the current offset), @size of them."""
+        start = self.offset if start is None else start
+        size = size or self.page_size()
+        return [self.line(index) for index in range(start, min(start + size, len(self)))]
+
+    def footer(self):
+        size = self.page_size()
+        if len(self) <= size:
+            return None
+        end = min(self.offset + size, len(self))
+        return "-- %d-%d of %d -- list next/prev/all or list <n> --" % (
+            self.offset + 1, end, len(self))
+
+    def move(self, where):
+        """move: set the window on 'next', 'prev', 'first', 'last' or item number @where.
+        @return: False for an unknown @where.
+        """
+        size = self.page_size()
+        last = max(0, len(self) - size)
+        if where == "next":
+            offset = self.offset + size
+        elif where == "prev":
+            offset = self.offset - size
+        elif where == "first":
+            offset = 0
+        elif where == "last":
+            offset = last
+        elif where.isdigit():
+            offset = int(where) - 1
+        else:
+            return False
+        self.offset = max(0, min(offset, last))
+        return True
+
+    def draw(self, out=None):
+        """draw: write the window and its footer in one write."""
+        out = out or sys.stdout
+        lines = self.window()
+        footer = self.footer()
+        if footer:
+            lines.append(utils.color("yellow", footer))
+        if lines:
+            out.write("\n".join(lines) + "\n")
+        out.flush()
+
+    def text(self):
+        return "".join(self.line(index) + "\n" for index in range(len(self)))
+
+    def page(self, out=None):
+        """page: every item through $PAGER (less -R), written out when there is no terminal."""
+        out = out or sys.stdout
+        text = self.text()
+        isatty = hasattr(out, "isatty") and out.isatty()
+        if isatty:
+            command = shlex.split(os.environ.get("PAGER") or "less -R")
+            try:
+                pager = subprocess.Popen(command, stdin=subprocess.PIPE)
+            except OSError:
+                pager = None
+            if pager is not None:
+                try:
+                    pager.communicate(text.encode(getattr(out, "encoding", None) or "utf-8",
+                                                  "replace"))
+                except (BrokenPipeError, KeyboardInterrupt):
+                    pass
+                pager.wait()
+                return
+        out.write(text)
+        out.flush()
@@ -5,6 +5,7 @@ See the file 'LICENSE' for copying permission
 
 from urllib.parse import quote_plus
 from tget.core.module import Module
+from tget.core.utils import site_url
 import re
 import requests
 import socket
@@ -15,6 +16,8 @@ BASE_URLS = [
     "https://1337x.st", 
     "https://www.1377x.to"
 ]
+if site_url("1337x", None):
+    BASE_URLS = [site_url("1337x", None)]
 BASE_URL = BASE_URLS[0]  # Default to first one
 # 1337x search can use different formats - try multiple
 SEARCH_LOCS = [
@@ -29,15 +32,16 @@ class leetx(object):
     """ 1337x module for tget.
     """
 
-    def __init__(self, pargs):
+    def __init__(self, pargs, budget=None):
         self.links = None
         self.pargs = pargs
+        self.budget = budget
         self.action = None
         self.search_query = None
         self.module = Module()
+        self.results = 10  # Limit the results to avoid blocking.
         self.parse_pargs()
         self.items = dict()
-        self.results = 10  # Limit the results to avoid blocking.
 
     def parse_pargs(self):
         for opt in self.pargs:
@@ -48,6 +52,34 @@ class leetx(object):
                 self.search_query = self.pargs[opt][0]
             elif opt == "--list":
                 self.action = "list"
+            elif opt == "--results":
+                self.results = int(self.pargs[opt][0])
+
+    def detail_links(self, data, links, working_base_url):
+        """detail_links: normalize torrent links found on a listing page.
+        @return: list of (link, listing seeds).
+        """
+        details = list()
+        seen_links = set()  # Avoid duplicate processing
+        for link in links:
+            # Normalize link
+            if link.startswith('http'):
+                # Full URL - extract path
+                if working_base_url and working_base_url in link:
+                    full_link = '/' + link.split(working_base_url)[-1].lstrip('/')
+                else:
+                    continue  # External link
+            elif link.startswith('/'):
+                full_link = link
+            else:
+                full_link = '/' + link
+
+            # Skip if we've already processed this link
+            if full_link in seen_links or "/torrent/" not in full_link:
+                continue
+            seen_links.add(full_link)
+            details.append((full_link, self.module.listing_seeds(data, link)))
+        return details
 
     def set_item(self, link):
         url = "%s%s" % (BASE_URL, link)
@@ -217,46 +249,11 @@ class leetx(object):
             if debug:
                 print(f"[DEBUG 1337x] Found {len(torrent_links)} torrent links")
             
-            results = 0
-            seen_links = set()  # Avoid duplicate processing
-
-            for link in torrent_links:
-                if results == self.results:
-                    break
-                # Normalize link
-                if link.startswith('http'):
-                    # Full URL - extract path
-                    if working_base_url and working_base_url in link:
-                        full_link = '/' + link.split(working_base_url)[-1].lstrip('/')
-                    else:
-                        continue  # External link
-                elif link.startswith('/'):
-                    full_link = link
-                else:
-                    full_link = '/' + link
-                
-                # Skip if we've already processed this link
-                if full_link in seen_links:
-                    continue
-                seen_links.add(full_link)
-                
-                if "/torrent/" in full_link:
-                    try:
-                        if debug:
-                            print(f"[DEBUG 1337x] Processing torrent link: {full_link}")
-                        item = self.set_item(full_link)
-                        if item:
-                            if debug:
-                                print(f"[DEBUG 1337x] Successfully extracted item: {list(item.keys())[0] if item else 'None'}")
-                            self.items.update(item)
-                            results += 1
-                        elif debug:
-                            print(f"[DEBUG 1337x] Failed to extract item from {full_link}")
-                    except Exception as e:
-                        if debug:
-                            print(f"[DEBUG 1337x] Error processing {full_link}: {e}")
-                        # Skip this item and continue
-                        continue
+            details = self.detail_links(data, torrent_links, working_base_url)
+            self.items.update(
+                self.module.fetch_details(details, self.set_item, self.results, self.budget,
+                                          site=BASE_URL)
+            )
         except (requests.exceptions.Timeout,
                 requests.exceptions.ConnectionError,
                 requests.exceptions.RequestException,
@@ -313,44 +310,11 @@ class leetx(object):
             if debug:
                 print(f"[DEBUG 1337x] Found {len(links)} torrent links")
             
-            results = 0
-            seen_links = set()
-
-            for link in links:
-                if results == self.results:
-                    break
-                # Normalize link
-                if link.startswith('http'):
-                    # Full URL - extract path
-                    if working_base_url and working_base_url in link:
-                        full_link = '/' + link.split(working_base_url)[-1].lstrip('/')
-                    else:
-                        continue  # External link
-                elif link.startswith('/'):
-                    full_link = link
-                else:
-                    full_link = '/' + link
-                
-                if full_link in seen_links:
-                    continue
-                seen_links.add(full_link)
-                
-                if "/torrent/" in full_link:
-                    try:
-                        if debug:
-                            print(f"[DEBUG 1337x] Processing torrent link: {full_link}")
-                        item = self.set_item(full_link)
-                        if item:
-                            if debug:
-                                print(f"[DEBUG 1337x] Successfully extracted item: {list(item.keys())[0] if item else 'None'}")
-                            self.items.update(item)
-                            results += 1
-                        elif debug:
-                            print(f"[DEBUG 1337x] Failed to extract item from {full_link}")
-                    except Exception as e:
-                        if debug:
-                            print(f"[DEBUG 1337x] Error processing {full_link}: {e}")
-                        continue
+            details = self.detail_links(data, links, working_base_url)
+            self.items.update(
+                self.module.fetch_details(details, self.set_item, self.results, self.budget,
+                                          site=BASE_URL)
+            )
         except (requests.exceptions.Timeout,
                 requests.exceptions.ConnectionError,
                 requests.exceptions.RequestException,
@@ -362,9 +326,14 @@ class leetx(object):
         return self.items
 
 
-def main(pargs):
-    run = leetx(pargs)
+def main(pargs, budget=None):
+    run = leetx(pargs, budget)
     if run.action == "list":
         return run.list()
     elif run.action == "search":
         return run.search()
+
+
+def list_urls():
+    """list_urls: URLs of the top list (one per mirror), checked by 'tget sync'."""
+    return ["%s%s" % (base_url, LIST_LOC) for base_url in BASE_URLS]
@@ -2,4 +2,8 @@
 Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
 See the file 'LICENSE' for copying permission
 """
-pass
+
+# TARGETS - bundled modules, in the order '--target all' runs them.
+# 1337x is last, it returns unreliable results for multi-word searches.
+# Keep in sync with the files of this directory (tests/test_registry.py).
+TARGETS = ("limetorrents", "the_pirate_bay", "yts", "1337x")
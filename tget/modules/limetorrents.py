@@ -5,11 +5,12 @@ See the file 'LICENSE' for copying permission
 
 from urllib.parse import quote_plus
 from tget.core.module import Module
+from tget.core.utils import site_url
 import re
 import requests
 import socket
 
-BASE_URL = "https://www.limetorrents.lol/"
+BASE_URL = site_url("limetorrents", "https://www.limetorrents.lol/")
 SEARCH_LOC = "/search/all/%s/"
 LIST_LOC = "/top100"
 
@@ -18,15 +19,16 @@ class limetorrents(object):
     """ limetorrents module for tget
     """
 
-    def __init__(self, pargs):
+    def __init__(self, pargs, budget=None):
         self.links = None
         self.pargs = pargs
+        self.budget = budget
         self.action = None
         self.search_query = None
         self.module = Module()
+        self.results = 10  # Limit the results to avoid blocking.
         self.parse_pargs()
         self.items = dict()
-        self.results = 10  # Limit the results to avoid blocking.
 
     def parse_pargs(self):
         for opt in self.pargs:
@@ -35,6 +37,16 @@ class limetorrents(object):
                 self.search_query = self.pargs[opt][0]
             elif opt == "--list":
                 self.action = "list"
+            elif opt == "--results":
+                self.results = int(self.pargs[opt][0])
+
+    def fetch_items(self, data, links):
+        """fetch_items: fetch the detail pages of @links found in @data."""
+        details = [(link, self.module.listing_seeds(data, link)) for link in links]
+        self.items.update(
+            self.module.fetch_details(details, self.set_item, self.results, self.budget,
+                                      site=BASE_URL)
+        )
 
     def set_item(self, link):
         url = "%s%s" % (BASE_URL, link)
@@ -85,15 +97,7 @@ class limetorrents(object):
         try:
             data = self.module.http_get_request(url)
             links = re.findall(r'tt-name[\'"]+>.*?</a><a href=[\'"]?([^\'">]+)', data)
-            results = 0
-
-            for link in links:
-                if results == self.results:
-                    break
-                item = self.set_item(link)
-                if item:
-                    self.items.update(item)
-                    results += 1
+            self.fetch_items(data, links)
         except (requests.exceptions.Timeout,
                 requests.exceptions.ConnectionError,
                 requests.exceptions.RequestException,
@@ -109,15 +113,7 @@ class limetorrents(object):
         try:
             data = self.module.http_get_request(url)
             links = re.findall(r'tt-name[\'"]+><a href=[\'"]?([^\'">]+)', data)
-            results = 0
-
-            for link in links:
-                if results == self.results:
-                    break
-                item = self.set_item(link)
-                if item:
-                    self.items.update(item)
-                    results += 1
+            self.fetch_items(data, links)
         except (requests.exceptions.Timeout,
                 requests.exceptions.ConnectionError,
                 requests.exceptions.RequestException,
@@ -128,9 +124,14 @@ class limetorrents(object):
             pass
         return self.items
 
-def main(pargs):
-    run = limetorrents(pargs)
+def main(pargs, budget=None):
+    run = limetorrents(pargs, budget)
     if run.action == "list":
         return run.list()
     elif run.action == "search":
         return run.search()
+
+
+def list_urls():
+    """list_urls: URLs of the top list, checked by 'tget sync'."""
+    return ["%s%s" % (BASE_URL, LIST_LOC)]
@@ -3,15 +3,16 @@ Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/
 See the file 'LICENSE' for copying permission
 """
 from tget.core.module import Module
+from tget.core.trackers import add_trackers
+from tget.core.utils import site_url
 import urllib
 import json
 
 
-API_URL = "https://apibay.org"
+API_URL = site_url("the_pirate_bay", "https://apibay.org")
 API_SEARCH_LOC = "/q.php?q="
 ALI_LIST_LOC = "/precompiled/data_top100_all.json"
 API_SFW_FILTER = "&cat=100,200,300,400,600"
-API_TRACKERS = "&tr=udp%3A%2F%2Ftracker.coppersurfer.tk%3A6969%2Fannounce&tr=udp%3A%2F%2F9.rarbg.me%3A2850%2Fannounce&tr=udp%3A%2F%2F9.rarbg.to%3A2920%2Fannounce&tr=udp%3A%2F%2Ftracker.opentrackr.org%3A1337&tr=udp%3A%2F%2Ftracker.leechers-paradise.org%3A6969%2Fannounce"  # NOQA
 
 
 class the_pirate_bay(object):
@@ -38,7 +39,9 @@ class the_pirate_bay(object):
                 self.filter = API_SFW_FILTER
 
     def generate_magnet(self, data):
-        return f"magnet:?xt=urn:btih:{data['info_hash']}&dn={urllib.parse.quote(data['name'])}{API_TRACKERS}"  # NOQA
+        # The best of the probed trackers (tget.core.trackers), not a fixed list.
+        return add_trackers(
+            f"magnet:?xt=urn:btih:{data['info_hash']}&dn={urllib.parse.quote(data['name'])}")
 
     def _parse_data(self, data):
         for row in json.loads(data):
@@ -67,13 +70,19 @@ class the_pirate_bay(object):
         return self.items
 
 
-def main(pargs):
+def main(pargs, budget=None):
     run = the_pirate_bay(pargs)
     if run.action == "list":
         return run.list()
     elif run.action == "search":
         return run.search()
 
+
+def list_urls():
+    """list_urls: URLs of the top list, checked by 'tget sync'."""
+    return [f"{API_URL}{ALI_LIST_LOC}"]
+
+
 def humanbytes(B):
    'Return the given bytes as a human friendly KB, MB, GB, or TB string'
    B = float(B)
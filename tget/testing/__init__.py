@@ -0,0 +1,6 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Stand-ins for the torrent sites, to test and benchmark tget without network.
+"""
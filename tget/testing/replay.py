@@ -0,0 +1,73 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from tget.core import module
+from tget.core.module import Module
+from tget.testing.sites import SITE_HOSTS, FakeSites
+
+
+class SitesAdapter(BaseAdapter):
+    """SitesAdapter: requests transport answering from FakeSites, no network.
+
+    @sites - FakeSites with the pages.
+    @hosts - host -> target, requests to other hosts get a 404.
+    """
+
+    def __init__(self, sites=None, hosts=None):
+        super().__init__()
+        self.sites = sites or FakeSites()
+        self.hosts = hosts or SITE_HOSTS
+        self.requests = 0
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        target = self.hosts.get(url.hostname)
+        if target is None:
+            status, ctype, body = 404, "text/plain", b"not found"
+        else:
+            status, ctype, body = self.sites.respond(target, url.path, url.query)
+        self.requests += 1
+        res = requests.Response()
+        res.status_code = status
+        res.reason = "OK" if status == 200 else "Not Found"
+        res.headers = CaseInsensitiveDict({"Content-Type": ctype,
+                                           "Content-Length": str(len(body))})
+        res._content = body
+        res.encoding = "utf-8"
+        res.url = request.url
+        res.request = request
+        return res
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def replay(adapter=None):
+    """replay: answer every request of the modules with @adapter.
+
+    The adapter is mounted on the shared session of Module; cloudscraper is
+    disabled meanwhile, so 1337x goes through the session too.
+    """
+    adapter = adapter or SitesAdapter()
+    session = Module.session()
+    saved = dict(session.adapters)
+    has_cloudscraper = module.HAS_CLOUDSCRAPER
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    module.HAS_CLOUDSCRAPER = False
+    try:
+        yield adapter
+    finally:
+        module.HAS_CLOUDSCRAPER = has_cloudscraper
+        session.adapters.clear()
+        session.adapters.update(saved)
@@ -0,0 +1,219 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+from tget.core.server import TCPHTTPServer
+from tget.testing.sites import CHALLENGE_PAGE, DETAIL_SIZE, LISTING_SIZE, FakeSites
+
+__doc__ = """Usage: fake-sites [options]
+
+Local stand-in for the torrent sites, to load and fault test tget.
+Run it with python -m tget.testing.server [options].
+Every site is served under /<target>/, point tget at it with
+TGET_SITES=http://127.0.0.1:<port> (or TGET_URL_<TARGET> per module).
+
+Options:
+  -p --port=<port>        Port on 127.0.0.1, 0 for a free one [default: 8000].
+  -n --rows=<n>           Torrents known by the sites [default: 500].
+  -l --latency=<ms>       Delay before every answer [default: 0].
+  -j --jitter=<ms>        Random extra delay up to <ms> [default: 0].
+  -b --bandwidth=<kbs>    Throughput cap of every answer in KB/s, 0 for none [default: 0].
+  -f --fault=<kind:rate>  Answer a share of the requests with a fault: 403, 429,
+                          challenge (Cloudflare page) or timeout, e.g. 429:0.1.
+                          Comma separated for several.
+  --listing-size=<bytes>  Size of the HTML listing pages [default: 60000].
+  --detail-size=<bytes>   Size of the HTML detail pages [default: 40000].
+  --seed=<n>              Seed of the fault and jitter draws [default: 0].
+  -h --help               Help message.
+
+Requests served so far: GET /_stats
+"""
+
+FAULTS = ("403", "429", "challenge", "timeout")
+# A 'timeout' fault holds the answer this long, longer than the module timeouts.
+TIMEOUT_DELAY = 15.0
+
+log = logging.getLogger(__name__)
+
+
+def parse_faults(text):
+    """parse_faults: '429:0.1,challenge:0.05' -> {'429': 0.1, 'challenge': 0.05}."""
+    faults = dict()
+    for fault in filter(None, (text or "").split(",")):
+        kind, _, rate = fault.partition(":")
+        if kind not in FAULTS:
+            raise ValueError("unknown fault '%s', use one of %s" % (kind, ", ".join(FAULTS)))
+        faults[kind] = float(rate or 1)
+    return faults
+
+
+class FakeServer(object):
+    """FakeServer: HTTP server answering like the sites of the bundled modules.
+
+    @sites - FakeSites with the pages.
+    @latency - seconds before every answer, plus up to @jitter seconds.
+    @bandwidth - bytes per second of every answer, 0 for no cap.
+    @faults - {fault: share of the requests}, see FAULTS.
+    @port - 0 for a free port.
+
+    Use it as a context manager to serve from a thread:
+        with FakeServer() as server:
+            os.environ["TGET_SITES"] = server.url
+    """
+
+    def __init__(self, sites=None, latency=0, jitter=0, bandwidth=0, faults=None,
+                 port=0, seed=0):
+        self.sites = sites or FakeSites()
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.faults = faults or dict()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.httpd = TCPHTTPServer(("127.0.0.1", port), self.handler())
+        self.thread = None
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % (self.httpd.server_address[1])
+
+    def base_url(self, target):
+        return "%s/%s" % (self.url, target)
+
+    def draw(self):
+        """draw: fault and delay of the next answer."""
+        with self.lock:
+            fault = None
+            for kind, rate in self.faults.items():
+                if self.random.random() < rate:
+                    fault = kind
+                    break
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        return fault, delay
+
+    def respond(self, path):
+        """respond: (status, headers, body) of a GET of @path."""
+        url = urlsplit(path)
+        if url.path == "/_stats":
+            body = json.dumps(dict(self.stats), sort_keys=True).encode("utf-8")
+            return 200, {"Content-Type": "application/json"}, body
+        target, _, rest = url.path.lstrip("/").partition("/")
+        fault, delay = self.draw()
+        if delay:
+            time.sleep(delay)
+        if fault == "timeout":
+            time.sleep(TIMEOUT_DELAY)
+        if fault == "403":
+            status, headers, body = 403, {"Content-Type": "text/html"}, b"<h1>403 Forbidden</h1>"
+        elif fault == "429":
+            status, headers, body = 429, {"Content-Type": "text/html", "Retry-After": "5"}, \
+                b"<h1>429 Too Many Requests</h1>"
+        elif fault == "challenge":
+            status, headers, body = 403, {
+                "Content-Type": "text/html", "Server": "cloudflare", "cf-ray": "0000000000000000-AMS"
+            }, CHALLENGE_PAGE.encode("utf-8")
+        elif target not in ("the_pirate_bay", "yts", "1337x", "limetorrents"):
+            status, headers, body = 404, {"Content-Type": "text/plain"}, b"not found"
+        else:
+            status, ctype, body = self.sites.respond(target, "/" + rest, url.query)
+            headers = {"Content-Type": ctype}
+        with self.lock:
+            self.stats["%s %d" % (target or "/", status)] += 1
+            self.stats["requests"] += 1
+        return status, headers, body
+
+    def handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so the load follows the connection pool of tget.
+            protocol_version = "HTTP/1.1"
+            server_version = "tget-fake-site"
+
+            def log_message(self, format, *args):
+                log.debug("%s %s", self.address_string(), format % args)
+
+            def do_GET(self):
+                status, headers, body = server.respond(self.path)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                server.write(self.wfile, body)
+
+        return Handler
+
+    def write(self, wfile, body):
+        """write: send @body, no faster than self.bandwidth bytes/s."""
+        if not self.bandwidth:
+            wfile.write(body)
+            return
+        chunk = max(1024, int(self.bandwidth / 20))
+        start = time.monotonic()
+        for sent in range(0, len(body), chunk):
+            wfile.write(body[sent:sent + chunk])
+            wfile.flush()
+            ahead = (sent + chunk) / self.bandwidth - (time.monotonic() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    from docopt import docopt
+
+    from tget.core.utils import msg_info
+
+    args = docopt(__doc__, argv=argv)
+    sites = FakeSites(count=int(args["--rows"]),
+                      listing_size=int(args["--listing-size"] or LISTING_SIZE),
+                      detail_size=int(args["--detail-size"] or DETAIL_SIZE))
+    server = FakeServer(
+        sites,
+        latency=float(args["--latency"]) / 1000,
+        jitter=float(args["--jitter"]) / 1000,
+        bandwidth=float(args["--bandwidth"]) * 1024,
+        faults=parse_faults(args["--fault"]),
+        port=int(args["--port"]),
+        seed=int(args["--seed"]),
+    )
+    msg_info("fake sites: TGET_SITES=%s" % (server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
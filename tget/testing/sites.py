@@ -0,0 +1,320 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Fake pages of the sites scraped by the bundled modules, in the shape the
+modules parse: apibay JSON, YTS list_movies.json, 1337x and limetorrents
+listing and detail pages. The pages are generated from a deterministic
+list of torrents, so a benchmark or test gets the same data every run.
+"""
+
+import hashlib
+import json
+import random
+import re
+from urllib.parse import parse_qs, quote_plus, unquote_plus
+
+# Hosts of the bundled modules -> target.
+SITE_HOSTS = {
+    "apibay.org": "the_pirate_bay",
+    "yts.bz": "yts",
+    "1337x.to": "1337x",
+    "1337x.st": "1337x",
+    "www.1377x.to": "1337x",
+    "www.limetorrents.lol": "limetorrents",
+}
+TRACKER = "udp%3A%2F%2Ftracker.opentrackr.org%3A1337%2Fannounce"
+
+TITLES = (
+    "Ubuntu", "Debian", "Fedora", "Big Buck Bunny", "Sintel", "Tears of Steel",
+    "Elephants Dream", "Cosmos Laundromat", "Spring", "Agent 327", "Caminandes",
+    "Night of the Living Dead", "Charade", "The General", "Nosferatu",
+)
+QUALITIES = ("720p", "1080p", "2160p")
+SOURCES = ("BluRay", "WEBRip", "WEB-DL", "HDTV")
+CODECS = ("x264", "x265", "HEVC")
+GROUPS = ("YIFY", "GalaxyRG", "NTb", "FGT", "SPARKS")
+
+# Page sizes of the real sites, roughly (bytes).
+LISTING_SIZE = 60000
+DETAIL_SIZE = 40000
+# Results of one listing page.
+PAGE_ROWS = {"the_pirate_bay": 100, "yts": 20, "1337x": 20, "limetorrents": 50}
+
+CHALLENGE_PAGE = """<!DOCTYPE html><html lang="en-US"><head><title>Just a moment...</title>
+</head><body><div id="challenge-body-text">Checking your browser before accessing
+the site.</div><noscript>Enable JavaScript and cookies to continue</noscript>
+</body></html>"""
+
+
+def human_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return "%.1f %s" % (size, unit)
+        size /= 1024
+    return "%.1f TB" % (size)
+
+
+def make_torrents(count=100, seed=0):
+    """make_torrents: @count fake torrents, the same for the same @seed.
+    @return: list of dicts with id, name, title, year, quality, info_hash,
+      seeders, leechers and size (bytes), best seeded first.
+    """
+    rnd = random.Random(seed)
+    torrents = list()
+    names = set()
+    for i in range(count):
+        title = rnd.choice(TITLES)
+        year = rnd.randint(1920, 2024)
+        quality = rnd.choice(QUALITIES)
+        name = "%s.%d.%s.%s.%s-%s" % (
+            title.replace(" ", "."), year, quality,
+            rnd.choice(SOURCES), rnd.choice(CODECS), rnd.choice(GROUPS))
+        if name in names:
+            name = "%s.PART%d" % (name, i)
+        names.add(name)
+        torrents.append({
+            "id": 1000 + i,
+            "name": name,
+            "title": title,
+            "year": year,
+            "quality": quality,
+            "info_hash": hashlib.sha1(name.encode("utf-8")).hexdigest().upper(),
+            "seeders": int(10 * rnd.paretovariate(0.8)) % 50000,
+            "leechers": int(5 * rnd.paretovariate(1.0)) % 5000,
+            "size": rnd.randint(200, 60000) * 1024 * 1024,
+        })
+    torrents.sort(key=lambda torrent: torrent["seeders"], reverse=True)
+    return torrents
+
+
+def magnet(torrent):
+    return "magnet:?xt=urn:btih:%s&dn=%s&tr=%s" % (
+        torrent["info_hash"], quote_plus(torrent["name"]), TRACKER)
+
+
+def slug(torrent):
+    return torrent["name"].replace(".", "-")
+
+
+def pad(page, size):
+    """pad: grow an HTML @page to about @size bytes, like the markup around
+    the results of a real page (menus, scripts, ads)."""
+    missing = size - len(page)
+    if missing <= 0:
+        return page
+    line = "<div class=\"nav-item\"><a href=\"/cat/%d/\">category %d</a></div>\n"
+    filler = list()
+    i = 0
+    while missing > 0:
+        chunk = line % (i, i)
+        filler.append(chunk)
+        missing -= len(chunk)
+        i += 1
+    return page.replace("</body>", "".join(filler) + "</body>", 1)
+
+
+def html_page(title, body, size):
+    page = ("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>%s</title></head>"
+            "<body>\n<div class=\"header\">%s</div>\n%s\n</body></html>\n") % (title, title, body)
+    return pad(page, size)
+
+
+def apibay_json(torrents):
+    """apibay_json: answer of apibay q.php and the precompiled top lists."""
+    if not torrents:
+        torrents = [{"id": 0, "name": "No results returned", "info_hash": "0" * 40,
+                     "seeders": 0, "leechers": 0, "size": 0}]
+    return json.dumps([{
+        "id": str(torrent["id"]),
+        "name": torrent["name"],
+        "info_hash": torrent["info_hash"],
+        "leechers": str(torrent["leechers"]),
+        "seeders": str(torrent["seeders"]),
+        "num_files": "1",
+        "size": str(torrent["size"]),
+        "username": "uploader",
+        "added": "1600000000",
+        "status": ("vip", "trusted", "member")[torrent["id"] % 3] if torrent["id"] else "member",
+        "category": "207",
+        "imdb": "",
+    } for torrent in torrents])
+
+
+def yts_json(torrents):
+    """yts_json: answer of list_movies.json, torrents grouped by movie."""
+    movies = dict()
+    for torrent in torrents:
+        key = (torrent["title"], torrent["year"])
+        movie = movies.setdefault(key, {
+            "id": torrent["id"], "title": torrent["title"], "year": torrent["year"],
+            "title_english": torrent["title"], "torrents": [],
+        })
+        movie["torrents"].append({
+            "url": "https://yts.bz/torrent/download/%s" % (torrent["info_hash"]),
+            "hash": torrent["info_hash"],
+            "quality": torrent["quality"],
+            "type": "bluray",
+            "seeds": torrent["seeders"],
+            "peers": torrent["leechers"],
+            "size": human_size(torrent["size"]),
+            "size_bytes": torrent["size"],
+        })
+    return json.dumps({
+        "status": "ok",
+        "status_message": "Query was successful",
+        "data": {"movie_count": len(movies), "limit": 20, "page_number": 1,
+                 "movies": list(movies.values())},
+    })
+
+
+def leetx_listing(torrents, size=LISTING_SIZE):
+    """leetx_listing: 1337x search or top-100 page."""
+    rows = "".join(
+        "<tr>\n<td class=\"coll-1 name\"><a href=\"/sub/54/0/\" class=\"icon\">"
+        "<i class=\"flaticon-hd\"></i></a><a href=\"/torrent/%d/%s/\">%s</a></td>\n"
+        "<td class=\"coll-2 seeds\">%d</td>\n<td class=\"coll-3 leeches\">%d</td>\n"
+        "<td class=\"coll-date\">Jan. 1st '20</td>\n"
+        "<td class=\"coll-4 size mob-uploader\">%s</td>\n"
+        "<td class=\"coll-5 uploader\"><a href=\"/user/uploader/\">uploader</a></td>\n</tr>\n"
+        % (torrent["id"], slug(torrent), torrent["name"], torrent["seeders"],
+           torrent["leechers"], human_size(torrent["size"]))
+        for torrent in torrents
+    )
+    body = ("<table class=\"table-list table table-responsive table-striped\">\n"
+            "<thead><tr><th>name</th><th>se</th><th>le</th></tr></thead>\n"
+            "<tbody>\n%s</tbody>\n</table>") % (rows)
+    return html_page("1337x", body, size)
+
+
+def leetx_detail(torrent, size=DETAIL_SIZE):
+    """leetx_detail: 1337x torrent page."""
+    body = ("<div class=\"box-info-heading\"><h1>%s</h1></div>\n"
+            "<ul class=\"download-links-dontblock\"><li><a class=\"btn\" href=\"%s\">"
+            "Magnet Download</a></li></ul>\n<ul class=\"list\">\n"
+            "<li><strong>Total size</strong> <span>%s</span></li>\n"
+            "<li><strong>Seeders</strong> <span class=\"seeds\">%d</span></li>\n"
+            "<li><strong>Leechers</strong> <span class=\"leeches\">%d</span></li>\n"
+            "</ul>\n<div class=\"infohash-box\"><span>%s</span></div>") % (
+        torrent["name"], magnet(torrent), human_size(torrent["size"]),
+        torrent["seeders"], torrent["leechers"], torrent["info_hash"])
+    return html_page("Download %s Torrent | 1337x" % (torrent["name"]), body, size)
+
+
+def limetorrents_listing(torrents, search=True, size=LISTING_SIZE):
+    """limetorrents_listing: limetorrents search or top100 page."""
+    if search:
+        # Search rows start with the .torrent download icon.
+        name = ("<div class=\"tt-name\"><a href=\"http://itorrents.org/torrent/%s.torrent"
+                "?title=%s\" rel=\"nofollow\" class=\"csprite_dl14\"></a>"
+                "<a href=\"/%s-torrent-%d.html\">%s</a></div>")
+    else:
+        name = "<div class=\"tt-name\"><a href=\"/%s-torrent-%d.html\">%s</a></div>"
+    rows = list()
+    for torrent in torrents:
+        if search:
+            cell = name % (torrent["info_hash"], slug(torrent), slug(torrent),
+                           torrent["id"], torrent["name"])
+        else:
+            cell = name % (slug(torrent), torrent["id"], torrent["name"])
+        rows.append(
+            "<tr bgcolor=\"#F4F4F4\"><td class=\"tdleft\">%s</td>"
+            "<td class=\"tdnormal\">1 Year+ - in Other</td>"
+            "<td class=\"tdnormal\">%s</td><td class=\"tdseed\">%s</td>"
+            "<td class=\"tdleech\">%s</td></tr>\n" % (
+                cell, human_size(torrent["size"]), "{:,}".format(torrent["seeders"]),
+                "{:,}".format(torrent["leechers"])))
+    body = "<table class=\"table2\">\n%s</table>" % ("".join(rows))
+    return html_page("limetorrents", body, size)
+
+
+def limetorrents_detail(torrent, size=DETAIL_SIZE):
+    """limetorrents_detail: limetorrents torrent page."""
+    body = ("<div id=\"content\"><h1>%s</h1>\n"
+            "<div class=\"dltorrent\"><p><a href=\"%s\" class=\"csprite_dltorrent\">"
+            "Magnet Download</a></p></div>\n"
+            "<table><tr><td><span class=\"greenish\">Seeders : %d</span></td></tr>\n"
+            "<tr><td><span class=\"reddish\">Leechers : %d</span></td></tr></table>\n"
+            "</div>") % (torrent["name"], magnet(torrent), torrent["seeders"],
+                         torrent["leechers"])
+    return html_page("%s Torrent Download - LimeTorrents" % (torrent["name"]), body, size)
+
+
+class FakeSites(object):
+    """FakeSites: answer the requests of the bundled modules with fake pages.
+
+    @torrents - torrents the sites know, make_torrents(count) by default.
+    @listing_size/@detail_size - bytes of the HTML pages.
+    """
+
+    def __init__(self, torrents=None, count=100, listing_size=LISTING_SIZE,
+                 detail_size=DETAIL_SIZE):
+        self.torrents = torrents if torrents is not None else make_torrents(count)
+        self.by_id = {torrent["id"]: torrent for torrent in self.torrents}
+        self.listing_size = listing_size
+        self.detail_size = detail_size
+
+    def search(self, text, target):
+        """search: torrents with every word of @text, a page of @target."""
+        words = [word for word in re.split(r"[\s+\-.]+", unquote_plus(text).lower()) if word]
+        found = [torrent for torrent in self.torrents
+                 if all(word in torrent["name"].lower() for word in words)]
+        return found[:PAGE_ROWS[target]]
+
+    def top(self, target):
+        return self.torrents[:PAGE_ROWS[target]]
+
+    def detail(self, match):
+        return self.by_id.get(int(match.group(1))) if match else None
+
+    def respond(self, target, path, query=""):
+        """respond: answer a GET of @path?@query on the site of @target.
+        @return: (status, content type, body bytes).
+        """
+        path = re.sub("/+", "/", path)
+        params = parse_qs(query)
+        body = None
+        ctype = "text/html; charset=utf-8"
+        if target == "the_pirate_bay":
+            ctype = "application/json"
+            if path == "/q.php":
+                body = apibay_json(self.search(params.get("q", [""])[0], target))
+            elif path.startswith("/precompiled/data_top100"):
+                body = apibay_json(self.top(target))
+        elif target == "yts":
+            ctype = "application/json"
+            if path == "/api/v2/list_movies.json":
+                if "query_term" in params:
+                    torrents = self.search(params["query_term"][0], target)
+                else:
+                    torrents = self.top(target)
+                quality = params.get("quality", [None])[0]
+                if quality:
+                    torrents = [torrent for torrent in torrents if torrent["quality"] == quality]
+                body = yts_json(torrents)
+        elif target == "1337x":
+            search = re.match(r"^/search/([^/]+)/", path)
+            if path == "/search" and "q" in params:
+                body = leetx_listing(self.search(params["q"][0], target), self.listing_size)
+            elif search:
+                body = leetx_listing(self.search(search.group(1), target), self.listing_size)
+            elif path.rstrip("/") == "/top-100":
+                body = leetx_listing(self.top(target), self.listing_size)
+            else:
+                torrent = self.detail(re.match(r"^/torrent/(\d+)/", path))
+                if torrent:
+                    body = leetx_detail(torrent, self.detail_size)
+        elif target == "limetorrents":
+            search = re.match(r"^/search/all/([^/]+)/", path)
+            if search:
+                body = limetorrents_listing(
+                    self.search(search.group(1), target), True, self.listing_size)
+            elif path.rstrip("/") == "/top100":
+                body = limetorrents_listing(self.top(target), False, self.listing_size)
+            else:
+                torrent = self.detail(re.search(r"-torrent-(\d+)\.html$", path))
+                if torrent:
+                    body = limetorrents_detail(torrent, self.detail_size)
+        if body is None:
+            return 404, "text/plain", b"not found"
+        return 200, ctype, body.encode("utf-8")
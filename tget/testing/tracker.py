@@ -0,0 +1,105 @@
+"""
+Copyright (c) 2016-2020 we-get developers (https://github.com/rachmadaniHaryono/we-get/)
+See the file 'LICENSE' for copying.
+
+Local stand-in for a UDP tracker (BEP 15), answering connect and scrape.
+"""
+
+import random
+import socketserver
+import struct
+import threading
+from collections import Counter
+
+from tget.core.scrape import CONNECT, ERROR, PROTOCOL_ID, SCRAPE
+
+
+class FakeTracker(object):
+    """FakeTracker: UDP tracker knowing the swarms of some torrents.
+
+    @swarms - {info hash (hex): (seeds, leeches, completed)}, other torrents
+      are scraped as 0/0/0, or a list of tget.testing.sites torrents.
+    @drop - share of the packets left without an answer.
+    @port - 0 for a free port.
+
+    Use it as a context manager to serve from a thread:
+        with FakeTracker(swarms) as tracker:
+            magnet += "&tr=" + tracker.url
+    """
+
+    def __init__(self, swarms=None, drop=0, port=0, seed=0):
+        if isinstance(swarms, list):
+            swarms = {torrent["info_hash"]: (torrent["seeders"], torrent["leechers"], 0)
+                      for torrent in swarms}
+        self.swarms = {key.upper(): value for key, value in (swarms or dict()).items()}
+        self.drop = drop
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.connections = set()
+        # stats - packets by action ('connect', 'scrape', 'dropped', 'error')
+        # and 'hashes' scraped.
+        self.stats = Counter()
+        self.udpd = socketserver.ThreadingUDPServer(("127.0.0.1", port), self.handler())
+        self.udpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.udpd.server_address
+
+    @property
+    def url(self):
+        return "udp://127.0.0.1:%d/announce" % (self.address[1])
+
+    def respond(self, data):
+        """respond: the answer to packet @data, None for no answer."""
+        if len(data) < 16:
+            return None
+        connection_id, action, transaction = struct.unpack_from(">QII", data)
+        with self.lock:
+            if self.drop and self.random.random() < self.drop:
+                self.stats["dropped"] += 1
+                return None
+            if action == CONNECT and connection_id == PROTOCOL_ID:
+                self.stats["connect"] += 1
+                connection_id = self.random.getrandbits(64)
+                self.connections.add(connection_id)
+                return struct.pack(">IIQ", CONNECT, transaction, connection_id)
+            if action != SCRAPE or connection_id not in self.connections:
+                self.stats["error"] += 1
+                return struct.pack(">II", ERROR, transaction) + b"Connection ID mismatch."
+            self.stats["scrape"] += 1
+            answer = [struct.pack(">II", SCRAPE, transaction)]
+            for start in range(16, len(data) - 19, 20):
+                value = data[start:start + 20].hex().upper()
+                seeds, leeches, completed = self.swarms.get(value, (0, 0, 0))
+                answer.append(struct.pack(">III", seeds, completed, leeches))
+                self.stats["hashes"] += 1
+        return b"".join(answer)
+
+    def handler(self):
+        tracker = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                data, sock = self.request
+                answer = tracker.respond(data)
+                if answer is not None:
+                    sock.sendto(answer, self.client_address)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.udpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.udpd.shutdown()
+        self.udpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()